@@ -0,0 +1,1039 @@
+"""Ходы компьютера без интерфейса
+
+Поле передается плоским списком символов длиной size * size ('' — пусто).
+Сложность задается бюджетом вычислений: Сложный ИИ углубляет поиск,
+пока не израсходует node_budget узлов (или time_limit секунд), поэтому
+стоимость хода ограничена на любом размере поля. Вся случайность идет
+через переданный random.Random, так что ход можно точно повторить.
+"""
+
+import array
+import json
+import queue
+import random
+import threading
+import time
+
+from engine import EMPTY, cells_to_masks, winning_lines, local_windows, state_class
+from tablebase import load_tablebase
+from pns import solve_move
+
+DEFAULT_NODE_BUDGET = 20000
+
+# Бюджет узлов подсказки и сколько позиций помнит ее кеш
+HINT_NODE_BUDGET = 20000
+HINT_CACHE_SIZE = 1000
+
+# Лимит узлов решателя PNS, при котором Сложный ИИ ищет доказанный ход;
+# решатель берет не больше PNS_SHARE бюджета узлов и времени хода
+PNS_NODE_BUDGET = 50000
+PNS_MAX_SIZE = 5
+PNS_SHARE = 0.5
+
+
+# Веса оценки линий, подобранные tuning.py
+EVAL_WEIGHTS_FILE = "eval_weights.json"
+
+_eval_weights = None
+
+
+def load_eval_weights():
+    """Подобранные веса {размер: таблица} из файла рядом с игрой (или пустой словарь)"""
+    global _eval_weights
+    if _eval_weights is None:
+        try:
+            with open(EVAL_WEIGHTS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            _eval_weights = {int(size): entry['weights'] for size, entry in data['sizes'].items()}
+        except Exception:
+            _eval_weights = {}
+    return _eval_weights
+
+
+def line_scores(length, weights=None, size=None):
+    """Плоская таблица оценки линии по числу фигур: индекс ai * (length + 1) + human.
+
+    length — длина выигрышной линии. weights — квадратная таблица весов
+    (length + 1) x (length + 1), 'hand' — ручные веса, None — подобранные
+    из файла для поля size x size, если они есть и линия во всю сторону
+    поля, иначе ручные. Ручные веса: линия только с фигурами одного
+    игрока дает 1, 10, 100..., смешанная линия — 0.
+    """
+    if weights is None:
+        weights = load_eval_weights().get(size, 'hand') if size == length else 'hand'
+    if weights == 'hand':
+        powers = [0] + [10 ** (count - 1) for count in range(1, length + 1)]
+        weights = [[0] * (length + 1) for _ in range(length + 1)]
+        for count in range(length + 1):
+            weights[count][0] = powers[count]
+            weights[0][count] = -powers[count]
+    return [weights[ai][human] for ai in range(length + 1) for human in range(length + 1)]
+
+
+# Вес окна 2x2, занятого фигурами одного игрока: (фигур - 1) * WINDOW_WEIGHT
+WINDOW_WEIGHT = 1
+
+_pattern_tables = {}
+
+
+def pattern_table(length, score):
+    """Таблица оценок всех образцов кортежа из length клеток.
+
+    Индекс — троичный код кортежа, значение — score(фигур игрока 0,
+    фигур игрока 1). Хранится компактно: array целых чисел, если все
+    оценки целые, иначе array чисел с плавающей точкой.
+    """
+    values = []
+    for code in range(3 ** length):
+        ai_count = human_count = 0
+        while code:
+            code, digit = divmod(code, 3)
+            if digit == 1:
+                ai_count += 1
+            elif digit == 2:
+                human_count += 1
+        values.append(score(ai_count, human_count))
+    if all(float(value).is_integer() and abs(value) < 2 ** 31 for value in values):
+        return array.array('i', (int(value) for value in values))
+    return array.array('d', values)
+
+
+def window_score(ai_count, human_count):
+    """Окно 2x2: плотная группа фигур одного игрока"""
+    if human_count == 0 and ai_count > 1:
+        return (ai_count - 1) * WINDOW_WEIGHT
+    if ai_count == 0 and human_count > 1:
+        return -(human_count - 1) * WINDOW_WEIGHT
+    return 0
+
+
+class PatternEvaluator:
+    """Оценка по таблицам образцов n-кортежей клеток
+
+    Кортежи — выигрышные линии и по желанию окна 2x2. Для каждой длины
+    кортежа таблица строится один раз на размер поля и длину линии; оценка позиции —
+    по одному обращению к таблице на кортеж по кодам, которые GameState
+    обновляет при каждом ходе. Без окон и с теми же весами оценка
+    совпадает с evaluate_board.
+    """
+
+    def __init__(self, size, weights=None, windows=False, win_length=None):
+        length = win_length or size
+        scores = line_scores(length, weights, size)
+        stride = length + 1
+        key = (size, length, windows, tuple(scores))
+        if key not in _pattern_tables:
+            lines = winning_lines(size, win_length)
+            line_table = pattern_table(length, lambda a, b: scores[a * stride + b])
+            tuples, tables = lines, [line_table] * len(lines)
+            if windows:
+                squares = local_windows(size)
+                window_table = pattern_table(4, window_score)
+                tuples = lines + squares
+                tables = tables + [window_table] * len(squares)
+            _pattern_tables[key] = (tuples, tables)
+        self.tuples, self.tables = _pattern_tables[key]
+        # Больше этого по модулю оценка позиции не бывает
+        limits = {}
+        for table in self.tables:
+            if id(table) not in limits:
+                limits[id(table)] = max(map(abs, table))
+        self.bound = sum(limits[id(table)] for table in self.tables)
+
+    def evaluate(self, state):
+        """Оценка с точки зрения игрока 0"""
+        score = 0
+        for table, code in zip(self.tables, state.codes):
+            score += table[code]
+        return score
+
+
+def move_rng(seed, move_number):
+    """Отдельный генератор для каждого хода партии: ход воспроизводим сам по себе"""
+    return random.Random(f"{seed}:{move_number}")
+
+
+def empty_cells(board):
+    """Индексы пустых клеток"""
+    return [cell for cell, value in enumerate(board) if value == '']
+
+
+class SearchAborted(Exception):
+    """Бюджет поиска исчерпан посреди итерации"""
+
+
+# Типы оценок в таблице транспозиций
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+MAX_TABLE_ENTRIES = 500000
+
+# Алгоритм поиска Сложного ИИ: 'negamax' (PVS) или прежний 'minimax'
+SEARCH_ALGORITHM = 'negamax'
+
+# Оценка позиции: 'lines' (счетчики линий), 'patterns' (таблицы образцов
+# линий) или 'windows' (образцы линий и окон 2x2)
+SEARCH_EVALUATOR = 'lines'
+
+# Полуширина окна вокруг оценки прошлой итерации
+ASPIRATION_WINDOW = 25
+# Оценка победы — предел оценки линий плюс WIN_MARGIN и оставшаяся глубина
+WIN_MARGIN = 10
+
+# Сокращение поздних ходов: с какого по счету хода и с какой глубины
+LMR_MIN_INDEX = 3
+LMR_MIN_DEPTH = 3
+
+# Как часто поиск сообщает число узлов (степень двойки)
+PROGRESS_NODES = 1024
+
+
+class SearchSession:
+    """Состояние поиска, которое переживает ход: кеш оценок и главная линия
+
+    Одна сессия живет одну партию. Следующий поиск начинается с позиции,
+    до которой дошла игра, и находит в таблице оценки, посчитанные
+    предыдущим поиском на два полухода глубже. История отсечений
+    (history) живет один поиск; до него ее можно заполнить, чтобы
+    поменять порядок ходов (помощники в parallel.py).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.table = {}
+        self.history = {}
+        self.pv = []
+        self.pv_hash = None
+        self.log = []
+
+    def fork(self):
+        """Независимая копия для обдумывания"""
+        copy = SearchSession.__new__(SearchSession)
+        copy.size = self.size
+        copy.table = dict(self.table)
+        copy.history = dict(self.history)
+        copy.pv = list(self.pv)
+        copy.pv_hash = self.pv_hash
+        copy.log = list(self.log)
+        return copy
+
+    def clear(self):
+        """Забыть все (новая партия)"""
+        self.table.clear()
+        self.history.clear()
+        self.pv = []
+        self.pv_hash = None
+        self.log = []
+
+
+class Search:
+    """Поиск с итеративным углублением и бюджетом узлов
+
+    Работает на GameState или SparseState: компьютер — игрок 0, человек — 1.
+    algorithm='negamax' — негамакс с поиском главного варианта (PVS),
+    окнами стремления и по желанию сокращением поздних ходов (reductions);
+    algorithm='minimax' — прежний мини-макс с альфа-бета отсечением,
+    оставлен для сравнения. Таблица сессии хранит оценки только одного
+    из алгоритмов: у мини-макса они с точки зрения компьютера,
+    у негамакса — с точки зрения ходящего. weights — веса оценки линий
+    (см. line_scores), evaluator — способ оценки (см. SEARCH_EVALUATOR).
+    on_depth(глубина, ход, оценка, узлы) вызывается после каждой
+    просчитанной глубины — так вызывающий знает лучший ход на сейчас,
+    on_nodes(узлы) — каждые PROGRESS_NODES узлов.
+    """
+
+    def __init__(self, size, node_budget=DEFAULT_NODE_BUDGET, time_limit=None,
+                 stop_event=None, session=None, max_depth=None,
+                 algorithm=SEARCH_ALGORITHM, reductions=False, weights=None,
+                 evaluator=SEARCH_EVALUATOR, on_depth=None, on_nodes=None):
+        self.size = size
+        self.node_budget = node_budget
+        self.time_limit = time_limit
+        self.stop_event = stop_event
+        self.session = session if session is not None else SearchSession(size)
+        self.max_depth = max_depth
+        self.algorithm = algorithm
+        self.reductions = reductions
+        self.state = None
+        self.weights = weights
+        self.evaluator = evaluator
+        self.line_length = None
+        self.line_scores = None
+        self.patterns = None
+        self.win_score = None
+        self.evaluate = self.evaluate_board if evaluator == 'lines' else self.evaluate_patterns
+        self.nodes = 0
+        self.depth = 0
+        self.score = None
+        self.deadline = None
+        self.on_depth = on_depth
+        self.on_nodes = on_nodes
+
+    def prepare(self, state):
+        """Таблицы оценки под длину линии состояния; состояние начинает вести оценку"""
+        self.state = state
+        if self.line_length != state.line_length:
+            self.line_length = state.line_length
+            self.line_scores = line_scores(state.line_length, self.weights, self.size)
+            spans = self.size - state.line_length + 1
+            windows = 2 * self.size * spans + 2 * spans * spans
+            bound = max(map(abs, self.line_scores)) * windows
+            if self.evaluator != 'lines':
+                if not hasattr(state, 'track_tuples'):
+                    raise ValueError("оценка по образцам только для плотного поля")
+                self.patterns = PatternEvaluator(self.size, self.weights,
+                                                 self.evaluator == 'windows',
+                                                 state.line_length)
+                bound = self.patterns.bound
+            # Победа дороже любой оценки линий, поэтому поиск и подсказка
+            # ставят вынужденный выигрыш выше самой сильной позиции
+            self.win_score = int(bound) + WIN_MARGIN
+        state.track_scores(self.line_scores)
+        if self.patterns is not None:
+            state.track_tuples(self.patterns.tuples)
+
+    def best_move(self, state):
+        """Лучший ход последней полностью просчитанной глубины (или None)"""
+        session = self.session
+        self.prepare(state)
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = (
+            time.perf_counter() + self.time_limit if self.time_limit else None
+        )
+        # Общая таблица parallel.SharedTable фиксированного размера сама вытесняет записи
+        if isinstance(session.table, dict) and len(session.table) > MAX_TABLE_ENTRIES:
+            session.table.clear()
+        # Игра пришла в позицию главной линии прошлого поиска?
+        pv_hit = state.hash == session.pv_hash
+
+        best_move = None
+        order = state.candidate_cells()
+        entry = session.table.get(state.hash)
+        if entry and entry[3] in order:
+            order.remove(entry[3])
+            order.insert(0, entry[3])
+
+        max_depth = self.size * self.size - state.filled
+        if self.max_depth:
+            max_depth = min(max_depth, self.max_depth)
+        start, score = 1, None
+        if pv_hit and entry and entry[2] == EXACT:
+            # Прошлый поиск уже просчитал эту позицию на два полухода мельче
+            # своей глубины: углубление начинается с нее, окно — вокруг ее оценки
+            start, score = max(1, min(entry[0], max_depth)), entry[1]
+        for depth in range(start, max_depth + 1):
+            try:
+                if self.algorithm == 'minimax':
+                    move, score = self.search_root(order, depth)
+                else:
+                    move, score = self.aspiration_root(order, depth, score)
+            except SearchAborted:
+                break
+            best_move = move
+            self.score = score
+            self.depth = depth
+            session.table[state.hash] = (depth, score, EXACT, move)
+            if self.on_depth is not None:
+                self.on_depth(depth, move, score, self.nodes)
+            # Лучший ход предыдущей глубины просчитываем первым
+            order.remove(move)
+            order.insert(0, move)
+
+        if best_move is not None:
+            session.pv, session.pv_hash = self.principal_variation()
+        session.log.append({'nodes': self.nodes, 'depth': self.depth, 'pv_hit': pv_hit})
+        # История отсечений верна только для этой позиции: перенесенная
+        # на следующий ход, она портит порядок ходов (bench.py reuse)
+        session.history.clear()
+        return best_move
+
+    def principal_variation(self):
+        """Главная линия из таблицы и хеш позиции через два полухода"""
+        state = self.state
+        pv = []
+        pv_hash = None
+        while len(pv) < self.depth and state.winner is None:
+            entry = self.session.table.get(state.hash)
+            if not entry or entry[3] is None or state.cells[entry[3]] != EMPTY:
+                break
+            state.play(entry[3])
+            pv.append(entry[3])
+            if len(pv) == 2:
+                pv_hash = state.hash
+        for _ in pv:
+            state.undo()
+        return pv, pv_hash
+
+    def search_root(self, cells, depth):
+        """Одна итерация: оценка всех ходов корня на глубину depth"""
+        best_score = -float('inf')
+        best_move = None
+        state = self.state
+        for cell in cells:
+            state.play(cell, 0)
+            try:
+                score = self.minimax(depth - 1, False, -float('inf'), float('inf'))
+            finally:
+                state.undo()
+            if score > best_score:
+                best_score = score
+                best_move = cell
+        return best_move, best_score
+
+    def aspiration_root(self, cells, depth, guess):
+        """Итерация негамакса в окне вокруг оценки прошлой итерации"""
+        if guess is None or depth < 3:
+            alpha, beta = -float('inf'), float('inf')
+        else:
+            alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+
+        while True:
+            move, score = self.pvs_root(cells, depth, alpha, beta)
+            if score <= alpha:
+                alpha = -float('inf')
+            elif score >= beta:
+                beta = float('inf')
+            else:
+                return move, score
+
+    def pvs_root(self, cells, depth, alpha, beta):
+        """Корень PVS: первый ход в полном окне, остальные в нулевом"""
+        state = self.state
+        best_score = -float('inf')
+        best_move = None
+        for index, cell in enumerate(cells):
+            state.play(cell)
+            try:
+                if index == 0:
+                    score = -self.negamax(depth - 1, -beta, -alpha)
+                else:
+                    score = -self.negamax(depth - 1, -alpha - 1, -alpha)
+                    if alpha < score < beta:
+                        score = -self.negamax(depth - 1, -beta, -alpha)
+            finally:
+                state.undo()
+            if score > best_score:
+                best_score = score
+                best_move = cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_move, best_score
+
+    def negamax(self, depth, alpha, beta):
+        """Негамакс с PVS: оценка с точки зрения ходящего"""
+        self.count_node()
+        state = self.state
+        table = self.session.table
+        key = state.hash
+        tt_move = None
+        entry = table.get(key)
+        if entry is not None:
+            if entry[0] >= depth:
+                score, flag = entry[1], entry[2]
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+            tt_move = entry[3]
+
+        if state.winner is not None:
+            # Выиграл тот, кто только что ходил
+            return -self.win_score - depth
+        if state.is_full():
+            return 0
+        if depth == 0:
+            score = self.evaluate()
+            if state.to_move == 1:
+                score = -score
+            table[key] = (0, score, EXACT, None)
+            return score
+
+        alpha_orig = alpha
+        best = -float('inf')
+        best_cell = None
+
+        for index, cell in enumerate(self.ordered_cells(tt_move)):
+            state.play(cell)
+            try:
+                if index == 0:
+                    score = -self.negamax(depth - 1, -beta, -alpha)
+                else:
+                    reduction = (
+                        1 if self.reductions
+                        and index >= LMR_MIN_INDEX and depth >= LMR_MIN_DEPTH
+                        else 0
+                    )
+                    score = -self.negamax(depth - 1 - reduction, -alpha - 1, -alpha)
+                    if reduction and score > alpha:
+                        score = -self.negamax(depth - 1, -alpha - 1, -alpha)
+                    if alpha < score < beta:
+                        score = -self.negamax(depth - 1, -beta, -alpha)
+            finally:
+                state.undo()
+
+            if score > best:
+                best, best_cell = score, cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                history = self.session.history
+                history[cell] = history.get(cell, 0) + depth * depth
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table[key] = (depth, best, flag, best_cell)
+        return best
+
+    def count_node(self):
+        """Учет узла и проверка бюджета"""
+        self.nodes += 1
+        if self.nodes > self.node_budget:
+            raise SearchAborted
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted
+        if self.nodes & (PROGRESS_NODES - 1) == 0:
+            if self.deadline and time.perf_counter() > self.deadline:
+                raise SearchAborted
+            if self.on_nodes is not None:
+                self.on_nodes(self.nodes)
+
+    def ordered_cells(self, tt_move):
+        """Ходы-кандидаты: ход из таблицы, затем по истории отсечений"""
+        history = self.session.history
+        cells = self.state.candidate_cells()
+        if history:
+            cells.sort(key=lambda cell: -history.get(cell, 0))
+        if tt_move is not None and tt_move in cells:
+            cells.remove(tt_move)
+            cells.insert(0, tt_move)
+        return cells
+
+    def minimax(self, depth, is_maximizing, alpha, beta):
+        """Мини-макс алгоритм с альфа-бета отсечением и таблицей транспозиций"""
+        self.count_node()
+        state = self.state
+        table = self.session.table
+        key = state.hash
+        tt_move = None
+        entry = table.get(key)
+        if entry is not None:
+            # Оценка с большей оставшейся глубиной точнее и тоже годится
+            if entry[0] >= depth:
+                score, flag = entry[1], entry[2]
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+            tt_move = entry[3]
+
+        if state.winner == 0:
+            return self.win_score + depth  # Чем быстрее победа, тем лучше
+        if state.winner == 1:
+            return -self.win_score - depth  # Чем дальше поражение, тем лучше
+        if state.is_full():
+            return 0
+        if depth == 0:
+            score = self.evaluate()
+            table[key] = (0, score, EXACT, None)
+            return score
+
+        alpha_orig, beta_orig = alpha, beta
+        player = 0 if is_maximizing else 1
+        best = -float('inf') if is_maximizing else float('inf')
+        best_cell = None
+
+        for cell in self.ordered_cells(tt_move):
+            state.play(cell, player)
+            try:
+                eval_score = self.minimax(depth - 1, not is_maximizing, alpha, beta)
+            finally:
+                state.undo()
+
+            if is_maximizing:
+                if eval_score > best:
+                    best, best_cell = eval_score, cell
+                alpha = max(alpha, eval_score)
+            else:
+                if eval_score < best:
+                    best, best_cell = eval_score, cell
+                beta = min(beta, eval_score)
+
+            if beta <= alpha:
+                history = self.session.history
+                history[cell] = history.get(cell, 0) + depth * depth
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table[key] = (depth, best, flag, best_cell)
+        return best
+
+    def evaluate_board(self):
+        """Оценка позиции по счетчикам линий: сумму ведет состояние, O(1)"""
+        return self.state.score
+
+    def evaluate_patterns(self):
+        """Оценка по таблицам образцов: одно обращение к таблице на кортеж"""
+        return self.patterns.evaluate(self.state)
+
+
+def get_easy_move(board, rng):
+    """Случайный ход"""
+    return rng.choice(empty_cells(board))
+
+
+def preferred_cell(state, rng):
+    """Центр, затем углы, затем случайная пустая клетка"""
+    size = state.size
+    center = (size // 2) * size + size // 2
+    if state.cells[center] == EMPTY:
+        return center
+    for cell in (0, size - 1, size * (size - 1), size * size - 1):
+        if state.cells[cell] == EMPTY:
+            return cell
+    return rng.choice(state.empty_cells())
+
+
+def ai_state(board, size, ai_symbol, human_symbol, win_length=None):
+    """Состояние для поиска (разреженное на больших полях): компьютер — игрок 0 и сейчас его ход"""
+    return state_class(size).from_board(board, size, (ai_symbol, human_symbol), 0, win_length)
+
+
+def get_medium_move(board, size, ai_symbol, human_symbol, rng, win_length=None):
+    """Ход для среднего уровня сложности: выигрыш, блокировка, центр, углы
+
+    Выигрыш и блокировка ищутся по счетчикам линий GameState без пробных
+    постановок в каждую клетку.
+    """
+    state = ai_state(board, size, ai_symbol, human_symbol, win_length)
+    for player in (0, 1):
+        cell = state.winning_move(player)
+        if cell is not None:
+            return cell
+    return preferred_cell(state, rng)
+
+
+def get_hard_move(board, size, ai_symbol, human_symbol, first_symbol, rng,
+                  node_budget=DEFAULT_NODE_BUDGET, time_limit=None, stats=None,
+                  stop_event=None, session=None, win_length=None, pool=None, on_depth=None,
+                  on_nodes=None):
+    """Ход высокой сложности: таблица эндшпиля, решатель PNS, затем поиск с бюджетом
+
+    Решатель PNS (поля до PNS_MAX_SIZE) берет не больше PNS_SHARE бюджета
+    узлов и времени и останавливается по stop_event; его узлы входят
+    в stats['nodes'], а поиску остается остаток бюджета.
+    pool — parallel.ParallelSearch: поиск идет в нескольких процессах
+    с общей таблицей транспозиций (бюджет — на каждый процесс).
+    on_depth и on_nodes — см. Search.
+    """
+    stats = stats if stats is not None else {}
+    state = ai_state(board, size, ai_symbol, human_symbol, win_length)
+    second_symbol = human_symbol if first_symbol == ai_symbol else ai_symbol
+    masks = cells_to_masks(board, first_symbol, second_symbol)
+
+    table = load_tablebase(size, win_length)
+    if table is not None and size * size - state.filled <= table.max_empty:
+        # Таблица хранит клетки по тому, кто начинал партию, а не по символам
+        cell, _ = table.best_move(*masks)
+        if cell is not None:
+            stats['source'] = 'tablebase'
+            return cell
+
+    pns_nodes = 0
+    if size <= PNS_MAX_SIZE:
+        started = time.perf_counter()
+        pns_stats = {}
+        # Бюджет может быть бесконечным (go infinite в протоколе движка)
+        _, cell = solve_move(masks, size, int(min(PNS_NODE_BUDGET, node_budget * PNS_SHARE)),
+                             win_length, time_limit and time_limit * PNS_SHARE, stop_event,
+                             pns_stats)
+        pns_nodes = pns_stats['nodes']
+        if cell is not None:
+            stats.update(source='pns', nodes=pns_nodes)
+            return cell
+        # Поиску остается то, что не потратил решатель
+        node_budget = max(1, node_budget - pns_nodes)
+        if time_limit:
+            time_limit = max(0.001, time_limit - (time.perf_counter() - started))
+
+    for player in (0, 1):
+        cell = state.winning_move(player)
+        if cell is not None:
+            stats.update(source='threat', nodes=pns_nodes)
+            return cell
+
+    if pool is not None:
+        cell = pool.best_move(state, node_budget, time_limit, stats=stats)
+        stats['nodes'] += pns_nodes
+        return cell if cell is not None else preferred_cell(state, rng)
+
+    search = Search(size, node_budget, time_limit, stop_event, session, on_depth=on_depth,
+                    on_nodes=on_nodes)
+    cell = search.best_move(state)
+    stats.update(source='search', nodes=search.nodes + pns_nodes, depth=search.depth,
+                 pv_hit=search.session.log[-1]['pv_hit'])
+    if cell is not None:
+        return cell
+    return preferred_cell(state, rng)
+
+
+def choose_move(board, size, difficulty, ai_symbol, human_symbol, first_symbol, rng,
+                node_budget=DEFAULT_NODE_BUDGET, time_limit=None, stats=None, session=None,
+                win_length=None, pool=None):
+    """Ход компьютера для заданного уровня сложности
+
+    win_length — длина выигрышной линии; None — во всю сторону поля.
+    """
+    if difficulty == 'Easy':
+        return get_easy_move(board, rng)
+    if difficulty == 'Medium':
+        return get_medium_move(board, size, ai_symbol, human_symbol, rng, win_length)
+    return get_hard_move(board, size, ai_symbol, human_symbol, first_symbol, rng,
+                         node_budget, time_limit, stats, session=session,
+                         win_length=win_length, pool=pool)
+
+
+def likely_replies(board, size, ai_symbol, human_symbol, win_length=None):
+    """Ответы человека от вероятных к маловероятным
+
+    Сначала выигрыш и блокировка, затем ходы по статической оценке
+    с точки зрения человека.
+    """
+    state = ai_state(board, size, ai_symbol, human_symbol, win_length)
+    urgent = []
+    for player in (1, 0):
+        cell = state.winning_move(player)
+        if cell is not None and cell not in urgent:
+            urgent.append(cell)
+
+    search = Search(size)
+    search.prepare(state)
+    scored = []
+    for cell in state.candidate_cells():
+        if cell in urgent:
+            continue
+        state.play(cell, 1)
+        # Меньшая оценка компьютера — лучший ход человека
+        scored.append((search.evaluate_board(), cell))
+        state.undo()
+    scored.sort()
+    return urgent + [cell for _, cell in scored]
+
+
+class Ponder:
+    """Обдумывание ответа компьютера, пока думает человек
+
+    Фоновый поток по очереди перебирает вероятные ходы человека и для
+    каждого заранее считает ход Сложного ИИ с тем же бюджетом и тем же
+    генератором, что и обычный ход, поэтому результат совпадает с ним.
+    Каждый ответ считается на своей копии сессии поиска; при попадании
+    копия становится сессией партии, остальные выбрасываются. Каждый
+    ответ — AnytimeMove, который считается в потоке обдумывания.
+    """
+
+    def __init__(self, size, ai_symbol, human_symbol, first_symbol, node_budget,
+                 win_length=None):
+        self.size = size
+        self.win_length = win_length
+        self.ai_symbol = ai_symbol
+        self.human_symbol = human_symbol
+        self.first_symbol = first_symbol
+        self.node_budget = node_budget
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.results = {}
+        # (позиция, AnytimeMove) ответа, который считается сейчас
+        self.current = None
+        self.handed_off = False
+
+    def start(self, board, seed, move_number, session=None):
+        """Начать обдумывание ответов на позицию board (ходит человек)"""
+        self.stop()
+        self.stop_event = threading.Event()
+        self.results = {}
+        self.current = None
+        self.handed_off = False
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(list(board), seed, move_number, session, self.stop_event),
+            daemon=True
+        )
+        self.thread.start()
+
+    def run(self, board, seed, move_number, session, stop_event):
+        """Фоновый перебор вероятных ответов"""
+        replies = likely_replies(board, self.size, self.ai_symbol, self.human_symbol,
+                                 self.win_length)
+        for reply in replies:
+            child = list(board)
+            child[reply] = self.human_symbol
+            if '' not in child or stop_event.is_set():
+                break
+            key = tuple(child)
+            fork = session.fork() if session is not None else None
+            move = AnytimeMove(
+                child, self.size, self.ai_symbol, self.human_symbol, self.first_symbol,
+                move_rng(seed, move_number), self.node_budget, fork, self.win_length,
+                stop_event=stop_event, thread=False
+            )
+            with self.lock:
+                self.current = (key, move)
+
+            try:
+                move.search()
+            finally:
+                with self.lock:
+                    self.current = None
+                    move.stats['source'] = 'ponder/' + move.stats.get('source', '')
+                    if not stop_event.is_set():
+                        self.results[key] = (move.cell, move.stats, fork)
+                    handed_off = self.handed_off
+                move.finished.set()
+            if stop_event.is_set() or handed_off:
+                break
+
+    def take(self, board):
+        """(ход, статистика, сессия) для фактической позиции или None, если догадка не сбылась
+
+        Если нужная позиция как раз считается, ее поиск не ждется: take
+        отдает его AnytimeMove, за которым следят так же, как за обычным
+        ходом в фоне (сессия партии — его session). Обдумывание остальных
+        ответов в любом случае прекращается.
+        """
+        key = tuple(board)
+        with self.lock:
+            result = self.results.get(key)
+            if result is None and self.current is not None and self.current[0] == key:
+                self.handed_off = True
+                return self.current[1]
+        self.stop()
+        return result
+
+    def stop(self):
+        """Остановить обдумывание и забыть результаты"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.results = {}
+
+
+class AnytimeMove:
+    """Ход Сложного ИИ в фоновом потоке: ход можно потребовать в любой момент
+
+    Пока поток считает, progress() отдает глубину, лучший ход последней
+    просчитанной глубины, его оценку и число узлов. play_now()
+    останавливает поиск, и ходом становится лучший ход на этот момент.
+    С thread=False своего потока нет: search() вызывает чужой поток
+    (Ponder), он же отмечает конец через finished.
+    """
+
+    def __init__(self, board, size, ai_symbol, human_symbol, first_symbol, rng,
+                 node_budget=DEFAULT_NODE_BUDGET, session=None, win_length=None,
+                 stop_event=None, thread=True):
+        self.args = (list(board), size, ai_symbol, human_symbol, first_symbol, rng, node_budget)
+        self.session = session
+        self.win_length = win_length
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.finished = threading.Event()
+        self.stats = {}
+        self.best = (0, None, None)
+        self.nodes = 0
+        self.started = time.perf_counter()
+        self.cell = None
+        self.stopped = False
+        if thread:
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        """Поиск в фоновом потоке"""
+        try:
+            self.search()
+        finally:
+            self.finished.set()
+
+    def search(self):
+        """Поиск хода в вызывающем потоке"""
+        self.cell = get_hard_move(*self.args, stats=self.stats, stop_event=self.stop_event,
+                                  session=self.session, win_length=self.win_length,
+                                  on_depth=self.depth_done, on_nodes=self.nodes_done)
+
+    def depth_done(self, depth, move, score, nodes):
+        """Просчитана очередная глубина (вызывается из потока поиска)"""
+        self.best = (depth, move, score)
+        self.nodes = nodes
+
+    def nodes_done(self, nodes):
+        """Счетчик узлов (вызывается из потока поиска)"""
+        self.nodes = nodes
+
+    @property
+    def done(self):
+        """Ход найден"""
+        return self.finished.is_set()
+
+    def progress(self):
+        """Глубина, лучший ход, оценка, узлы и узлы в секунду на сейчас"""
+        depth, move, score = self.best
+        seconds = time.perf_counter() - self.started
+        return {'depth': depth, 'move': move, 'score': score, 'nodes': self.nodes,
+                'nps': self.nodes / seconds if seconds > 0 else 0}
+
+    def play_now(self):
+        """Закончить поиск и ходить лучшим ходом на сейчас"""
+        self.stopped = not self.done
+        self.stop_event.set()
+
+    def stop(self):
+        """Остановить поиск и дождаться его конца"""
+        self.stop_event.set()
+        self.finished.wait()
+
+
+def cell_scores(board, size, player_symbol, other_symbol, node_budget=HINT_NODE_BUDGET,
+                stop_event=None, session=None, win_length=None, on_score=None):
+    """Оценки ходов-кандидатов игрока player_symbol: {клетка: оценка}
+
+    Каждая клетка просчитывается в полном окне, глубина растет, пока
+    хватает бюджета, поэтому оценки клеток сравнимы между собой. После
+    каждой клетки вызывается on_score(клетка, оценка, глубина).
+    """
+    state = ai_state(board, size, player_symbol, other_symbol, win_length)
+    search = Search(size, node_budget, stop_event=stop_event, session=session)
+    if len(search.session.table) > MAX_TABLE_ENTRIES:
+        search.session.table.clear()
+    search.prepare(state)
+    cells = state.candidate_cells()
+    scores = {}
+    try:
+        for depth in range(1, size * size - state.filled + 1):
+            for cell in cells:
+                state.play(cell)
+                try:
+                    score = -search.negamax(depth - 1, -float('inf'), float('inf'))
+                finally:
+                    state.undo()
+                scores[cell] = score
+                if on_score is not None:
+                    on_score(cell, score, depth)
+            # Сильные ходы первыми: их оценки на новой глубине нужнее
+            cells.sort(key=lambda cell: -scores[cell])
+    except SearchAborted:
+        pass
+    return scores
+
+
+class Hint:
+    """Подсказка: оценки всех ходов позиции в фоновом потоке
+
+    Оценки приходят по одной через poll, пока поток считает. Готовая
+    карта запоминается по позиции, поэтому повторный запрос (после отмены
+    хода или повторного включения) отвечает сразу. Таблица оценок своя
+    у подсказки и переживает запросы, как сессия поиска партии.
+    """
+
+    def __init__(self, size, win_length=None, node_budget=HINT_NODE_BUDGET):
+        self.size = size
+        self.win_length = win_length
+        self.node_budget = node_budget
+        self.session = SearchSession(size)
+        self.cache = {}
+        self.updates = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, board, player_symbol, other_symbol):
+        """Оценка ходов player_symbol; возвращает (ключ, готовая карта из кеша или None)"""
+        self.stop()
+        key = (tuple(board), player_symbol)
+        if key in self.cache:
+            return key, self.cache[key]
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(key, list(board), player_symbol, other_symbol, self.stop_event),
+            daemon=True
+        )
+        self.thread.start()
+        return key, None
+
+    def run(self, key, board, player_symbol, other_symbol, stop_event):
+        """Фоновая оценка; в конце в очередь идет (ключ, None, None)"""
+        def on_score(cell, score, depth):
+            self.updates.put((key, cell, score))
+
+        scores = cell_scores(board, self.size, player_symbol, other_symbol, self.node_budget,
+                             stop_event, self.session, self.win_length, on_score)
+        if stop_event.is_set():
+            return
+        if len(self.cache) >= HINT_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[key] = scores
+        self.updates.put((key, None, None))
+
+    def poll(self):
+        """Пришедшие оценки (ключ, клетка, оценка); клетка None — карта готова"""
+        items = []
+        while True:
+            try:
+                items.append(self.updates.get_nowait())
+            except queue.Empty:
+                return items
+
+    def stop(self):
+        """Остановить фоновую оценку (кеш остается)"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def clear(self):
+        """Новая партия: забыть таблицу оценок (карты позиций остаются верны)"""
+        self.stop()
+        self.session.clear()
+
+
+def replay_move(record, number):
+    """Повтор хода компьютера номер number из записи партии
+
+    Поле восстанавливается по первым number ходам, генератор — по seed
+    записи, поэтому при бюджете в узлах результат совпадает с записанным.
+    Сессия поиска переходит от хода к ходу, поэтому все предыдущие ходы
+    Сложного ИИ тоже пересчитываются по порядку.
+    """
+    size = record['size']
+    board = [''] * (size * size)
+    session = SearchSession(size)
+    stats = {}
+    cell = None
+    for index, move in enumerate(record['moves'][:number + 1]):
+        if move['symbol'] == record['ai_symbol'] and move.get('ai') is not None:
+            stats = {}
+            cell = choose_move(
+                board, size, record['difficulty'],
+                record['ai_symbol'], record['human_symbol'], record['first_symbol'],
+                move_rng(record['seed'], index),
+                record['node_budget'], record.get('time_limit'), stats, session,
+                record.get('win_length')
+            )
+        if index < number:
+            board[move['cell']] = move['symbol']
+    return cell, stats
@@ -0,0 +1,416 @@
+"""Замеры движка без интерфейса
+
+    python bench.py reuse --size 5 --depth 3
+    python bench.py compare --depth 3 --reductions
+    python bench.py evaluators --depth 3
+    python bench.py startup --runs 5
+    python bench.py engine --requests 50
+    python bench.py sparse --sizes 10 19 25 --stones 20
+    python bench.py shared --workers 2 --depth 3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ai import Search, SearchSession
+from engine import EMPTY, GameState, SparseState
+
+
+def measure_reuse(size, depth, verbose=True):
+    """Партия Сложного ИИ против самого себя с фиксированной глубиной.
+
+    На каждом ходе один и тот же поиск делается дважды: с сессией,
+    сохраненной с прошлых ходов, и с чистого листа. Ход берется из
+    поиска с сессией. Возвращает список (узлы с сессией, узлы без нее).
+    """
+    sessions = (SearchSession(size), SearchSession(size))
+    # Каждая сторона видит поле со своей точки зрения: она — игрок 0
+    states = (GameState(size, 0), GameState(size, 1))
+    results = []
+    side = 0
+
+    while not states[0].is_full():
+        reused = Search(size, node_budget=float('inf'),
+                        session=sessions[side], max_depth=depth)
+        move = reused.best_move(states[side])
+
+        fresh = Search(size, node_budget=float('inf'), max_depth=depth)
+        fresh.best_move(states[side])
+
+        results.append((reused.nodes, fresh.nodes))
+        if verbose:
+            saved = 1 - reused.nodes / fresh.nodes if fresh.nodes else 0
+            hit = sessions[side].log[-1]['pv_hit']
+            print(f"ход {len(results):3d} (сторона {side + 1}): с сессией {reused.nodes:8d}, "
+                  f"заново {fresh.nodes:8d}, экономия {saved:6.1%}"
+                  f"{'  (по главной линии)' if hit else ''}")
+
+        states[side].play(move, 0)
+        states[1 - side].play(move, 1)
+        if states[side].winner is not None:
+            break
+        side = 1 - side
+
+    return results
+
+
+def position_suite(sizes=(3, 4, 5, 6, 7), per_size=4, seed=2024):
+    """Фиксированный набор позиций: случайные начала партий с заданным зерном.
+
+    Возвращает список GameState, в которых ходит компьютер (игрок 0).
+    """
+    rng = random.Random(seed)
+    positions = []
+    for size in sizes:
+        while sum(1 for state in positions if state.size == size) < per_size:
+            state = GameState(size, rng.choice((0, 1)))
+            for _ in range(rng.randint(1, size + 1)):
+                state.play(rng.choice(state.empty_cells()))
+            if state.winner is None and state.to_move == 0:
+                positions.append(state)
+    return positions
+
+
+def compare_algorithms(depth, reductions=False, verbose=True):
+    """Узлы и совпадение ходов: прежний мини-макс против негамакса с PVS"""
+    totals = {'minimax': 0, 'negamax': 0}
+    agree = 0
+    positions = position_suite()
+    for number, state in enumerate(positions, 1):
+        moves = {}
+        for algorithm in ('minimax', 'negamax'):
+            search = Search(state.size, node_budget=float('inf'), max_depth=depth,
+                            algorithm=algorithm,
+                            reductions=reductions and algorithm == 'negamax')
+            moves[algorithm] = (search.best_move(state), search.nodes)
+            totals[algorithm] += search.nodes
+        same = moves['minimax'][0] == moves['negamax'][0]
+        agree += same
+        if verbose:
+            print(f"{number:2d}. {state.size}x{state.size}, ходов {len(state.stack):2d}: "
+                  f"мини-макс {moves['minimax'][1]:8d} узлов, "
+                  f"негамакс {moves['negamax'][1]:8d} узлов, "
+                  f"{'ход тот же' if same else 'ход другой'}")
+    return totals, agree, len(positions)
+
+
+def compare_evaluators(depth, verbose=True):
+    """Оценка счетчиками линий против таблиц образцов: узлы, время, ходы.
+
+    Оценка 'patterns' и сумма, которую ведет GameState, обязаны совпадать
+    с полным пересчетом по счетчикам линий; расхождения считаются
+    отдельно. Возвращает {оценка: (узлы, секунды, совпадений хода
+    с 'lines')}, число позиций и число расхождений.
+    """
+    positions = position_suite()
+    totals = {}
+    reference = {}
+    mismatches = 0
+    for evaluator in ('lines', 'patterns', 'windows'):
+        nodes = seconds = same = 0
+        for number, state in enumerate(positions):
+            search = Search(state.size, node_budget=float('inf'), max_depth=depth,
+                            evaluator=evaluator)
+            started = time.perf_counter()
+            move = search.best_move(state)
+            seconds += time.perf_counter() - started
+            nodes += search.nodes
+            if evaluator == 'lines':
+                reference[number] = move
+            same += move == reference[number]
+            if evaluator == 'patterns':
+                # Полный пересчет по счетчикам против обеих инкрементальных оценок
+                stride = state.line_length + 1
+                rescan = sum(search.line_scores[a * stride + b] for a, b in zip(*state.counts))
+                mismatches += not rescan == search.evaluate_board() == search.evaluate()
+        totals[evaluator] = (nodes, seconds, same)
+        if verbose:
+            print(f"{evaluator:8s}: {nodes:8d} узлов, {seconds:6.2f}с, "
+                  f"{nodes / seconds if seconds else 0:8.0f} узлов/с, "
+                  f"ход как у lines {same}/{len(positions)}")
+    return totals, len(positions), mismatches
+
+
+def measure_sparse(sizes, stones, win_length=5, budget=5000, verbose=True):
+    """Плотное и разреженное состояние на одних позициях: память, ходы, поиск.
+
+    Для каждого размера ставится stones случайных фигур у центра без
+    готовой победы. Память —
+    прирост по tracemalloc при построении состояния (общие кеши ключей
+    и окон построены заранее и не считаются). Поиск — один ход с бюджетом
+    budget узлов. Возвращает строки (размер, класс, байт, кандидатов,
+    узлов/с) и число позиций, где хеш, оценка или итог не совпали.
+    """
+    rng = random.Random(2024)
+    rows = []
+    mismatches = 0
+    for size in sizes:
+        center = size // 2
+        probe = GameState(size, 0, win_length)
+        while probe.filled < stones:
+            row = center + rng.randint(-3, 3)
+            col = center + rng.randint(-3, 3)
+            if 0 <= row < size and 0 <= col < size and probe.cells[row * size + col] == EMPTY:
+                probe.play(row * size + col)
+                # Позиции без готовой победы
+                if probe.winner is not None:
+                    probe.undo()
+        cells = list(probe.stack)
+        results = {}
+        for cls in (GameState, SparseState):
+            warm = cls(size, 0, win_length)
+            for cell in cells:
+                warm.play(cell)
+            tracemalloc.start()
+            state = cls(size, 0, win_length)
+            for cell in cells:
+                state.play(cell)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            state.to_move = 0
+
+            search = Search(size, node_budget=budget)
+            started = time.perf_counter()
+            move = search.best_move(state)
+            seconds = time.perf_counter() - started
+            results[cls] = (state.hash, state.score, state.winner, move)
+            rate = search.nodes / seconds if seconds else 0
+            rows.append((size, cls.__name__, memory, len(state.candidate_cells()), rate))
+            if verbose:
+                print(f"{size:2d}x{size:<2d} {cls.__name__:11s}: {memory:8d} байт, "
+                      f"кандидатов {len(state.candidate_cells()):4d}, "
+                      f"{rate:8.0f} узлов/с, глубина {search.depth}")
+        dense, sparse = results[GameState], results[SparseState]
+        mismatches += dense[:3] != sparse[:3]
+    return rows, mismatches
+
+
+def measure_shared(workers, depth, slots, verbose=True):
+    """Процессы поиска со своими таблицами против общей таблицы в разделяемой памяти.
+
+    На каждой позиции набора workers процессов ищут на глубину depth
+    (помощники — в другом порядке ходов), сначала каждый со своей
+    таблицей-словарем, затем с общей таблицей (очищенной перед позицией).
+    Повторная работа — узлы, которые процессы считают сверх одного
+    процесса; общая таблица ее сокращает. Возвращает узлы обоих вариантов,
+    узлы одного процесса, память своих таблиц (сумма по процессам, пик
+    по позициям) и размер общей.
+    """
+    from parallel import ParallelSearch, search_worker
+
+    pool = ParallelSearch(workers, slots)
+    totals = {'private': 0, 'shared': 0, 'single': 0}
+    private_memory = 0
+    hits = probes = 0
+    try:
+        for state in position_suite():
+            stones = [(cell, state.cells[cell]) for cell in state.stack]
+            args = (stones, state.size, state.line_length, float('inf'), None, depth)
+            private = [pool.executor.submit(search_worker, *args, helper, False, True)
+                       for helper in range(workers)]
+            private = [future.result() for future in private]
+            pool.table.clear()
+            shared = [pool.executor.submit(search_worker, *args, helper)
+                      for helper in range(workers)]
+            shared = [future.result() for future in shared]
+            totals['private'] += sum(result['nodes'] for result in private)
+            totals['shared'] += sum(result['nodes'] for result in shared)
+            totals['single'] += private[0]['nodes']
+            private_memory = max(private_memory, sum(result['memory'] for result in private))
+            hits += sum(result['table']['hits'] for result in shared)
+            probes += sum(result['table']['probes'] for result in shared)
+        shared_memory = pool.table.nbytes()
+    finally:
+        pool.close()
+
+    if verbose:
+        extra_private = totals['private'] - totals['single']
+        extra_shared = totals['shared'] - totals['single']
+        print(f"{workers} процесса, глубина {depth}, позиций {len(position_suite())}")
+        print(f"один процесс:   {totals['single']:8d} узлов")
+        print(f"свои таблицы:   {totals['private']:8d} узлов, повторной работы {extra_private}, "
+              f"память таблиц до {private_memory / 2 ** 20:.1f} МБ")
+        print(f"общая таблица:  {totals['shared']:8d} узлов, повторной работы {extra_shared}, "
+              f"память {shared_memory / 2 ** 20:.1f} МБ, попаданий {hits / max(1, probes):.0%}")
+        if extra_private:
+            print(f"Повторная работа меньше на {1 - extra_shared / extra_private:.1%}")
+    return totals, private_memory, shared_memory
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Команда без интерфейса, по которой проверяется холодный старт
+HEADLESS_COMMAND = ('main.py', 'move', '--board', 'X...O....', '--difficulty', 'Medium')
+
+
+def imported_modules(command):
+    """Время запуска команды в новом интерпретаторе, время импортов и загруженные модули.
+
+    Модули берутся из отчета python -X importtime: он печатает в stderr
+    строку на каждый импорт (включая импорты внутри библиотек)
+    с собственным и накопленным временем в микросекундах.
+    """
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', *command],
+                            cwd=HERE, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    modules = set()
+    imports = 0
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and line.count('|') == 2:
+            own, _, name = line[len('import time:'):].split('|')
+            if own.strip().isdigit():
+                modules.add(name.strip())
+                imports += int(own)
+    return seconds, imports / 1e6, modules, result.returncode
+
+
+def measure_startup(runs=5, verbose=True):
+    """Холодный старт команды без интерфейса и загрузки модуля окна.
+
+    Окно само по себе не создается (его может быть негде показать),
+    поэтому для интерфейса замеряется загрузка main и gui — все, что
+    грузится до появления главного меню. Возвращает (медианы в секундах,
+    список ошибок); ошибка — если команда без интерфейса загрузила tkinter
+    или завершилась неудачно.
+    """
+    paths = {'headless': HEADLESS_COMMAND, 'gui': ('-c', 'import main, gui')}
+    medians = {}
+    errors = []
+    for name, command in paths.items():
+        times = []
+        import_times = []
+        for _ in range(runs):
+            seconds, imports, modules, code = imported_modules(command)
+            times.append(seconds)
+            import_times.append(imports)
+            if code != 0:
+                errors.append(f"{name}: код возврата {code}")
+            if name == 'headless' and 'tkinter' in modules:
+                errors.append("команда без интерфейса загрузила tkinter")
+        medians[name] = statistics.median(times)
+        if verbose:
+            print(f"{name:8s}: запуск {medians[name] * 1000:7.1f} мс "
+                  f"(мин {min(times) * 1000:.1f}, макс {max(times) * 1000:.1f}), "
+                  f"импорты {statistics.median(import_times) * 1000:6.1f} мс, "
+                  f"модулей {len(modules)}, tkinter {'да' if 'tkinter' in modules else 'нет'}")
+    return medians, sorted(set(errors))
+
+
+def measure_engine(requests=50, verbose=True):
+    """Время одного запроса хода: долгоживущий процесс протокола против запуска main.py.
+
+    Оба способа просят ход Среднего уровня для одних и тех же позиций.
+    Возвращает (секунд на запрос через протокол, секунд на запуск).
+    """
+    rng = random.Random(7)
+    boards = []
+    for _ in range(requests):
+        cells = ['.'] * 9
+        for number, cell in enumerate(rng.sample(range(9), rng.choice((0, 2, 4)))):
+            cells[cell] = 'XO'[number % 2]
+        boards.append(''.join(cells))
+
+    process = subprocess.Popen([sys.executable, 'main.py', 'engine'], cwd=HERE, text=True,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    process.stdin.write('isready\n')
+    process.stdin.flush()
+    process.stdout.readline()
+    started = time.perf_counter()
+    for board in boards:
+        process.stdin.write(f"position board {board}\ngo level Medium\n")
+        process.stdin.flush()
+        while not process.stdout.readline().startswith('bestmove'):
+            pass
+    engine = (time.perf_counter() - started) / requests
+    process.stdin.write('quit\n')
+    process.stdin.close()
+    process.wait()
+
+    started = time.perf_counter()
+    for board in boards:
+        subprocess.run([sys.executable, 'main.py', 'move', '--board', board,
+                        '--difficulty', 'Medium'], cwd=HERE, capture_output=True)
+    spawn = (time.perf_counter() - started) / requests
+
+    if verbose:
+        print(f"протокол: {engine * 1000:.2f} мс на запрос, "
+              f"запуск main.py: {spawn * 1000:.1f} мс на запрос ({spawn / engine:.0f}x)")
+    return engine, spawn
+
+
+def main(argv=None):
+    """Запуск замеров из командной строки"""
+    parser = argparse.ArgumentParser(description="Замеры движка")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reuse = commands.add_parser('reuse', help="экономия узлов от сессии поиска между ходами")
+    reuse.add_argument('--size', type=int, default=4)
+    reuse.add_argument('--depth', type=int, default=3)
+
+    compare = commands.add_parser('compare', help="мини-макс против негамакса с PVS")
+    compare.add_argument('--depth', type=int, default=3)
+    compare.add_argument('--reductions', action='store_true',
+                         help="включить сокращение поздних ходов")
+
+    evaluators = commands.add_parser('evaluators', help="счетчики линий против таблиц образцов")
+    evaluators.add_argument('--depth', type=int, default=3)
+
+    startup = commands.add_parser('startup', help="холодный старт без интерфейса и с ним")
+    startup.add_argument('--runs', type=int, default=5)
+
+    engine = commands.add_parser('engine', help="запрос к процессу протокола против запуска main.py")
+    engine.add_argument('--requests', type=int, default=50)
+
+    sparse = commands.add_parser('sparse', help="плотное поле против разреженного")
+    sparse.add_argument('--sizes', nargs='+', type=int, default=[10, 19, 25])
+    sparse.add_argument('--stones', type=int, default=20)
+    sparse.add_argument('--win-length', type=int, default=5)
+
+    shared = commands.add_parser('shared', help="свои таблицы процессов против общей")
+    shared.add_argument('--workers', type=int, default=2)
+    shared.add_argument('--depth', type=int, default=3)
+    shared.add_argument('--slots', type=int, default=1 << 18,
+                        help="записей в общей таблице (степень двойки)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'shared':
+        measure_shared(args.workers, args.depth, args.slots)
+        return 0
+    if args.command == 'sparse':
+        _, mismatches = measure_sparse(args.sizes, args.stones, args.win_length)
+        print(f"Расхождений хеша, оценки и итога: {mismatches}")
+        return 1 if mismatches else 0
+    if args.command == 'evaluators':
+        _, _, mismatches = compare_evaluators(args.depth)
+        print(f"Расхождений оценки patterns с lines: {mismatches}")
+        return 1 if mismatches else 0
+    if args.command == 'engine':
+        measure_engine(args.requests)
+        return 0
+    if args.command == 'startup':
+        _, errors = measure_startup(args.runs)
+        for error in errors:
+            print(f"Ошибка: {error}")
+        return 1 if errors else 0
+    if args.command == 'compare':
+        totals, agree, count = compare_algorithms(args.depth, args.reductions)
+        print(f"Итого: мини-макс {totals['minimax']}, негамакс {totals['negamax']} "
+              f"({totals['negamax'] / totals['minimax']:.1%}), "
+              f"совпадение ходов {agree}/{count}")
+    elif args.command == 'reuse':
+        results = measure_reuse(args.size, args.depth)
+        reused = sum(nodes for nodes, _ in results)
+        fresh = sum(nodes for _, nodes in results)
+        print(f"Итого: с сессией {reused}, заново {fresh}, "
+              f"экономия {1 - reused / fresh:.1%}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
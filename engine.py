@@ -0,0 +1,528 @@
+"""Правила игры без интерфейса: линии поля, проверка победы, хеширование"""
+
+import random
+from functools import lru_cache
+
+EMPTY = -1
+
+# Поля больше этого размера хранятся разреженно (SparseState)
+DENSE_MAX_SIZE = 10
+MAX_SIZE = 25
+# Кандидаты в ходы разреженного поля — пустые клетки не дальше этого от фигур
+CANDIDATE_RADIUS = 2
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def winning_lines(size, win_length=None):
+    """Все выигрышные линии поля.
+
+    Без win_length (или при win_length == size) — строки, столбцы и две
+    главные диагонали длиной size. Иначе — все окна из win_length клеток
+    подряд по строкам, столбцам и диагоналям обоих направлений.
+    Клетка задается индексом row * size + col.
+    """
+    if win_length is None or win_length == size:
+        lines = []
+        for i in range(size):
+            lines.append(tuple(i * size + j for j in range(size)))
+        for j in range(size):
+            lines.append(tuple(i * size + j for i in range(size)))
+        lines.append(tuple(i * size + i for i in range(size)))
+        lines.append(tuple(i * size + (size - 1 - i) for i in range(size)))
+        return tuple(lines)
+
+    lines = []
+    for d_row, d_col in DIRECTIONS:
+        for row in range(size):
+            for col in range(size):
+                end_row = row + d_row * (win_length - 1)
+                end_col = col + d_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    lines.append(tuple((row + d_row * k) * size + col + d_col * k
+                                       for k in range(win_length)))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def local_windows(size, side=2):
+    """Квадратные окна side x side (клетки по строкам) для оценки по образцам"""
+    windows = []
+    for row in range(size - side + 1):
+        for col in range(size - side + 1):
+            windows.append(tuple((row + i) * size + col + j
+                                 for i in range(side) for j in range(side)))
+    return tuple(windows)
+
+
+def line_masks(size, win_length=None):
+    """Выигрышные линии в виде битовых масок"""
+    masks = []
+    for line in winning_lines(size, win_length):
+        mask = 0
+        for cell in line:
+            mask |= 1 << cell
+        masks.append(mask)
+    return masks
+
+
+def has_line(mask, masks):
+    """Есть ли у игрока с битовой маской клеток mask полная линия"""
+    for line in masks:
+        if mask & line == line:
+            return True
+    return False
+
+
+def cells_to_masks(cells, first_symbol, second_symbol):
+    """Перевод плоского списка клеток в две битовые маски игроков"""
+    first = 0
+    second = 0
+    for cell, value in enumerate(cells):
+        if value == first_symbol:
+            first |= 1 << cell
+        elif value == second_symbol:
+            second |= 1 << cell
+    return first, second
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size, seed=20240601):
+    """Случайные 64-битные ключи Zobrist: пара (первый, второй игрок) на клетку"""
+    rng = random.Random(seed)
+    return tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(size * size))
+
+
+def zobrist_hash(first, second, keys):
+    """Хеш позиции по маскам первого и второго игрока"""
+    value = 0
+    for cell, (first_key, second_key) in enumerate(keys):
+        bit = 1 << cell
+        if first & bit:
+            value ^= first_key
+        elif second & bit:
+            value ^= second_key
+    return value
+
+
+class GameState:
+    """Состояние партии для поиска и интерфейса
+
+    Поле — плоский список индексов игроков (0, 1 или EMPTY). Вместе с ним
+    поддерживаются очередь хода, стек ходов, хеш Zobrist и число клеток
+    каждого игрока в каждой линии, поэтому play/undo работают за O(k)
+    (клетка входит не больше чем в 4·k окон длины k = win_length)
+    и ничего не выделяют.
+    Для каждой линии хранится и сумма индексов ее пустых клеток: когда
+    пустая клетка одна, сумма и есть ее индекс. Линии — окна длины
+    win_length (по умолчанию size), и при ходе проверяются только окна
+    через его клетку.
+    После track_scores состояние ведет сумму оценок всех линий, после
+    track_tuples состояние ведет еще и троичные коды n-кортежей
+    клеток (0 — пусто, 1 — игрок 0, 2 — игрок 1) для оценки по образцам.
+    """
+
+    __slots__ = ('size', 'lines', 'line_length', 'cell_lines', 'keys', 'cells',
+                 'to_move', 'stack', 'hash', 'counts', 'open_sums', 'filled',
+                 'winner', 'win_line', 'win_ply', 'tuples', 'cell_tuples', 'codes',
+                 'scores', 'score')
+
+    def __init__(self, size, first_player=0, win_length=None):
+        self.size = size
+        self.lines = winning_lines(size, win_length)
+        self.line_length = win_length or size
+        cell_lines = [[] for _ in range(size * size)]
+        for index, line in enumerate(self.lines):
+            for cell in line:
+                cell_lines[cell].append(index)
+        self.cell_lines = tuple(tuple(indexes) for indexes in cell_lines)
+        self.keys = zobrist_keys(size)
+        self.cells = [EMPTY] * (size * size)
+        self.counts = ([0] * len(self.lines), [0] * len(self.lines))
+        self.open_sums = [sum(line) for line in self.lines]
+        self.stack = []
+        self.to_move = first_player
+        self.hash = 0
+        self.filled = 0
+        self.winner = None
+        self.win_line = None
+        self.win_ply = None
+        self.tuples = None
+        self.cell_tuples = None
+        self.codes = None
+        self.scores = None
+        self.score = 0
+
+    @classmethod
+    def from_board(cls, board, size, symbols, to_move, win_length=None):
+        """Состояние по плоскому списку символов; symbols — символы игроков 0 и 1"""
+        state = cls(size, win_length=win_length)
+        for cell, value in enumerate(board):
+            if value == symbols[0]:
+                state.play(cell, 0)
+            elif value == symbols[1]:
+                state.play(cell, 1)
+        state.to_move = to_move
+        return state
+
+    def track_scores(self, scores):
+        """Вести сумму оценок линий по таблице scores[ai * (line_length + 1) + human].
+
+        Сумма считается сразу, дальше при каждом ходе меняется только вклад
+        линий через клетку хода, поэтому оценка позиции — O(1).
+        """
+        if self.scores is scores:
+            return
+        stride = self.line_length + 1
+        self.scores = scores
+        self.score = sum(scores[a * stride + b] for a, b in zip(*self.counts))
+
+    def track_tuples(self, tuples):
+        """Вести троичные коды кортежей клеток tuples при каждом ходе.
+
+        Код кортежа — сумма цифр клеток, умноженных на 3 ** (место клетки
+        в кортеже). Текущие коды считаются сразу, дальше они меняются
+        в play/undo за O(число кортежей с клеткой хода).
+        """
+        if self.tuples == tuples:
+            return
+        cell_tuples = [[] for _ in range(self.size * self.size)]
+        codes = []
+        for index, cells in enumerate(tuples):
+            code = 0
+            for position, cell in enumerate(cells):
+                cell_tuples[cell].append((index, 3 ** position))
+                if self.cells[cell] != EMPTY:
+                    code += (self.cells[cell] + 1) * 3 ** position
+            codes.append(code)
+        self.tuples = tuples
+        self.cell_tuples = tuple(tuple(pairs) for pairs in cell_tuples)
+        self.codes = codes
+
+    def reset(self, first_player=0):
+        """Пустое поле без выделения новой памяти"""
+        while self.stack:
+            self.undo()
+        self.to_move = first_player
+
+    def play(self, cell, player=None):
+        """Ход в клетку cell (по умолчанию — того, чья очередь)"""
+        if player is None:
+            player = self.to_move
+        self.cells[cell] = player
+        self.hash ^= self.keys[cell][player]
+        self.filled += 1
+        self.stack.append(cell)
+
+        counts = self.counts[player]
+        open_sums = self.open_sums
+        for line in self.cell_lines[cell]:
+            counts[line] += 1
+            open_sums[line] -= cell
+            if counts[line] == self.line_length and self.winner is None:
+                self.winner = player
+                self.win_line = line
+                self.win_ply = len(self.stack)
+        if self.scores is not None:
+            self.score += self.score_delta(cell, player)
+        if self.codes is not None:
+            codes = self.codes
+            digit = player + 1
+            for index, power in self.cell_tuples[cell]:
+                codes[index] += digit * power
+        self.to_move = 1 - player
+
+    def undo(self):
+        """Отмена последнего хода; возвращает освобожденную клетку"""
+        if self.win_ply == len(self.stack):
+            self.winner = None
+            self.win_line = None
+            self.win_ply = None
+        cell = self.stack.pop()
+        player = self.cells[cell]
+        self.cells[cell] = EMPTY
+        self.hash ^= self.keys[cell][player]
+        self.filled -= 1
+        if self.scores is not None:
+            self.score -= self.score_delta(cell, player)
+
+        counts = self.counts[player]
+        open_sums = self.open_sums
+        for line in self.cell_lines[cell]:
+            counts[line] -= 1
+            open_sums[line] += cell
+        if self.codes is not None:
+            codes = self.codes
+            digit = player + 1
+            for index, power in self.cell_tuples[cell]:
+                codes[index] -= digit * power
+        self.to_move = player
+        return cell
+
+    def score_delta(self, cell, player):
+        """Изменение суммы оценок линий от фигуры игрока в клетке (уже учтенной в counts)"""
+        scores = self.scores
+        step = self.line_length + 1 if player == 0 else 1
+        stride = self.line_length + 1
+        ai_counts, human_counts = self.counts
+        delta = 0
+        for line in self.cell_lines[cell]:
+            index = ai_counts[line] * stride + human_counts[line]
+            delta += scores[index] - scores[index - step]
+        return delta
+
+    def winning_move(self, player):
+        """Клетка, сразу дающая игроку линию, или None: O(число линий)"""
+        mine = self.counts[player]
+        theirs = self.counts[1 - player]
+        need = self.line_length - 1
+        for line in range(len(mine)):
+            if mine[line] == need and theirs[line] == 0:
+                return self.open_sums[line]
+        return None
+
+    def is_full(self):
+        """Все клетки заняты"""
+        return self.filled == len(self.cells)
+
+    def empty_cells(self):
+        """Индексы пустых клеток"""
+        return [cell for cell, value in enumerate(self.cells) if value == EMPTY]
+
+    def candidate_cells(self):
+        """Ходы для поиска: на плотном поле — все пустые клетки"""
+        return self.empty_cells()
+
+    def winning_cells(self):
+        """Клетки победной линии или пустой список"""
+        if self.win_line is None:
+            return []
+        return list(self.lines[self.win_line])
+
+    def to_board(self, symbols):
+        """Плоский список символов ('' — пусто)"""
+        return ['' if value == EMPTY else symbols[value] for value in self.cells]
+
+
+@lru_cache(maxsize=None)
+def cell_windows(size, win_length, cell):
+    """Окна из win_length клеток через клетку cell: ключи направление * size² + начало"""
+    row, col = divmod(cell, size)
+    windows = []
+    for direction, (d_row, d_col) in enumerate(DIRECTIONS):
+        for shift in range(win_length):
+            start_row, start_col = row - d_row * shift, col - d_col * shift
+            end_row = start_row + d_row * (win_length - 1)
+            end_col = start_col + d_col * (win_length - 1)
+            if (0 <= start_row < size and 0 <= start_col < size
+                    and 0 <= end_row < size and 0 <= end_col < size):
+                windows.append(direction * size * size + start_row * size + start_col)
+    return tuple(windows)
+
+
+def window_cells(size, win_length, window):
+    """Клетки окна по его ключу"""
+    direction, start = divmod(window, size * size)
+    d_row, d_col = DIRECTIONS[direction]
+    step = d_row * size + d_col
+    return [start + step * k for k in range(win_length)]
+
+
+@lru_cache(maxsize=None)
+def neighbours(size, cell, radius=CANDIDATE_RADIUS):
+    """Клетки квадрата со стороной 2 * radius + 1 вокруг cell (без нее самой)"""
+    row, col = divmod(cell, size)
+    return tuple(
+        r * size + c
+        for r in range(max(0, row - radius), min(size, row + radius + 1))
+        for c in range(max(0, col - radius), min(size, col + radius + 1))
+        if (r, c) != (row, col)
+    )
+
+
+class StoneMap(dict):
+    """Занятые клетки {клетка: игрок}; для пустой клетки cells[cell] дает EMPTY"""
+
+    def __missing__(self, cell):
+        return EMPTY
+
+
+class SparseState:
+    """Разреженное состояние партии для больших полей (до MAX_SIZE x MAX_SIZE)
+
+    Тот же интерфейс, что у GameState, но хранятся только занятые клетки
+    (cells — StoneMap) и только окна, в которых есть фигуры: счетчики —
+    словари {ключ окна: число фигур}. Окна через клетку считаются по ее
+    координатам, поэтому память и стоимость хода растут с числом фигур,
+    а не с площадью поля. Ходы для поиска — candidate_cells: пустые
+    клетки рядом с фигурами, их число тоже ведется при play/undo.
+    Оценка по образцам (track_tuples) не поддерживается: она
+    перебирает все кортежи поля. Таблица scores должна давать 0 для
+    пустого окна — пустые окна в сумме не участвуют.
+    """
+
+    __slots__ = ('size', 'line_length', 'area', 'keys', 'cells', 'to_move', 'stack',
+                 'hash', 'counts', 'near', 'filled', 'winner', 'win_line', 'win_ply',
+                 'scores', 'score')
+
+    def __init__(self, size, first_player=0, win_length=None):
+        self.size = size
+        self.line_length = win_length or size
+        self.area = size * size
+        self.keys = zobrist_keys(size)
+        self.cells = StoneMap()
+        self.counts = ({}, {})
+        self.near = {}
+        self.stack = []
+        self.to_move = first_player
+        self.hash = 0
+        self.filled = 0
+        self.winner = None
+        self.win_line = None
+        self.win_ply = None
+        self.scores = None
+        self.score = 0
+
+    @classmethod
+    def from_board(cls, board, size, symbols, to_move, win_length=None):
+        """Состояние по плоскому списку символов; symbols — символы игроков 0 и 1"""
+        state = cls(size, win_length=win_length)
+        for cell, value in enumerate(board):
+            if value == symbols[0]:
+                state.play(cell, 0)
+            elif value == symbols[1]:
+                state.play(cell, 1)
+        state.to_move = to_move
+        return state
+
+    def reset(self, first_player=0):
+        """Пустое поле"""
+        while self.stack:
+            self.undo()
+        self.to_move = first_player
+
+    def track_scores(self, scores):
+        """Вести сумму оценок окон с фигурами (см. GameState.track_scores)"""
+        if self.scores is scores:
+            return
+        stride = self.line_length + 1
+        ai_counts, human_counts = self.counts
+        self.scores = scores
+        self.score = sum(scores[ai_counts.get(window, 0) * stride + human_counts.get(window, 0)]
+                         for window in set(ai_counts) | set(human_counts))
+
+    def play(self, cell, player=None):
+        """Ход в клетку cell (по умолчанию — того, чья очередь)"""
+        if player is None:
+            player = self.to_move
+        self.cells[cell] = player
+        self.hash ^= self.keys[cell][player]
+        self.filled += 1
+        self.stack.append(cell)
+
+        counts = self.counts[player]
+        for window in cell_windows(self.size, self.line_length, cell):
+            count = counts.get(window, 0) + 1
+            counts[window] = count
+            if count == self.line_length and self.winner is None:
+                self.winner = player
+                self.win_line = window
+                self.win_ply = len(self.stack)
+        near = self.near
+        for other in neighbours(self.size, cell):
+            near[other] = near.get(other, 0) + 1
+        if self.scores is not None:
+            self.score += self.score_delta(cell, player)
+        self.to_move = 1 - player
+
+    def undo(self):
+        """Отмена последнего хода; возвращает освобожденную клетку"""
+        if self.win_ply == len(self.stack):
+            self.winner = None
+            self.win_line = None
+            self.win_ply = None
+        cell = self.stack.pop()
+        player = self.cells.pop(cell)
+        self.hash ^= self.keys[cell][player]
+        self.filled -= 1
+        if self.scores is not None:
+            self.score -= self.score_delta(cell, player)
+
+        counts = self.counts[player]
+        for window in cell_windows(self.size, self.line_length, cell):
+            count = counts[window] - 1
+            if count:
+                counts[window] = count
+            else:
+                del counts[window]
+        near = self.near
+        for other in neighbours(self.size, cell):
+            count = near[other] - 1
+            if count:
+                near[other] = count
+            else:
+                del near[other]
+        self.to_move = player
+        return cell
+
+    def score_delta(self, cell, player):
+        """Изменение суммы оценок окон от фигуры игрока в клетке (уже учтенной в counts)"""
+        scores = self.scores
+        step = self.line_length + 1 if player == 0 else 1
+        stride = self.line_length + 1
+        ai_counts, human_counts = self.counts
+        delta = 0
+        for window in cell_windows(self.size, self.line_length, cell):
+            index = ai_counts.get(window, 0) * stride + human_counts.get(window, 0)
+            delta += scores[index] - scores[index - step]
+        return delta
+
+    def winning_move(self, player):
+        """Клетка, сразу дающая игроку линию, или None: O(число окон с фигурами игрока)"""
+        theirs = self.counts[1 - player]
+        need = self.line_length - 1
+        for window, count in self.counts[player].items():
+            if count == need and window not in theirs:
+                for cell in window_cells(self.size, self.line_length, window):
+                    if cell not in self.cells:
+                        return cell
+        return None
+
+    def is_full(self):
+        """Все клетки заняты"""
+        return self.filled == self.area
+
+    def empty_cells(self):
+        """Индексы всех пустых клеток: O(площади поля)"""
+        return [cell for cell in range(self.area) if cell not in self.cells]
+
+    def candidate_cells(self):
+        """Пустые клетки рядом с фигурами (на пустом поле — центр)"""
+        if not self.cells:
+            return [(self.size // 2) * self.size + self.size // 2]
+        cells = self.cells
+        return sorted(cell for cell in self.near if cell not in cells)
+
+    def winning_cells(self):
+        """Клетки победной линии или пустой список"""
+        if self.win_line is None:
+            return []
+        return window_cells(self.size, self.line_length, self.win_line)
+
+    def to_board(self, symbols):
+        """Плоский список символов ('' — пусто)"""
+        board = [''] * self.area
+        for cell, player in self.cells.items():
+            board[cell] = symbols[player]
+        return board
+
+
+def state_class(size):
+    """Класс состояния для поля size x size: плотный до DENSE_MAX_SIZE, дальше разреженный"""
+    return GameState if size <= DENSE_MAX_SIZE else SparseState
+
+
+def new_state(size, first_player=0, win_length=None):
+    """Пустое состояние партии подходящего для размера поля вида"""
+    return state_class(size)(size, first_player, win_length)
@@ -0,0 +1,2114 @@
+import tkinter as tk
+from tkinter import messagebox, ttk, colorchooser
+import random
+import json
+import math
+import os
+import time
+
+import ai
+from engine import EMPTY, MAX_SIZE, new_state
+from isolation import IsolatedAI, IsolatedMove
+from timers import Timers
+
+GAME_SETTINGS = {
+    'size': 3,
+    'mode': 'PvP',
+    'difficulty': 'Medium',
+    'player1_symbol': 'X',
+    'player2_symbol': 'O',
+    'player1_color': '#e74c3c',
+    'player2_color': '#3498db',
+    'theme': 'dark',
+    'ai_starts': False,
+    'timer_enabled': True,
+    'timer_seconds': 30,
+    'ai_node_budget': ai.DEFAULT_NODE_BUDGET,
+    'ai_seed': None,
+    # Длина выигрышной линии; 0 — во всю сторону поля
+    'win_length': 0,
+    # Сложный ИИ в отдельном процессе: срок хода в секундах и память в МБ
+    'ai_isolated': False,
+    'ai_deadline': 5,
+    'ai_memory_mb': 512,
+    # Пауза перед ходом компьютера в мс; 0 — ходит сразу
+    'ai_delay_ms': 500
+}
+
+GAME_RECORDS_FILE = "game_records.jsonl"
+
+# Трассировка задержек от клика до отрисовки (latency.py); включает main
+latency_tracer = None
+
+# Поля больше этого размера рисуются на холсте, а не сеткой кнопок
+BUTTON_BOARD_MAX = 10
+# Сторона поля на холсте в пикселях (клетка не меньше CANVAS_MIN_CELL)
+CANVAS_BOARD_SIDE = 560
+CANVAS_MIN_CELL = 18
+# Как часто окно забирает оценки подсказки из фонового потока
+HINT_POLL_MS = 50
+# Как часто окно проверяет, нашел ли Сложный ИИ ход, и как часто
+# показывает ход его поиска в строке статуса
+THINKING_POLL_MS = 20
+PROGRESS_MS = 250
+# Самый короткий срок хода исполнителя Сложного ИИ, секунд
+MIN_ISOLATED_DEADLINE = 0.1
+
+THEMES = {
+    'dark': {
+        'bg': '#2c3e50',
+        'fg': '#ecf0f1',
+        'accent': '#3498db',
+        'secondary': '#34495e',
+        'button_bg': '#3498db',
+        'button_fg': 'white',
+        'button_active': '#2980b9',
+        'cell_bg': '#34495e',
+        'cell_hover': '#3d566e',
+        'text_primary': '#ecf0f1',
+        'text_secondary': '#bdc3c7',
+        'success': '#2ecc71',
+        'danger': '#e74c3c',
+        'warning': '#f39c12',
+        'info': '#3498db'
+    },
+    'light': {
+        'bg': '#f8f9fa',
+        'fg': '#212529',
+        'accent': '#007bff',
+        'secondary': '#e9ecef',
+        'button_bg': '#007bff',
+        'button_fg': 'white',
+        'button_active': '#0056b3',
+        'cell_bg': '#ffffff',
+        'cell_hover': '#e9ecef',
+        'text_primary': '#212529',
+        'text_secondary': '#6c757d',
+        'success': '#28a745',
+        'danger': '#dc3545',
+        'warning': '#ffc107',
+        'info': '#17a2b8'
+    }
+}
+
+
+def blend(first, second, share):
+    """Цвет между first и second: share = 0 — first, 1 — second"""
+    a = [int(first[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(second[i:i + 2], 16) for i in (1, 3, 5)]
+    return '#' + ''.join(f"{round(x + (y - x) * share):02x}" for x, y in zip(a, b))
+
+
+def heat_colors(scores, colors):
+    """Цвета клеток тепловой карты: от плохих ходов (danger) к лучшим (success).
+
+    Цвет зависит от места оценки среди разных оценок, а не от ее величины:
+    оценка победы (Search.win_score) больше любой оценки линий, и по
+    величине все ходы без вынужденного исхода слились бы в один цвет.
+    """
+    values = sorted(set(scores.values()))
+    rank = {value: index / max(1, len(values) - 1) for index, value in enumerate(values)}
+    result = {}
+    for cell, score in scores.items():
+        share = rank[score] if len(values) > 1 else 1.0
+        if share < 0.5:
+            result[cell] = blend(colors['danger'], colors['cell_bg'], share * 2)
+        else:
+            result[cell] = blend(colors['cell_bg'], colors['success'], share * 2 - 1)
+    return result
+
+
+class MainMenu:
+    """Главное меню игры"""
+
+    def __init__(self):
+        self.root = tk.Tk()
+        # Экран, который откроется после закрытия этого (см. run)
+        self.next_screen = None
+        self.root.title("Крестики-Нолики")
+        self.root.geometry("600x500")
+        self.load_settings()
+        self.apply_theme()
+        self.root.resizable(True, True)
+        self.root.minsize(500, 400)
+
+        self.center_window(600, 500)
+        self.setup_menu()
+
+    def apply_theme(self):
+        """Применение текущей темы"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+        self.root.configure(bg=theme['bg'])
+
+    def load_settings(self):
+        """Загрузка настроек из файла"""
+        try:
+            if os.path.exists("settings.json"):
+                with open("settings.json", "r", encoding='utf-8') as f:
+                    saved = json.load(f)
+                    GAME_SETTINGS.update(saved)
+        except Exception:
+            pass
+
+    def center_window(self, width, height):
+        """Центрирование окна на экране"""
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        x = (screen_width - width) // 2
+        y = (screen_height - height) // 2
+        self.root.geometry(f'{width}x{height}+{x}+{y}')
+
+    def setup_menu(self):
+        """Настройка интерфейса главного меню"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+
+        main_container = tk.Frame(self.root, bg=theme['bg'])
+        main_container.pack(fill='both', expand=True)
+
+        tk.Label(
+            main_container,
+            text="КРЕСТИКИ-НОЛИКИ",
+            font=('Arial', 32, 'bold'),
+            bg=theme['bg'],
+            fg=theme['text_primary']
+        ).pack(pady=(80, 30))
+
+        button_frame = tk.Frame(main_container, bg=theme['bg'])
+        button_frame.pack()
+
+        buttons = [
+            ("Начать игру", self.start_game),
+            ("Настройки", self.open_settings),
+            ("Правила игры", self.show_rules),
+            ("Выход", self.exit_game)
+        ]
+
+        for text, command in buttons:
+            btn = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=('Arial', 14, 'bold'),
+                bg=theme['button_bg'],
+                fg='white',
+                activebackground=theme['button_active'],
+                activeforeground='white',
+                width=20,
+                height=2,
+                bd=0,
+                cursor='hand2'
+            )
+            btn.pack(pady=8)
+
+    def toggle_theme(self):
+        """Переключение темы"""
+        GAME_SETTINGS['theme'] = 'light' if GAME_SETTINGS['theme'] == 'dark' else 'dark'
+        try:
+            with open("settings.json", "w", encoding='utf-8') as f:
+                json.dump(GAME_SETTINGS, f, indent=4)
+        except Exception:
+            pass
+
+        self.next_screen = MainMenu
+        self.root.destroy()
+
+    def start_game(self):
+        """Запуск игры"""
+        if latency_tracer is not None:
+            latency_tracer.begin('start')
+        self.next_screen = GameWindow
+        self.root.destroy()
+
+    def open_settings(self):
+        """Открытие окна настроек"""
+        return SettingsWindow(self.root, self)
+
+    def show_rules(self):
+        """Показать правила игры"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+
+        rules_window = tk.Toplevel(self.root)
+        rules_window.title("Правила игры")
+        rules_window.geometry("500x400")
+        rules_window.configure(bg=theme['bg'])
+        rules_window.resizable(False, False)
+
+        x = self.root.winfo_x() + (self.root.winfo_width() - 500) // 2
+        y = self.root.winfo_y() + (self.root.winfo_height() - 400) // 2
+        rules_window.geometry(f'500x400+{x}+{y}')
+
+        text = tk.Text(
+            rules_window,
+            font=('Arial', 12),
+            bg=theme['bg'],
+            fg=theme['text_primary'],
+            wrap='word',
+            padx=20,
+            pady=20
+        )
+        text.pack(fill='both', expand=True)
+
+        rules_text = """
+        ПРАВИЛА ИГРЫ "КРЕСТИКИ-НОЛИКИ"
+
+        1. ЦЕЛЬ ИГРЫ:
+           Первым выстроить в ряд (горизонтально, вертикально
+           или по диагонали) свои символы.
+
+        2. ХОД ИГРЫ:
+           - Игроки ходят по очереди
+           - На каждом ходе ставится один символ
+           - Символ ставится в пустую клетку
+           
+        4. ПОБЕДА:
+            - Побеждает игрок, первым собравший линию
+            - Длина линии задается в настройках (по умолчанию равна размеру поля)
+
+        5. НИЧЬЯ:
+           - Если все клетки заполнены, и никто из игроков не собрал линию, то нет победителя
+           
+        6. РЕЖИМЫ ИГРЫ:
+           - Игрок против Игрока
+           - Игрок против Компьютера (3 уровня сложности)
+
+        7. НАСТРОЙКИ:
+           - Размер поля от 3x3 до 25x25
+           - Выбор символов и цветов игроков
+           - Темная/светлая тема
+           - Таймер на ход
+
+        8. ТАЙМЕР:
+           - При включенном таймере у игрока ограниченное время на ход
+           - Если время вышло, засчитывается победа противника
+        """
+
+        text.insert('1.0', rules_text)
+        text.config(state='disabled')
+
+        tk.Button(
+            rules_window,
+            text="Закрыть",
+            command=rules_window.destroy,
+            bg=theme['danger'],
+            fg='white',
+            font=('Arial', 12, 'bold'),
+            padx=20,
+            pady=10
+        ).pack(pady=10)
+
+    def exit_game(self):
+        """Выход из игры"""
+        self.root.destroy()
+
+
+class SettingsWindow:
+    """Окно настроек игры"""
+
+    def __init__(self, parent, menu=None):
+        self.parent = parent
+        self.menu = menu
+        self.window = tk.Toplevel(parent)
+        self.window.title("Настройки игры")
+        self.apply_theme()
+        self.window.resizable(True, True)
+        self.window.minsize(650, 650)
+
+        self.window.geometry("650x650")
+
+        self.center_window()
+
+        self.window.transient(parent)
+        self.window.grab_set()
+
+        self.load_settings()
+        self.setup_ui()
+
+        self.window.bind('<Configure>', self.on_window_configure)
+
+    def apply_theme(self):
+        """Применение текущей темы"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+        self.window.configure(bg=theme['bg'])
+
+    def load_settings(self):
+        """Загрузка текущих настроек"""
+        self.settings = GAME_SETTINGS.copy()
+
+    def save_current_settings(self):
+        """Сохранение текущих настроек в глобальный словарь"""
+        for key, value in self.settings.items():
+            GAME_SETTINGS[key] = value
+
+    def center_window(self):
+        """Центрирование окна относительно родительского"""
+        parent_x = self.parent.winfo_x()
+        parent_y = self.parent.winfo_y()
+        parent_width = self.parent.winfo_width()
+        parent_height = self.parent.winfo_height()
+
+        width, height = 650, 650
+        x = parent_x + (parent_width - width) // 2
+        y = parent_y + (parent_height - height) // 2
+
+        self.window.geometry(f'{width}x{height}+{x}+{y}')
+
+    def setup_ui(self):
+        """Настройка интерфейса окна настроек"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+
+        self.canvas = tk.Canvas(self.window, bg=theme['bg'], highlightthickness=0)
+
+        self.scrollable_frame = tk.Frame(self.canvas, bg=theme['bg'])
+
+        self.scrollable_frame.bind(
+            "<Configure>",
+            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        )
+
+        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+
+        self.canvas.pack(side="left", fill="both", expand=True, padx=20, pady=20)
+
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+
+        title_label = tk.Label(
+            self.scrollable_frame,
+            text="НАСТРОКИ ИГРЫ",
+            font=('Arial', 22, 'bold'),
+            bg=theme['bg'],
+            fg=theme['text_primary']
+        )
+        title_label.pack(pady=(0, 20))
+
+        settings_frame = tk.Frame(self.scrollable_frame, bg=theme['bg'])
+        settings_frame.pack(fill='both', expand=True)
+
+        self.size_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Размер поля ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+        self.size_frame.pack(fill='x', pady=(0, 15))
+
+        self.size_var = tk.StringVar(value=str(self.settings['size']))
+
+        size_inner_frame = tk.Frame(self.size_frame, bg=theme['secondary'])
+        size_inner_frame.pack()
+
+        tk.Label(
+            size_inner_frame,
+            text=f"Размер (3-{MAX_SIZE}):",
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary']
+        ).pack(side='left', padx=(0, 10))
+
+        size_spinbox = tk.Spinbox(
+            size_inner_frame,
+            from_=3,
+            to=MAX_SIZE,
+            textvariable=self.size_var,
+            font=('Arial', 11),
+            width=8,
+            bg='white',
+            fg='#2c3e50'
+        )
+        size_spinbox.pack(side='left')
+
+        self.win_length_var = tk.StringVar(value=str(self.settings.get('win_length', 0)))
+
+        tk.Label(
+            size_inner_frame,
+            text="Линия (0 или 3-размер):",
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary']
+        ).pack(side='left', padx=(20, 10))
+
+        tk.Spinbox(
+            size_inner_frame,
+            from_=0,
+            to=MAX_SIZE,
+            textvariable=self.win_length_var,
+            font=('Arial', 11),
+            width=8,
+            bg='white',
+            fg='#2c3e50'
+        ).pack(side='left')
+
+        self.mode_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Режим игры ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+        self.mode_frame.pack(fill='x', pady=(0, 15))
+
+        self.mode_var = tk.StringVar(value=self.settings['mode'])
+
+        mode_inner_frame = tk.Frame(self.mode_frame, bg=theme['secondary'])
+        mode_inner_frame.pack()
+
+        modes = [("Игрок vs Игрок", "PvP"), ("Игрок vs Компьютер", "PvC")]
+        for text, value in modes:
+            tk.Radiobutton(
+                mode_inner_frame,
+                text=text,
+                variable=self.mode_var,
+                value=value,
+                font=('Arial', 11),
+                bg=theme['secondary'],
+                fg=theme['text_primary'],
+                selectcolor=theme['info'],
+                padx=10
+            ).pack(side='left', padx=10)
+
+        self.ai_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Сложность ИИ ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+
+        self.difficulty_var = tk.StringVar(value=self.settings['difficulty'])
+
+        ai_inner_frame = tk.Frame(self.ai_frame, bg=theme['secondary'])
+        ai_inner_frame.pack()
+
+        difficulties = [("Легкий", "Easy"), ("Средний", "Medium"), ("Сложный", "Hard")]
+        for text, value in difficulties:
+            tk.Radiobutton(
+                ai_inner_frame,
+                text=text,
+                variable=self.difficulty_var,
+                value=value,
+                font=('Arial', 11),
+                bg=theme['secondary'],
+                fg=theme['text_primary'],
+                selectcolor=theme['info'],
+                padx=10
+            ).pack(side='left', padx=10)
+
+        budget_frame = tk.Frame(self.ai_frame, bg=theme['secondary'])
+        budget_frame.pack(pady=(10, 0))
+
+        tk.Label(
+            budget_frame,
+            text="Бюджет узлов (Сложный):",
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary']
+        ).pack(side='left', padx=(0, 10))
+
+        self.node_budget_var = tk.StringVar(
+            value=str(self.settings.get('ai_node_budget', ai.DEFAULT_NODE_BUDGET))
+        )
+        tk.Spinbox(
+            budget_frame,
+            from_=1000,
+            to=1000000,
+            increment=1000,
+            textvariable=self.node_budget_var,
+            font=('Arial', 11),
+            width=10,
+            bg='white',
+            fg='#2c3e50'
+        ).pack(side='left')
+
+        isolated_frame = tk.Frame(self.ai_frame, bg=theme['secondary'])
+        isolated_frame.pack(pady=(10, 0))
+
+        self.isolated_var = tk.BooleanVar(value=self.settings.get('ai_isolated', False))
+        tk.Checkbutton(
+            isolated_frame,
+            text="Отдельный процесс, срок хода (с):",
+            variable=self.isolated_var,
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            selectcolor=theme['info'],
+            activebackground=theme['secondary'],
+            activeforeground=theme['text_primary']
+        ).pack(side='left', padx=(0, 10))
+
+        self.deadline_var = tk.StringVar(value=str(self.settings.get('ai_deadline', 5)))
+        tk.Spinbox(
+            isolated_frame,
+            from_=1,
+            to=60,
+            textvariable=self.deadline_var,
+            font=('Arial', 11),
+            width=5,
+            bg='white',
+            fg='#2c3e50'
+        ).pack(side='left')
+
+        delay_frame = tk.Frame(self.ai_frame, bg=theme['secondary'])
+        delay_frame.pack(pady=(10, 0))
+
+        tk.Label(
+            delay_frame,
+            text="Пауза перед ходом ИИ (мс):",
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary']
+        ).pack(side='left', padx=(0, 10))
+
+        self.delay_var = tk.StringVar(value=str(self.settings.get('ai_delay_ms', 500)))
+        tk.Spinbox(
+            delay_frame,
+            from_=0,
+            to=5000,
+            increment=100,
+            textvariable=self.delay_var,
+            font=('Arial', 11),
+            width=6,
+            bg='white',
+            fg='#2c3e50'
+        ).pack(side='left')
+
+        self.ai_starts_frame = tk.Frame(settings_frame, bg=theme['bg'])
+        self.ai_starts_frame.pack(fill='x', pady=(0, 15))
+
+        self.ai_starts_var = tk.BooleanVar(value=self.settings.get('ai_starts', False))
+
+        self.ai_starts_check = tk.Checkbutton(
+            self.ai_starts_frame,
+            text="ИИ ходит первым (в режиме PvC)",
+            variable=self.ai_starts_var,
+            font=('Arial', 11),
+            bg=theme['bg'],
+            fg=theme['text_primary'],
+            selectcolor=theme['info'],
+            activebackground=theme['bg'],
+            activeforeground=theme['text_primary']
+        )
+        self.ai_starts_check.pack(anchor='w')
+
+        timer_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Таймер ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+        timer_frame.pack(fill='x', pady=(0, 15))
+
+        self.timer_enabled_var = tk.BooleanVar(
+            value=self.settings.get('timer_enabled', True)
+        )
+        self.timer_seconds_var = tk.StringVar(
+            value=str(self.settings.get('timer_seconds', 30))
+        )
+
+        timer_check = tk.Checkbutton(
+            timer_frame,
+            text="Включить таймер на ход",
+            variable=self.timer_enabled_var,
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            selectcolor=theme['info'],
+            activebackground=theme['secondary'],
+            activeforeground=theme['text_primary'],
+            command=self.toggle_timer_settings
+        )
+        timer_check.pack(anchor='w', pady=(0, 10))
+
+        self.timer_settings_frame = tk.Frame(timer_frame, bg=theme['secondary'])
+        self.timer_settings_frame.pack(fill='x', pady=5)
+
+        tk.Label(
+            self.timer_settings_frame,
+            text="Секунд на ход:",
+            font=('Arial', 11),
+            bg=theme['secondary'],
+            fg=theme['text_primary']
+        ).pack(side='left', padx=(0, 10))
+
+        self.timer_spinbox = tk.Spinbox(
+            self.timer_settings_frame,
+            from_=5,
+            to=300,
+            textvariable=self.timer_seconds_var,
+            font=('Arial', 11),
+            width=8,
+            bg='white',
+            fg='#2c3e50',
+            state='normal' if self.timer_enabled_var.get() else 'disabled'
+        )
+        self.timer_spinbox.pack(side='left')
+
+        self.players_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Настройки игроков ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+        self.players_frame.pack(fill='x', pady=(0, 15))
+
+        players_grid = tk.Frame(self.players_frame, bg=theme['secondary'])
+        players_grid.pack()
+
+        headers = ["", "Символ", "Цвет"]
+        for col, header in enumerate(headers):
+            tk.Label(
+                players_grid,
+                text=header,
+                font=('Arial', 11, 'bold'),
+                bg=theme['secondary'],
+                fg=theme['text_primary'],
+                padx=10
+            ).grid(row=0, column=col, pady=5)
+
+        tk.Label(
+            players_grid,
+            text="Игрок 1:",
+            font=('Arial', 11, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=10
+        ).grid(row=1, column=0, sticky='w', pady=5)
+
+        self.player1_symbol_var = tk.StringVar(value=self.settings['player1_symbol'])
+
+        def validate_symbol1(new_text):
+            if len(new_text) <= 3:
+                return True
+            return False
+
+        vcmd1 = (self.window.register(validate_symbol1), '%P')
+        player1_symbol_entry = tk.Entry(
+            players_grid,
+            textvariable=self.player1_symbol_var,
+            font=('Arial', 11),
+            width=5,
+            bg='white',
+            fg=self.settings['player1_color'],
+            justify='center',
+            validate='key',
+            validatecommand=vcmd1
+        )
+        player1_symbol_entry.grid(row=1, column=1, padx=10, pady=5, sticky='w')
+
+        self.player1_color_var = tk.StringVar(value=self.settings['player1_color'])
+
+        color_frame1 = tk.Frame(players_grid, bg=theme['secondary'])
+        color_frame1.grid(row=1, column=2, padx=10, pady=5, sticky='w')
+
+        self.color_preview1 = tk.Label(
+            color_frame1,
+            text="   ",
+            font=('Arial', 1),
+            bg=self.settings['player1_color'],
+            width=3,
+            height=1,
+            relief='sunken',
+            bd=1
+        )
+        self.color_preview1.pack(side='left', padx=(0, 5))
+
+        color_btn1 = tk.Button(
+            color_frame1,
+            text="Выбрать",
+            command=lambda: self.choose_color('player1'),
+            font=('Arial', 10),
+            bg=theme['accent'],
+            fg='white',
+            padx=10,
+            pady=2
+        )
+        color_btn1.pack(side='left')
+
+        tk.Label(
+            players_grid,
+            text="Игрок 2:",
+            font=('Arial', 11, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=10
+        ).grid(row=2, column=0, sticky='w', pady=5)
+
+        self.player2_symbol_var = tk.StringVar(value=self.settings['player2_symbol'])
+
+        def validate_symbol2(new_text):
+            if len(new_text) <= 3:
+                return True
+            return False
+
+        vcmd2 = (self.window.register(validate_symbol2), '%P')
+        player2_symbol_entry = tk.Entry(
+            players_grid,
+            textvariable=self.player2_symbol_var,
+            font=('Arial', 11),
+            width=5,
+            bg='white',
+            fg=self.settings['player2_color'],
+            justify='center',
+            validate='key',
+            validatecommand=vcmd2
+        )
+        player2_symbol_entry.grid(row=2, column=1, padx=10, pady=5, sticky='w')
+
+        self.player2_color_var = tk.StringVar(value=self.settings['player2_color'])
+
+        color_frame2 = tk.Frame(players_grid, bg=theme['secondary'])
+        color_frame2.grid(row=2, column=2, padx=10, pady=5, sticky='w')
+
+        self.color_preview2 = tk.Label(
+            color_frame2,
+            text="   ",
+            font=('Arial', 1),
+            bg=self.settings['player2_color'],
+            width=3,
+            height=1,
+            relief='sunken',
+            bd=1
+        )
+        self.color_preview2.pack(side='left', padx=(0, 5))
+
+        color_btn2 = tk.Button(
+            color_frame2,
+            text="Выбрать",
+            command=lambda: self.choose_color('player2'),
+            font=('Arial', 10),
+            bg=theme['accent'],
+            fg='white',
+            padx=10,
+            pady=2
+        )
+        color_btn2.pack(side='left')
+
+        theme_frame = tk.LabelFrame(
+            settings_frame,
+            text=" Тема ",
+            font=('Arial', 12, 'bold'),
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            padx=15,
+            pady=10
+        )
+        theme_frame.pack(fill='x', pady=(0, 15))
+
+        self.theme_var = tk.StringVar(value=self.settings['theme'])
+
+        theme_inner_frame = tk.Frame(theme_frame, bg=theme['secondary'])
+        theme_inner_frame.pack()
+
+        themes = [("Темная", "dark"), ("Светлая", "light")]
+        for text, value in themes:
+            tk.Radiobutton(
+                theme_inner_frame,
+                text=text,
+                variable=self.theme_var,
+                value=value,
+                font=('Arial', 11),
+                bg=theme['secondary'],
+                fg=theme['text_primary'],
+                selectcolor=theme['info'],
+                padx=10
+            ).pack(side='left', padx=10)
+
+        buttons_frame = tk.Frame(self.scrollable_frame, bg=theme['bg'])
+        buttons_frame.pack(side='bottom', fill='x', pady=(20, 0))
+
+        button_container = tk.Frame(buttons_frame, bg=theme['bg'])
+        button_container.pack()
+
+        default_btn = tk.Button(
+            button_container,
+            text="По умолчанию",
+            command=self.reset_to_default,
+            font=('Arial', 12, 'bold'),
+            bg=theme['warning'],
+            fg='white',
+            padx=25,
+            pady=8,
+            cursor='hand2',
+            height=1
+        )
+        default_btn.pack(side='left', padx=5)
+
+        cancel_btn = tk.Button(
+            button_container,
+            text="Отмена",
+            command=self.window.destroy,
+            font=('Arial', 12, 'bold'),
+            bg=theme['danger'],
+            fg='white',
+            padx=25,
+            pady=8,
+            cursor='hand2',
+            height=1
+        )
+        cancel_btn.pack(side='left', padx=10)
+
+        save_btn = tk.Button(
+            button_container,
+            text="Сохранить",
+            command=self.save_settings,
+            font=('Arial', 12, 'bold'),
+            bg=theme['success'],
+            fg='white',
+            padx=25,
+            pady=8,
+            cursor='hand2',
+            width=12,
+            height=1
+        )
+        save_btn.pack(side='left', padx=5)
+
+        self.mode_var.trace('w', self.on_mode_change)
+        self.on_mode_change()
+
+    def _on_mousewheel(self, event):
+        """Обработка прокрутки колесика мыши"""
+        try:
+            if self.canvas.winfo_exists():
+                self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        except Exception:
+            pass
+
+    def on_window_configure(self, event):
+        """Обработка изменения размера окна"""
+        if event.widget == self.window:
+            try:
+                if self.canvas.winfo_exists():
+                    self.canvas.itemconfig(1, width=event.width - 40)
+            except Exception:
+                pass
+
+    def toggle_timer_settings(self):
+        """Переключение доступности настроек таймера"""
+        state = 'normal' if self.timer_enabled_var.get() else 'disabled'
+        self.timer_spinbox.config(state=state)
+
+    def choose_color(self, player):
+        """Выбор цвета для игрока"""
+        current_color = (
+            self.player1_color_var.get()
+            if player == 'player1'
+            else self.player2_color_var.get()
+        )
+
+        color = colorchooser.askcolor(
+            initialcolor=current_color,
+            title=f"Выберите цвет для {player}"
+        )
+
+        if color[1]:
+            hex_color = color[1]
+            if player == 'player1':
+                self.player1_color_var.set(hex_color)
+                self.color_preview1.config(bg=hex_color)
+            else:
+                self.player2_color_var.set(hex_color)
+                self.color_preview2.config(bg=hex_color)
+
+    def on_mode_change(self, *args):
+        """Обработка изменения режима игры"""
+        if self.mode_var.get() == 'PvP':
+            self.ai_frame.pack_forget()
+            self.ai_starts_frame.pack_forget()
+        else:
+            self.ai_frame.pack(fill='x', pady=(0, 15))
+            self.ai_starts_frame.pack(fill='x', pady=(0, 15))
+
+    def reset_to_default(self):
+        """Сброс настроек к значениям по умолчанию"""
+        default_settings = {
+            'size': 3,
+            'mode': 'PvP',
+            'difficulty': 'Medium',
+            'player1_symbol': 'X',
+            'player2_symbol': 'O',
+            'player1_color': '#e74c3c',
+            'player2_color': '#3498db',
+            'theme': 'dark',
+            'ai_starts': False,
+            'timer_enabled': True,
+            'timer_seconds': 30,
+            'ai_node_budget': ai.DEFAULT_NODE_BUDGET,
+            'win_length': 0,
+            'ai_isolated': False,
+            'ai_deadline': 5,
+            'ai_delay_ms': 500
+        }
+
+        self.size_var.set(str(default_settings['size']))
+        self.mode_var.set(default_settings['mode'])
+        self.difficulty_var.set(default_settings['difficulty'])
+        self.player1_symbol_var.set(default_settings['player1_symbol'])
+        self.player2_symbol_var.set(default_settings['player2_symbol'])
+        self.player1_color_var.set(default_settings['player1_color'])
+        self.player2_color_var.set(default_settings['player2_color'])
+        self.theme_var.set(default_settings['theme'])
+        self.ai_starts_var.set(default_settings['ai_starts'])
+        self.timer_enabled_var.set(default_settings['timer_enabled'])
+        self.timer_seconds_var.set(str(default_settings['timer_seconds']))
+        self.node_budget_var.set(str(default_settings['ai_node_budget']))
+        self.win_length_var.set(str(default_settings['win_length']))
+        self.isolated_var.set(default_settings['ai_isolated'])
+        self.deadline_var.set(str(default_settings['ai_deadline']))
+        self.delay_var.set(str(default_settings['ai_delay_ms']))
+
+        self.color_preview1.config(bg=default_settings['player1_color'])
+        self.color_preview2.config(bg=default_settings['player2_color'])
+
+        messagebox.showinfo("Сброс", "Настройки сброшены к значениям по умолчанию!")
+
+    def collect_settings(self):
+        """Сбор всех настроек из интерфейса"""
+        player1_symbol = self.player1_symbol_var.get().strip()[:3]
+        player2_symbol = self.player2_symbol_var.get().strip()[:3]
+
+        if not player1_symbol or not player2_symbol:
+            raise ValueError("Символы игроков не могут быть пустыми!")
+
+        if player1_symbol == player2_symbol:
+            raise ValueError("Символы игроков должны быть разными!")
+
+        size = int(self.size_var.get())
+        if size < 3 or size > MAX_SIZE:
+            raise ValueError(f"Размер поля должен быть от 3 до {MAX_SIZE}!")
+
+        win_length = int(self.win_length_var.get())
+        if win_length != 0 and (win_length < 3 or win_length > size):
+            raise ValueError(f"Длина линии должна быть 0 (во всю сторону) или от 3 до {size}!")
+
+        timer_seconds = int(self.timer_seconds_var.get())
+        if timer_seconds < 5 or timer_seconds > 300:
+            raise ValueError("Таймер должен быть от 5 до 300 секунд!")
+
+        node_budget = int(self.node_budget_var.get())
+        if node_budget < 1000 or node_budget > 1000000:
+            raise ValueError("Бюджет узлов должен быть от 1000 до 1000000!")
+
+        deadline = int(self.deadline_var.get())
+        if deadline < 1 or deadline > 60:
+            raise ValueError("Срок хода ИИ должен быть от 1 до 60 секунд!")
+
+        delay_ms = int(self.delay_var.get())
+        if delay_ms < 0 or delay_ms > 5000:
+            raise ValueError("Пауза перед ходом ИИ должна быть от 0 до 5000 мс!")
+
+        self.settings = {
+            'size': size,
+            'mode': self.mode_var.get(),
+            'difficulty': self.difficulty_var.get(),
+            'player1_symbol': player1_symbol,
+            'player2_symbol': player2_symbol,
+            'player1_color': self.player1_color_var.get(),
+            'player2_color': self.player2_color_var.get(),
+            'theme': self.theme_var.get(),
+            'ai_starts': (
+                self.ai_starts_var.get()
+                if self.mode_var.get() == 'PvC'
+                else False
+            ),
+            'timer_enabled': self.timer_enabled_var.get(),
+            'timer_seconds': timer_seconds,
+            'ai_node_budget': node_budget,
+            'ai_seed': self.settings.get('ai_seed'),
+            'win_length': win_length,
+            'ai_isolated': self.isolated_var.get(),
+            'ai_deadline': deadline,
+            'ai_memory_mb': self.settings.get('ai_memory_mb', 512),
+            'ai_delay_ms': delay_ms
+        }
+
+    def save_settings(self):
+        """Сохранение настроек"""
+        try:
+            self.collect_settings()
+
+            self.save_current_settings()
+
+            with open("settings.json", "w", encoding='utf-8') as f:
+                json.dump(GAME_SETTINGS, f, indent=4)
+
+            messagebox.showinfo("Успех", "Настройки успешно сохранены!")
+
+            try:
+                self.canvas.unbind_all("<MouseWheel>")
+            except Exception:
+                pass
+
+            self.window.destroy()
+
+            # Меню открывается заново с новой темой и настройками
+            if self.menu is not None:
+                self.menu.next_screen = MainMenu
+            self.parent.destroy()
+
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка сохранения: {str(e)}")
+
+
+class CanvasBoard:
+    """Поле на одном холсте для больших размеров
+
+    Сетка кнопок требует size² виджетов; холст держит 2 * (size + 1)
+    линий сетки и по одному элементу на каждую поставленную фигуру,
+    поэтому ход и очистка поля стоят столько, сколько фигур, а не клеток.
+    """
+
+    def __init__(self, parent, size, colors, on_click):
+        self.size = size
+        self.on_click = on_click
+        self.cell = max(CANVAS_MIN_CELL, CANVAS_BOARD_SIDE // size)
+        side = self.cell * size
+        self.canvas = tk.Canvas(
+            parent,
+            width=side + 1,
+            height=side + 1,
+            bg=colors['cell_bg'],
+            highlightthickness=0
+        )
+        self.canvas.pack(expand=True)
+        for i in range(size + 1):
+            offset = i * self.cell
+            self.canvas.create_line(0, offset, side, offset, fill=colors['bg'])
+            self.canvas.create_line(offset, 0, offset, side, fill=colors['bg'])
+        self.symbols = {}
+        self.marks = {}
+        self.shades = {}
+        self.canvas.bind('<Button-1>', self.click)
+
+    def click(self, event):
+        """Клик по холсту — ход в клетку под курсором"""
+        row, col = event.y // self.cell, event.x // self.cell
+        if 0 <= row < self.size and 0 <= col < self.size:
+            self.on_click(row, col)
+
+    def font_size(self, symbol):
+        """Размер шрифта символа по размеру клетки и длине символа"""
+        return max(6, int(self.cell * 0.6 / max(1, len(symbol) * 0.7)))
+
+    def draw(self, cell, symbol, color):
+        """Символ в клетке"""
+        row, col = divmod(cell, self.size)
+        self.symbols[cell] = self.canvas.create_text(
+            col * self.cell + self.cell / 2,
+            row * self.cell + self.cell / 2,
+            text=symbol,
+            fill=color,
+            font=('Arial', self.font_size(symbol), 'bold')
+        )
+
+    def clear(self, cell):
+        """Очистка клетки и ее подсветки"""
+        for items in (self.symbols, self.marks, self.shades):
+            item = items.pop(cell, None)
+            if item is not None:
+                self.canvas.delete(item)
+
+    def highlight(self, cell, color):
+        """Подсветка клетки под символом"""
+        row, col = divmod(cell, self.size)
+        self.marks[cell] = self.canvas.create_rectangle(
+            col * self.cell + 1, row * self.cell + 1,
+            (col + 1) * self.cell, (row + 1) * self.cell,
+            fill=color, width=0
+        )
+        # Под линиями сетки и символом
+        self.canvas.tag_lower(self.marks[cell])
+
+    def shade(self, cell, color=None):
+        """Фон пустой клетки для тепловой карты; None — убрать"""
+        item = self.shades.pop(cell, None)
+        if item is not None:
+            self.canvas.delete(item)
+        if color is None:
+            return
+        row, col = divmod(cell, self.size)
+        self.shades[cell] = self.canvas.create_rectangle(
+            col * self.cell + 1, row * self.cell + 1,
+            (col + 1) * self.cell, (row + 1) * self.cell,
+            fill=color, width=0
+        )
+        self.canvas.tag_lower(self.shades[cell])
+
+
+class GameWindow:
+    """Окно игры"""
+
+    def __init__(self):
+        self.root = tk.Tk()
+        self.next_screen = None
+        self.root.title("Крестики-Нолики")
+        self.root.geometry("850x650")
+        self.apply_theme()
+        self.root.resizable(True, True)
+        self.root.minsize(1000, 550)
+
+        self.load_settings()
+
+        # Все отложенные задания окна: таймер хода, ход компьютера, опрос потоков
+        self.timers = Timers(self.root)
+        self.timer_seconds = GAME_SETTINGS['timer_seconds']
+        self.timer_running = False
+        # Конец хода по time.monotonic
+        self.turn_deadline = None
+
+        self.scores = {
+            GAME_SETTINGS['player1_symbol']: 0,
+            GAME_SETTINGS['player2_symbol']: 0,
+            'Ничья': 0
+        }
+        self.players = [
+            GAME_SETTINGS['player1_symbol'],
+            GAME_SETTINGS['player2_symbol']
+        ]
+
+        first_player = 1 if GAME_SETTINGS['mode'] == 'PvC' and GAME_SETTINGS['ai_starts'] else 0
+        self.state = new_state(self.board_size, first_player, self.win_length)
+        self.redo_stack = []
+
+        self.game_active = True
+        self.buttons = []
+        self.board_canvas = None
+        self.timeout_player = None
+        self.ai_stats = None
+        self.start_record()
+        self.session = ai.SearchSession(self.board_size)
+        self.ponder = None
+        self.isolated = None
+        hard_ai = self.game_mode == 'PvC' and self.ai_difficulty == 'Hard'
+        if hard_ai and GAME_SETTINGS.get('ai_isolated'):
+            # Поиск живет в процессе-исполнителе, поэтому обдумывания в окне нет
+            self.isolated = IsolatedAI(
+                self.board_size,
+                self.win_length,
+                GAME_SETTINGS.get('ai_deadline', 5),
+                GAME_SETTINGS.get('ai_memory_mb', 512)
+            )
+        elif hard_ai:
+            self.ponder = ai.Ponder(
+                self.board_size,
+                GAME_SETTINGS['player2_symbol'],
+                GAME_SETTINGS['player1_symbol'],
+                self.record['first_symbol'],
+                self.record['node_budget'],
+                self.win_length
+            )
+
+        self.hint = ai.Hint(self.board_size, self.win_length)
+        self.heatmap_on = False
+        self.heatmap = {}
+        self.hint_key = None
+        self.thinking = None
+        self.progress_shown = 0
+
+        self.center_window(850, 650)
+        if latency_tracer is not None:
+            latency_tracer.enter('reconfigure')
+        self.setup_ui()
+        self.create_board()
+        if latency_tracer is not None:
+            latency_tracer.leave()
+        self.finish_trace()
+
+        if (
+            GAME_SETTINGS['mode'] == 'PvC'
+            and GAME_SETTINGS['ai_starts']
+            and self.current_player == 1
+        ):
+            self.schedule_computer_move()
+        else:
+            self.start_pondering()
+
+        if GAME_SETTINGS['timer_enabled']:
+            self.start_timer()
+
+    @property
+    def current_player(self):
+        """Индекс игрока, чей сейчас ход"""
+        return self.state.to_move
+
+    def apply_theme(self):
+        """Применение текущей темы"""
+        theme = THEMES[GAME_SETTINGS['theme']]
+        self.colors = theme
+        self.root.configure(bg=theme['bg'])
+
+    def load_settings(self):
+        """Загрузка настроек из глобального словаря"""
+        try:
+            self.board_size = GAME_SETTINGS['size']
+            self.game_mode = GAME_SETTINGS['mode']
+            self.ai_difficulty = GAME_SETTINGS['difficulty']
+            self.player1_color = GAME_SETTINGS['player1_color']
+            self.player2_color = GAME_SETTINGS['player2_color']
+            self.timer_enabled = GAME_SETTINGS['timer_enabled']
+            self.timer_seconds = GAME_SETTINGS['timer_seconds']
+            self.win_length = GAME_SETTINGS.get('win_length') or None
+        except Exception:
+            self.board_size = 3
+            self.game_mode = 'PvP'
+            self.ai_difficulty = 'Medium'
+            self.player1_color = '#e74c3c'
+            self.player2_color = '#3498db'
+            self.timer_enabled = True
+            self.timer_seconds = 30
+            self.win_length = None
+
+    def center_window(self, width, height):
+        """Центрирование окна на экране"""
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        x = (screen_width - width) // 2
+        y = (screen_height - height) // 2
+        self.root.geometry(f'{width}x{height}+{x}+{y}')
+
+    def setup_ui(self):
+        """Настройка интерфейса игры"""
+        theme = self.colors
+
+        self.main_frame = tk.Frame(self.root, bg=theme['bg'])
+        self.main_frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+        top_frame = tk.Frame(self.main_frame, bg=theme['bg'])
+        top_frame.pack(fill='x', pady=(0, 10))
+
+        tk.Button(
+            top_frame,
+            text="Меню",
+            command=self.back_to_menu,
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            font=('Arial', 12, 'bold'),
+            padx=15,
+            pady=5
+        ).pack(side='left')
+
+        current_symbol = self.players[self.current_player]
+        self.status_label = tk.Label(
+            top_frame,
+            text=f"Ходит: {current_symbol}",
+            font=('Arial', 14),
+            bg=theme['bg'],
+            fg=self.player1_color if current_symbol == self.players[0] else self.player2_color
+        )
+        self.status_label.pack(side='left', padx=20, fill='x', expand=True)
+
+        if self.timer_enabled:
+            self.timer_label = tk.Label(
+                top_frame,
+                text=f"Таймер: {self.timer_seconds}с",
+                font=('Arial', 14, 'bold'),
+                bg=theme['warning'],
+                fg='white',
+                padx=15,
+                pady=5
+            )
+            self.timer_label.pack(side='left', padx=20)
+
+        self.score_label = tk.Label(
+            top_frame,
+            text=(
+                f"Счет: {GAME_SETTINGS['player1_symbol']} - "
+                f"{self.scores[GAME_SETTINGS['player1_symbol']]} | "
+                f"{GAME_SETTINGS['player2_symbol']} - "
+                f"{self.scores[GAME_SETTINGS['player2_symbol']]} | "
+                f"Ничьи - {self.scores['Ничья']}"
+            ),
+            font=('Arial', 14, 'bold'),
+            bg=theme['bg'],
+            fg=theme['text_primary']
+        )
+        self.score_label.pack(side='left', padx=20)
+
+        tk.Button(
+            top_frame,
+            text="Новая игра",
+            command=self.new_game,
+            bg=theme['accent'],
+            fg='white',
+            font=('Arial', 12, 'bold'),
+            padx=15,
+            pady=5
+        ).pack(side='right')
+
+        for text, command in (("Вернуть", self.redo_move), ("Отменить", self.undo_move)):
+            tk.Button(
+                top_frame,
+                text=text,
+                command=command,
+                bg=theme['secondary'],
+                fg=theme['text_primary'],
+                font=('Arial', 12, 'bold'),
+                padx=10,
+                pady=5
+            ).pack(side='right', padx=(0, 5))
+
+        self.hint_button = tk.Button(
+            top_frame,
+            text="Подсказка",
+            command=self.toggle_heatmap,
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            font=('Arial', 12, 'bold'),
+            padx=10,
+            pady=5
+        )
+        self.hint_button.pack(side='right', padx=(0, 5))
+
+        self.play_now_button = tk.Button(
+            top_frame,
+            text="Ходи сейчас",
+            command=self.play_now,
+            bg=theme['secondary'],
+            fg=theme['text_primary'],
+            font=('Arial', 12, 'bold'),
+            padx=10,
+            pady=5,
+            state='disabled'
+        )
+        self.play_now_button.pack(side='right', padx=(0, 5))
+
+        self.center_frame = tk.Frame(self.main_frame, bg=theme['bg'])
+        self.center_frame.pack(fill='both', expand=True)
+
+        self.board_container = tk.Frame(self.center_frame, bg=theme['bg'])
+        self.board_container.pack(expand=True, fill='both')
+
+    def start_timer(self):
+        """Запуск таймера"""
+        if not self.timer_enabled or not self.game_active:
+            return
+
+        self.timer_running = True
+        self.turn_deadline = time.monotonic() + self.timer_seconds
+        self.update_timer()
+
+    def stop_timer(self):
+        """Остановка таймера"""
+        self.timer_running = False
+        self.timers.cancel('timer')
+
+    def reset_timer(self):
+        """Сброс таймера"""
+        self.stop_timer()
+        self.timer_seconds = GAME_SETTINGS['timer_seconds']
+        if self.timer_enabled:
+            self.timer_label.config(
+                text=f"Таймер: {self.timer_seconds}с",
+                bg=self.colors['warning'],
+                fg='white'
+            )
+            self.start_timer()
+
+    def update_timer(self):
+        """Оставшиеся секунды хода; следующий вызов — когда сменится показанное число"""
+        if not self.timer_running or not self.game_active:
+            return
+
+        self.timer_seconds = max(0, math.ceil(self.turn_deadline - time.monotonic()))
+        if self.timer_seconds > 0:
+            if self.timer_seconds <= 10:
+                self.timer_label.config(fg='red', bg='#ffcccc')
+            elif self.timer_seconds <= 30:
+                self.timer_label.config(fg='orange', bg='#fff0cc')
+            else:
+                self.timer_label.config(fg='white', bg=self.colors['warning'])
+
+            self.timer_label.config(text=f"Таймер: {self.timer_seconds}с")
+            self.timers.call_at(
+                'timer', self.turn_deadline - (self.timer_seconds - 1), self.update_timer
+            )
+        else:
+            self.timer_label.config(text="Таймер: 0с", fg='red', bg='#ffcccc')
+            self.timeout_player = self.players[self.current_player]
+            self.handle_timeout()
+
+    def handle_timeout(self):
+        """Обработка истечения времени"""
+        if not self.game_active:
+            return
+
+        self.game_active = False
+        self.cancel_thinking()
+        self.stop_pondering()
+        self.clear_heatmap()
+
+        if self.game_mode == 'PvC':
+            if self.players[self.current_player] == GAME_SETTINGS['player2_symbol']:
+                winner = GAME_SETTINGS['player1_symbol']
+            else:
+                winner = GAME_SETTINGS['player2_symbol']
+        else:
+            if self.players[self.current_player] == GAME_SETTINGS['player1_symbol']:
+                winner = GAME_SETTINGS['player2_symbol']
+            else:
+                winner = GAME_SETTINGS['player1_symbol']
+
+        self.scores[winner] += 1
+        self.update_score()
+        self.save_record(winner)
+        messagebox.showinfo(
+            "Время вышло!",
+            f"Время на ход вышло! {winner} побеждает!"
+        )
+
+    def create_board(self):
+        """Создание игрового поля"""
+        for widget in self.board_container.winfo_children():
+            widget.destroy()
+
+        board_frame = tk.Frame(self.board_container, bg=self.colors['bg'])
+        board_frame.pack(expand=True)
+
+        self.buttons = []
+        self.board_canvas = None
+
+        if self.board_size > BUTTON_BOARD_MAX:
+            self.board_canvas = CanvasBoard(
+                board_frame, self.board_size, self.colors, self.make_move
+            )
+            return
+
+        if self.board_size <= 4:
+            font_size = 40
+            btn_width = 8
+            btn_height = 4
+        elif self.board_size <= 6:
+            font_size = 32
+            btn_width = 6
+            btn_height = 3
+        else:
+            font_size = 24
+            btn_width = 4
+            btn_height = 2
+
+        for i in range(self.board_size):
+            row_buttons = []
+            for j in range(self.board_size):
+                btn = tk.Button(
+                    board_frame,
+                    text='',
+                    font=('Arial', font_size, 'bold'),
+                    width=btn_width,
+                    height=btn_height,
+                    bg=self.colors['cell_bg'],
+                    fg=self.colors['text_primary'],
+                    activebackground=self.colors['cell_hover'],
+                    command=lambda row=i, col=j: self.make_move(row, col)
+                )
+                btn.grid(row=i, column=j, padx=2, pady=2, sticky='nsew')
+
+                board_frame.grid_rowconfigure(i, weight=1, uniform='row')
+                board_frame.grid_columnconfigure(j, weight=1, uniform='col')
+
+                row_buttons.append(btn)
+            self.buttons.append(row_buttons)
+
+    def make_move(self, row, col):
+        """Совершение хода"""
+        tracer = latency_tracer
+        if tracer is not None:
+            tracer.begin('move' if self.hint_player() else 'ai_move')
+        cell = row * self.board_size + col
+        # Пока компьютер думает, клики по полю не считаются
+        if not self.game_active or self.state.cells[cell] != EMPTY or self.thinking is not None:
+            if tracer is not None:
+                tracer.cancel()
+            return
+
+        self.redo_stack.clear()
+        player = self.place(cell)
+
+        if tracer is not None:
+            tracer.enter('reconfigure')
+        if self.timer_enabled:
+            self.reset_timer()
+        if tracer is not None:
+            tracer.leave()
+
+        if self.check_game_over(player):
+            return
+
+        if tracer is not None:
+            tracer.enter('reconfigure')
+        self.update_status()
+        if tracer is not None:
+            tracer.leave()
+        self.next_turn()
+        self.finish_trace()
+
+    def place(self, cell, entry=None):
+        """Постановка символа в клетку и запись хода, без проверки конца партии"""
+        self.clear_heatmap()
+        player = self.players[self.current_player]
+        # Победа и ничья находятся при постановке, по счетчикам линий
+        if latency_tracer is not None:
+            latency_tracer.enter('check')
+        self.state.play(cell)
+        if latency_tracer is not None:
+            latency_tracer.leave()
+        if entry is None:
+            entry = {'cell': cell, 'symbol': player, 'ai': self.ai_stats}
+        self.record['moves'].append(entry)
+        self.ai_stats = None
+
+        color = self.player1_color if player == self.players[0] else self.player2_color
+        if latency_tracer is not None:
+            latency_tracer.enter('reconfigure')
+        self.draw_symbol(cell, player, color)
+        if latency_tracer is not None:
+            latency_tracer.leave()
+        return player
+
+    def draw_symbol(self, cell, player, color):
+        """Символ игрока в клетке: на холсте или на кнопке"""
+        if self.board_canvas is not None:
+            self.board_canvas.draw(cell, player, color)
+            return
+
+        symbol_length = len(player)
+        if self.board_size <= 4:
+            base_size = 40
+        elif self.board_size <= 6:
+            base_size = 32
+        else:
+            base_size = 24
+
+        if symbol_length == 2:
+            font_size = int(base_size * 0.8)
+        elif symbol_length == 3:
+            font_size = int(base_size * 0.6)
+        else:
+            font_size = base_size
+
+        row, col = divmod(cell, self.board_size)
+        self.buttons[row][col].config(
+            text=player,
+            font=('Arial', font_size, 'bold'),
+            fg=color,
+            disabledforeground=color,
+            state='disabled'
+        )
+
+    def clear_cell(self, cell):
+        """Возврат клетки в пустое состояние"""
+        if self.board_canvas is not None:
+            self.board_canvas.clear(cell)
+            return
+        row, col = divmod(cell, self.board_size)
+        self.buttons[row][col].config(
+            text='',
+            bg=self.colors['cell_bg'],
+            fg=self.colors['text_primary'],
+            state='normal'
+        )
+
+    def check_game_over(self, player):
+        """Обработка победы или ничьей после хода player"""
+        if self.state.winner is not None:
+            self.stop_timer()
+            self.stop_pondering()
+            self.game_active = False
+            self.scores[player] += 1
+            self.update_score()
+            self.highlight_winner()
+            self.save_record(player)
+            self.finish_trace()
+            messagebox.showinfo("Победа!", f"Игрок {player} победил!")
+            return True
+
+        if self.state.is_full():
+            self.stop_timer()
+            self.stop_pondering()
+            self.game_active = False
+            self.scores['Ничья'] += 1
+            self.update_score()
+            self.save_record('Ничья')
+            self.finish_trace()
+            messagebox.showinfo("Ничья!", "Игра закончилась вничью!")
+            return True
+
+        return False
+
+    def finish_trace(self):
+        """Конец замера действия до окна сообщения, которое ждет человека"""
+        if latency_tracer is not None:
+            latency_tracer.finish(self.root)
+
+    def next_turn(self):
+        """Передача хода: компьютеру — с задержкой, человеку — с обдумыванием ИИ"""
+        if (
+            self.game_mode == "PvC"
+            and self.players[self.current_player] == GAME_SETTINGS['player2_symbol']
+        ):
+            self.schedule_computer_move()
+        else:
+            self.start_pondering()
+
+    def schedule_computer_move(self):
+        """Ход компьютера после паузы ai_delay_ms"""
+        delay = GAME_SETTINGS.get('ai_delay_ms', 500) / 1000
+        self.timers.call_later('computer', delay, self.computer_move)
+
+    def undo_move(self):
+        """Отмена хода; в режиме PvC — вместе с ответом компьютера"""
+        if not self.game_active or not self.state.stack:
+            return
+
+        self.cancel_thinking()
+        plies = 1
+        if self.game_mode == 'PvC' and self.current_player == 0:
+            # Последним ходил компьютер: возвращаемся к прошлому ходу человека
+            if len(self.state.stack) < 2:
+                return
+            plies = 2
+
+        self.stop_pondering()
+        for _ in range(plies):
+            cell = self.state.undo()
+            self.redo_stack.append(self.record['moves'].pop())
+            self.clear_cell(cell)
+
+        self.update_status()
+        if self.timer_enabled:
+            self.reset_timer()
+        self.start_pondering()
+
+    def redo_move(self):
+        """Повтор отмененного хода; в режиме PvC — вместе с ответом компьютера"""
+        if not self.game_active or not self.redo_stack:
+            return
+
+        self.cancel_thinking()
+        self.stop_pondering()
+        player = self.place(self.redo_stack[-1]['cell'], self.redo_stack.pop())
+        if (
+            self.game_mode == 'PvC'
+            and self.current_player == 1
+            and self.redo_stack
+            and self.state.winner is None
+        ):
+            player = self.place(self.redo_stack[-1]['cell'], self.redo_stack.pop())
+
+        if self.timer_enabled:
+            self.reset_timer()
+        if self.check_game_over(player):
+            return
+
+        self.update_status()
+        self.next_turn()
+
+    def update_status(self):
+        """Обновление статуса игры"""
+        current_symbol = self.players[self.current_player]
+        color = (
+            self.player1_color
+            if current_symbol == self.players[0]
+            else self.player2_color
+        )
+        self.status_label.config(
+            text=f"Ходит: {current_symbol}",
+            fg=color
+        )
+        self.show_hint()
+
+    def toggle_heatmap(self):
+        """Включение и выключение подсказки с тепловой картой ходов"""
+        self.heatmap_on = not self.heatmap_on
+        self.hint_button.config(relief='sunken' if self.heatmap_on else 'raised')
+        if self.heatmap_on:
+            self.show_hint()
+        else:
+            self.clear_heatmap()
+
+    def hint_player(self):
+        """Символы (игрок, соперник) для подсказки или None, если сейчас ходит компьютер"""
+        player = self.current_player
+        if self.game_mode == 'PvC' and self.players[player] == GAME_SETTINGS['player2_symbol']:
+            return None
+        return self.players[player], self.players[1 - player]
+
+    def show_hint(self):
+        """Оценки ходов текущей позиции: из кеша сразу, иначе по мере подсчета"""
+        self.clear_heatmap()
+        symbols = self.hint_player()
+        if not self.heatmap_on or not self.game_active or symbols is None:
+            return
+        self.hint_key, scores = self.hint.start(self.flat_board(), *symbols)
+        if scores is not None:
+            self.heatmap = dict(scores)
+            self.paint_heatmap(done=True)
+        else:
+            self.timers.call_later('hint', HINT_POLL_MS / 1000, self.poll_hint)
+
+    def poll_hint(self):
+        """Оценки, пришедшие из фонового потока подсказки"""
+        done = changed = False
+        for key, cell, score in self.hint.poll():
+            if key != self.hint_key:
+                continue
+            if cell is None:
+                done = True
+            else:
+                self.heatmap[cell] = score
+                changed = True
+        if changed or done:
+            self.paint_heatmap(done)
+        if not done:
+            self.timers.call_later('hint', HINT_POLL_MS / 1000, self.poll_hint)
+
+    def paint_heatmap(self, done=False):
+        """Фон оцененных клеток; когда карта готова — лучший ход в строке статуса"""
+        for cell, color in heat_colors(self.heatmap, self.colors).items():
+            if self.board_canvas is not None:
+                self.board_canvas.shade(cell, color)
+            else:
+                row, col = divmod(cell, self.board_size)
+                self.buttons[row][col].config(bg=color)
+        if done and self.heatmap:
+            best = max(self.heatmap, key=self.heatmap.get)
+            row, col = divmod(best, self.board_size)
+            self.status_label.config(
+                text=f"Ходит: {self.players[self.current_player]} — "
+                     f"подсказка: строка {row + 1}, столбец {col + 1}"
+            )
+
+    def clear_heatmap(self):
+        """Остановка подсказки и возврат фона клеток"""
+        self.hint.stop()
+        self.timers.cancel('hint')
+        for cell in self.heatmap:
+            if self.board_canvas is not None:
+                self.board_canvas.shade(cell)
+            else:
+                row, col = divmod(cell, self.board_size)
+                self.buttons[row][col].config(bg=self.colors['cell_bg'])
+        self.heatmap = {}
+        self.hint_key = None
+
+    def computer_move(self):
+        """Ход компьютера"""
+        # Ход мог быть отменен, пока компьютер ждал своей очереди
+        if not self.game_active or self.current_player != 1:
+            return
+
+        board = self.flat_board()
+        if '' not in board:
+            return
+
+        move_number = len(self.record['moves'])
+        started = time.perf_counter()
+        pondered = self.ponder.take(board) if self.ponder else None
+        if isinstance(pondered, ai.AnytimeMove):
+            # Эта позиция как раз обдумывается: ход сделает poll_thinking
+            self.start_thinking(pondered, started)
+            return
+        if pondered:
+            cell, stats, session = pondered
+            if session is not None:
+                self.session = session
+        elif self.isolated:
+            # Исполнителя ждет фоновый поток, окно не замирает; ход сделает poll_thinking
+            thinking = IsolatedMove(
+                self.isolated,
+                board,
+                GAME_SETTINGS['player2_symbol'],
+                GAME_SETTINGS['player1_symbol'],
+                self.record['first_symbol'],
+                ai.move_rng(self.record['seed'], move_number),
+                self.record['node_budget'],
+                self.isolated_deadline()
+            )
+            self.start_thinking(thinking, started)
+            return
+        elif self.ai_difficulty == 'Hard':
+            # Поиск идет в фоне; ход сделает poll_thinking
+            thinking = ai.AnytimeMove(
+                board,
+                self.board_size,
+                GAME_SETTINGS['player2_symbol'],
+                GAME_SETTINGS['player1_symbol'],
+                self.record['first_symbol'],
+                ai.move_rng(self.record['seed'], move_number),
+                self.record['node_budget'],
+                self.session,
+                self.win_length
+            )
+            self.start_thinking(thinking, started)
+            return
+        else:
+            stats = {}
+            cell = ai.choose_move(
+                board,
+                self.board_size,
+                self.ai_difficulty,
+                GAME_SETTINGS['player2_symbol'],
+                GAME_SETTINGS['player1_symbol'],
+                self.record['first_symbol'],
+                ai.move_rng(self.record['seed'], move_number),
+                self.record['node_budget'],
+                stats=stats,
+                session=self.session,
+                win_length=self.win_length
+            )
+        self.finish_computer_move(cell, stats, started)
+
+    def finish_computer_move(self, cell, stats, started):
+        """Ход компьютера на поле со статистикой для записи партии"""
+        stats['seconds'] = round(time.perf_counter() - started, 4)
+        self.ai_stats = stats
+
+        row, col = divmod(cell, self.board_size)
+        self.make_move(row, col)
+
+    def isolated_deadline(self):
+        """Срок хода исполнителя: не дольше ai_deadline и часов компьютера
+
+        Срок кончается на секунду раньше часов: тогда poll_thinking все
+        равно потребовал бы ход.
+        """
+        deadline = self.isolated.deadline
+        if self.timer_running and self.turn_deadline is not None:
+            remaining = self.turn_deadline - time.monotonic() - 1
+            deadline = min(deadline, max(MIN_ISOLATED_DEADLINE, remaining))
+        return deadline
+
+    def start_thinking(self, thinking, started):
+        """Слежение за фоновым поиском хода: ход поиска в статусе и «Ходи сейчас»"""
+        self.thinking = thinking
+        self.progress_shown = started
+        self.play_now_button.config(state='normal')
+        self.timers.call_later('thinking', THINKING_POLL_MS / 1000, self.poll_thinking)
+
+    def poll_thinking(self):
+        """Проверка фонового поиска: ход, если готов, иначе ход поиска в статусе"""
+        thinking = self.thinking
+        if thinking.done:
+            self.thinking = None
+            self.play_now_button.config(state='disabled')
+            stats = thinking.stats
+            # Ход из обдумывания считался на своей копии сессии
+            if thinking.session is not None:
+                self.session = thinking.session
+            if thinking.stopped:
+                stats['played_now'] = True
+            self.finish_computer_move(thinking.cell, stats, thinking.started)
+            return
+
+        # Часы компьютера на исходе: ходим тем, что есть
+        if self.timer_enabled and self.timer_seconds <= 1:
+            thinking.play_now()
+        now = time.perf_counter()
+        if now - self.progress_shown >= PROGRESS_MS / 1000:
+            self.progress_shown = now
+            self.show_progress(thinking.progress())
+        self.timers.call_later('thinking', THINKING_POLL_MS / 1000, self.poll_thinking)
+
+    def show_progress(self, progress):
+        """Глубина, лучший ход, оценка и скорость поиска в строке статуса"""
+        text = (f"Думает {GAME_SETTINGS['player2_symbol']}: "
+                f"{progress['nps'] / 1000:.0f} тыс. узлов/с")
+        if progress['move'] is not None:
+            row, col = divmod(progress['move'], self.board_size)
+            text += (f", глубина {progress['depth']}, ход {row + 1} {col + 1}, "
+                     f"оценка {progress['score']:+g}")
+        self.status_label.config(text=text)
+
+    def play_now(self):
+        """Кнопка «Ходи сейчас»: компьютер ходит лучшим найденным ходом"""
+        if self.thinking is not None:
+            self.thinking.play_now()
+
+    def cancel_thinking(self):
+        """Остановка фонового поиска без хода (отмена, новая партия, выход)"""
+        if self.thinking is None:
+            return
+        self.thinking.stop()
+        self.thinking = None
+        self.timers.cancel('thinking')
+        self.play_now_button.config(state='disabled')
+
+    def flat_board(self):
+        """Поле одним списком символов для модуля ИИ"""
+        return self.state.to_board(self.players)
+
+    def start_pondering(self):
+        """Обдумывание ответа компьютера, пока ходит человек"""
+        if not self.ponder or not self.game_active or self.current_player != 0:
+            return
+        board = self.flat_board()
+        if '' in board:
+            self.ponder.start(
+                board,
+                self.record['seed'],
+                len(self.record['moves']) + 1,
+                self.session
+            )
+
+    def stop_pondering(self):
+        """Остановка фонового обдумывания"""
+        if self.ponder:
+            self.ponder.stop()
+
+    def start_record(self):
+        """Новая запись партии с зерном генератора для повтора ходов ИИ"""
+        seed = GAME_SETTINGS.get('ai_seed')
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        first = 1 if self.game_mode == 'PvC' and GAME_SETTINGS['ai_starts'] else 0
+        self.record = {
+            'seed': seed,
+            'size': self.board_size,
+            'mode': self.game_mode,
+            'difficulty': self.ai_difficulty,
+            'node_budget': GAME_SETTINGS.get('ai_node_budget', ai.DEFAULT_NODE_BUDGET),
+            'win_length': self.win_length,
+            'ai_symbol': GAME_SETTINGS['player2_symbol'],
+            'human_symbol': GAME_SETTINGS['player1_symbol'],
+            'first_symbol': self.players[first],
+            'moves': []
+        }
+
+    def save_record(self, result):
+        """Дописывание завершенной партии в файл записей"""
+        self.record['result'] = result
+        try:
+            with open(GAME_RECORDS_FILE, "a", encoding='utf-8') as f:
+                f.write(json.dumps(self.record, ensure_ascii=False) + "\n")
+        except Exception:
+            pass
+
+    def highlight_winner(self):
+        """Выделение победной комбинации"""
+        for cell in self.state.winning_cells():
+            if self.board_canvas is not None:
+                self.board_canvas.highlight(cell, self.colors['success'])
+                continue
+            row, col = divmod(cell, self.board_size)
+            self.buttons[row][col].config(bg=self.colors['success'])
+
+    def update_score(self):
+        """Обновление счета"""
+        self.score_label.config(
+            text=(
+                f"Счет: {GAME_SETTINGS['player1_symbol']} - "
+                f"{self.scores[GAME_SETTINGS['player1_symbol']]} | "
+                f"{GAME_SETTINGS['player2_symbol']} - "
+                f"{self.scores[GAME_SETTINGS['player2_symbol']]} | "
+                f"Ничьи - {self.scores['Ничья']}"
+            )
+        )
+
+    def new_game(self):
+        """Начать новую игру"""
+        self.stop_timer()
+        self.cancel_thinking()
+        self.stop_pondering()
+        # Ход компьютера и опросы прошлой партии больше не нужны
+        self.timers.cancel_all()
+        self.game_active = True
+        self.timeout_player = None
+
+        # Поле и кнопки очищаются на месте: только занятые клетки
+        for cell in self.state.stack:
+            self.clear_cell(cell)
+        first_player = 1 if GAME_SETTINGS['mode'] == 'PvC' and GAME_SETTINGS['ai_starts'] else 0
+        self.state.reset(first_player)
+        self.redo_stack.clear()
+
+        self.ai_stats = None
+        self.start_record()
+        self.session.clear()
+        self.hint.clear()
+        if self.isolated:
+            self.isolated.clear()
+
+        self.update_status()
+
+        if self.timer_enabled:
+            self.reset_timer()
+
+        if (
+            GAME_SETTINGS['mode'] == 'PvC'
+            and GAME_SETTINGS['ai_starts']
+            and self.current_player == 1
+        ):
+            self.schedule_computer_move()
+        else:
+            self.start_pondering()
+
+    def back_to_menu(self):
+        """Возврат в главное меню"""
+        self.stop_timer()
+        self.cancel_thinking()
+        self.stop_pondering()
+        self.clear_heatmap()
+        self.timers.cancel_all()
+        if self.isolated:
+            self.isolated.close()
+        self.next_screen = MainMenu
+        self.root.destroy()
+
+
+def run(on_window=None):
+    """Смена экранов: меню и окно игры по очереди, каждое в своем mainloop.
+
+    Экран не открывает следующий сам, а называет его в next_screen
+    и закрывается; следующий создается здесь, после выхода из mainloop.
+    Поэтому стек вызовов и интерпретаторы Tcl не копятся от перехода
+    к переходу. on_window(экран) вызывается для каждого нового экрана.
+    """
+    screen = MainMenu
+    while screen is not None:
+        window = screen()
+        if on_window is not None:
+            on_window(window)
+        window.root.mainloop()
+        screen = window.next_screen
+
+
+def main(memory_log=None, latency_log=None):
+    """Главная функция приложения
+
+    memory_log — файл замеров памяти (memprobe.py), latency_log — файл
+    задержек от клика до отрисовки (latency.py).
+    """
+    global latency_tracer
+    if latency_log:
+        from latency import LatencyTracer
+        latency_tracer = LatencyTracer()
+    on_window = None
+    if memory_log:
+        from memprobe import MemoryProbe
+        probe = MemoryProbe(memory_log)
+
+        def on_window(window):
+            window.root.after_idle(probe.sample, window.root, type(window).__name__)
+
+    try:
+        run(on_window)
+    except Exception as e:
+        messagebox.showerror("Ошибка", f"Ошибка: {str(e)}")
+    finally:
+        if latency_tracer is not None:
+            latency_tracer.save(latency_log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Сложный ИИ в отдельном процессе со сроком хода и ограничением памяти
+
+Поиск на большом поле может надолго занять окно или съесть память.
+IsolatedAI держит процесс-исполнитель, который живет всю партию вместе
+со своей сессией поиска, и ждет его хода не дольше deadline секунд.
+Исполнитель сам останавливает поиск чуть раньше срока (SOFT_SHARE),
+поэтому обычно отвечает вовремя; если не успел, он завершается
+принудительно, а ходом становится лучший ход последней просчитанной
+глубины (исполнитель сообщает его после каждой глубины) или, если
+поиск не дошел и до первой, ход Среднего ИИ. Следующий исполнитель
+запускается сразу, уже с пустой сессией. Окно ждет хода не само:
+IsolatedMove ждет его в фоновом потоке, и за ним следят так же, как
+за ai.AnytimeMove (ход поиска, «Ходи сейчас»).
+
+Память ограничивается через resource.setrlimit(RLIMIT_AS): ядро Linux
+не соблюдает RLIMIT_RSS, поэтому ограничивается адресное пространство
+сверх занятого при запуске исполнителя. Без модуля resource (Windows)
+остается только срок. Процесс запускается методом spawn: исполнитель
+не наследует окно Tk и потоки обдумывания.
+
+    python main.py move --board "..." --deadline 2 --memory-mb 256 --verbose
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from ai import DEFAULT_NODE_BUDGET, SearchSession, get_hard_move, get_medium_move
+
+DEFAULT_DEADLINE = 5.0
+DEFAULT_MEMORY_MB = 512
+# Доля срока, после которой исполнитель сам останавливает поиск
+SOFT_SHARE = 0.8
+# Сколько ждать выхода процесса после terminate, прежде чем kill
+KILL_GRACE = 0.05
+# Код выхода исполнителя, которому не хватило памяти
+MEMORY_EXIT = 3
+# Как часто ожидание хода проверяет событие остановки
+STOP_POLL = 0.02
+
+
+def address_space():
+    """Занятое адресное пространство процесса в байтах (0, если неизвестно)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return pages * resource.getpagesize()
+
+
+def limit_memory(memory_mb):
+    """Ограничение адресного пространства исполнителя memory_mb мегабайтами сверх текущего"""
+    if resource is None or not memory_mb:
+        return
+    limit = address_space() + memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def out_of_memory(error):
+    """Ошибка вызвана нехваткой памяти (в том числе при откате позиции после нее)"""
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        error = error.__context__
+    return False
+
+
+def worker(conn, size, win_length, memory_mb):
+    """Цикл исполнителя: ходы по запросам из conn, пока не придет None"""
+    limit_memory(memory_mb)
+    session = SearchSession(size)
+    conn.send(('ready',))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        if request[0] == 'clear':
+            session.clear()
+            continue
+        _, board, ai_symbol, human_symbol, first_symbol, rng, node_budget, time_limit = request
+
+        def on_depth(depth, move, score, nodes):
+            conn.send(('depth', depth, move, score, nodes))
+
+        stats = {}
+        try:
+            cell = get_hard_move(board, size, ai_symbol, human_symbol, first_symbol, rng,
+                                 node_budget, time_limit, stats, session=session,
+                                 win_length=win_length, on_depth=on_depth)
+        except Exception as e:
+            # Памяти может не хватить даже на ответ, поэтому причина — в коде
+            # выхода; сессия могла остаться наполовину заполненной
+            os._exit(MEMORY_EXIT if out_of_memory(e) else 1)
+        conn.send(('done', cell, stats))
+
+
+class IsolatedAI:
+    """Исполнитель Сложного ИИ одной партии в отдельном процессе
+
+    kills — сколько раз исполнитель пришлось остановить: по сроку
+    (timeout), по памяти (memory) или потому что он упал (crash).
+    """
+
+    def __init__(self, size, win_length=None, deadline=DEFAULT_DEADLINE,
+                 memory_mb=DEFAULT_MEMORY_MB):
+        self.size = size
+        self.win_length = win_length
+        self.deadline = deadline
+        self.memory_mb = memory_mb
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.kills = {'timeout': 0, 'memory': 0, 'crash': 0}
+        self.start()
+
+    def start(self):
+        """Запуск нового исполнителя; ответ о готовности читается при первом ходе"""
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=worker, args=(child_conn, self.size, self.win_length, self.memory_mb),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def stop(self):
+        """Принудительное завершение исполнителя; ждет не дольше 2 * KILL_GRACE"""
+        self.process.terminate()
+        self.process.join(KILL_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(KILL_GRACE)
+        self.conn.close()
+
+    def best_move(self, board, ai_symbol, human_symbol, first_symbol, rng,
+                  node_budget=DEFAULT_NODE_BUDGET, stats=None, deadline=None,
+                  stop_event=None, on_depth=None):
+        """Ход не позже чем через deadline секунд (плюс время остановки исполнителя)
+
+        deadline — срок этого хода вместо self.deadline. stop_event
+        прерывает ожидание: ходом становится лучший ход на этот момент.
+        on_depth(глубина, ход, оценка, узлы) — после каждой глубины.
+        """
+        stats = stats if stats is not None else {}
+        seconds = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+        deadline = started + seconds
+        if not self.process.is_alive():
+            self.stop()
+            self.start()
+
+        request = ('move', list(board), ai_symbol, human_symbol, first_symbol, rng,
+                   node_budget, seconds * SOFT_SHARE)
+        sent = False
+        best = None
+        reason = 'timeout'
+        while True:
+            if not sent and self.ready:
+                try:
+                    self.conn.send(request)
+                except OSError:
+                    reason = 'crash'
+                    break
+                sent = True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if stop_event is not None and stop_event.is_set():
+                reason = 'stopped'
+                break
+            if stop_event is not None:
+                remaining = min(remaining, STOP_POLL)
+            try:
+                if not self.conn.poll(remaining):
+                    continue
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                reason = 'crash'
+                break
+            if message[0] == 'ready':
+                self.ready = True
+            elif message[0] == 'depth':
+                _, depth, move, score, nodes = message
+                best = move
+                stats.update(depth=depth, score=score, nodes=nodes)
+                if on_depth is not None:
+                    on_depth(depth, move, score, nodes)
+            elif message[0] == 'done':
+                _, cell, worker_stats = message
+                stats.update(worker_stats)
+                stats.update(source='isolated/' + stats.get('source', ''),
+                             kills=sum(self.kills.values()))
+                return cell
+
+        # Исполнитель не ответил вовремя, исчерпал память, упал или ход
+        # потребовали раньше (stopped — не сбой, в kills не считается)
+        self.stop()
+        if reason == 'crash' and self.process.exitcode == MEMORY_EXIT:
+            reason = 'memory'
+        if reason in self.kills:
+            self.kills[reason] += 1
+        self.start()
+        stats.update(killed=reason, kills=sum(self.kills.values()))
+        if best is not None:
+            stats['source'] = 'isolated/best-so-far'
+            return best
+        stats['source'] = 'isolated/medium'
+        return get_medium_move(board, self.size, ai_symbol, human_symbol, rng,
+                               self.win_length)
+
+    def clear(self):
+        """Новая партия: исполнитель забывает сессию поиска"""
+        try:
+            self.conn.send(('clear',))
+        except OSError:
+            pass
+
+    def close(self):
+        """Остановка исполнителя"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(KILL_GRACE)
+        if self.process.is_alive():
+            self.stop()
+        else:
+            self.conn.close()
+
+
+class IsolatedMove:
+    """Ход IsolatedAI, которого ждет фоновый поток; интерфейс как у ai.AnytimeMove"""
+
+    def __init__(self, isolated, board, ai_symbol, human_symbol, first_symbol, rng,
+                 node_budget=DEFAULT_NODE_BUDGET, deadline=None):
+        self.args = (list(board), ai_symbol, human_symbol, first_symbol, rng, node_budget)
+        self.isolated = isolated
+        self.deadline = deadline
+        self.stop_event = threading.Event()
+        self.finished = threading.Event()
+        # Сессия поиска живет в исполнителе
+        self.session = None
+        self.stats = {}
+        self.best = (0, None, None)
+        self.nodes = 0
+        self.started = time.perf_counter()
+        self.cell = None
+        self.stopped = False
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        """Ожидание хода исполнителя в фоновом потоке"""
+        try:
+            self.cell = self.isolated.best_move(*self.args, stats=self.stats,
+                                                deadline=self.deadline,
+                                                stop_event=self.stop_event,
+                                                on_depth=self.depth_done)
+        finally:
+            self.finished.set()
+
+    def depth_done(self, depth, move, score, nodes):
+        """Исполнитель просчитал очередную глубину"""
+        self.best = (depth, move, score)
+        self.nodes = nodes
+
+    @property
+    def done(self):
+        """Ход получен"""
+        return self.finished.is_set()
+
+    def progress(self):
+        """Глубина, лучший ход, оценка, узлы и узлы в секунду на сейчас"""
+        depth, move, score = self.best
+        seconds = time.perf_counter() - self.started
+        return {'depth': depth, 'move': move, 'score': score, 'nodes': self.nodes,
+                'nps': self.nodes / seconds if seconds > 0 else 0}
+
+    def play_now(self):
+        """Не ждать исполнителя: ходить лучшим ходом на сейчас"""
+        self.stopped = not self.done
+        self.stop_event.set()
+
+    def stop(self):
+        """Прервать ожидание и дождаться потока"""
+        self.stop_event.set()
+        self.finished.wait()
@@ -0,0 +1,122 @@
+"""Задержка от клика до отрисовки в окне игры
+
+Каждое действие (ход, «Начать игру») — запись с временем по частям:
+
+    check        — постановка в GameState, где сразу находится победа
+                   или ничья (счетчики линий), и проверки конца партии
+    reconfigure  — изменение виджетов: клетка, строка статуса, таймер
+    handler      — остальное время обработчика (запись хода, подсказка,
+                   передача хода)
+    paint        — от конца обработчика до выполнения метки after_idle:
+                   Tk перерисовывает виджеты в задачах простоя, которые
+                   встали в очередь раньше метки, поэтому к ее вызову
+                   клетка уже нарисована
+
+Во время действия только берется perf_counter и дописывается список;
+гистограммы строятся при записи в файл, поэтому трассировка почти не
+меняет то, что измеряет. Включается по желанию:
+
+    python main.py gui --latency latency.json
+"""
+
+import json
+import time
+
+PHASES = ('handler', 'check', 'reconfigure', 'paint')
+# Границы корзин гистограммы в миллисекундах
+BUCKETS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def histogram(values):
+    """Число значений (мс) в каждой корзине, последняя — больше всех границ"""
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values:
+        index = 0
+        while index < len(BUCKETS_MS) and value > BUCKETS_MS[index]:
+            index += 1
+        counts[index] += 1
+    return counts
+
+
+def summary(values):
+    """Число, p50, p95 и максимум (мс)"""
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50': round(values[len(values) // 2], 3),
+        'p95': round(values[min(len(values) - 1, int(0.95 * len(values)))], 3),
+        'max': round(values[-1], 3),
+    }
+
+
+class LatencyTracer:
+    """Записи задержек действий окна; одновременно идет не больше одной записи"""
+
+    def __init__(self):
+        self.records = []
+        self.current = None
+        self.phase = None
+        self.entered = 0.0
+
+    def begin(self, kind):
+        """Начало действия kind ('move', 'ai_move', 'start')"""
+        now = time.perf_counter()
+        self.current = {'kind': kind, 'started': now, 'check': 0.0, 'reconfigure': 0.0}
+        self.phase = None
+
+    def cancel(self):
+        """Действие не состоялось (клик по занятой клетке)"""
+        self.current = None
+
+    def enter(self, phase):
+        """Начало части check или reconfigure текущего действия"""
+        if self.current is not None:
+            self.phase = phase
+            self.entered = time.perf_counter()
+
+    def leave(self):
+        """Конец начатой части"""
+        if self.current is not None and self.phase is not None:
+            self.current[self.phase] += time.perf_counter() - self.entered
+            self.phase = None
+
+    def finish(self, root):
+        """Конец обработчика; отрисовка отмечается задачей простоя root"""
+        record = self.current
+        if record is None:
+            return
+        self.current = None
+        now = time.perf_counter()
+        record['handler'] = now - record['started'] - record['check'] - record['reconfigure']
+        record['finished'] = now
+        root.after_idle(self.painted, record)
+
+    def painted(self, record):
+        """Метка after_idle: виджеты действия перерисованы"""
+        record['paint'] = time.perf_counter() - record.pop('finished')
+        record['total'] = sum(record[phase] for phase in PHASES)
+        del record['started']
+        self.records.append(record)
+
+    def report(self):
+        """Сводка и гистограммы по видам действий и частям (мс)"""
+        result = {'buckets_ms': list(BUCKETS_MS), 'kinds': {}}
+        for kind in sorted({record['kind'] for record in self.records}):
+            records = [record for record in self.records if record['kind'] == kind]
+            result['kinds'][kind] = {}
+            for phase in PHASES + ('total',):
+                values = [record[phase] * 1000 for record in records]
+                result['kinds'][kind][phase] = dict(summary(values), histogram=histogram(values))
+        return result
+
+    def save(self, path):
+        """Сводка, гистограммы и все записи (мс) в файл JSON"""
+        records = [
+            {key: value if key == 'kind' else round(value * 1000, 4)
+             for key, value in record.items()}
+            for record in self.records
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.report(), records=records), f, ensure_ascii=False, indent=1)
@@ -0,0 +1,405 @@
+"""Нагрузочный генератор для игрового сервера и протокола движка
+
+Открывает N имитированных игроков; каждый играет партию за партией
+против компьютера, выбирая свои ходы логикой Легкого или Среднего ИИ
+и «думая» перед ходом заданное время. Нагрузка меняется по профилю:
+список ступеней «игроков@секунд», например 10@5,50@10,100@20.
+
+Для каждой ступени записываются гистограммы задержек, число ходов
+в секунду, сыгранные партии и ошибки:
+    ack   — от отправки хода игрока до подтверждения сервером
+            (для движка — ответ ok на position)
+    reply — от хода игрока до ответного хода компьютера
+
+    python main.py loadgen --target server --spawn --profile 10@5,50@10
+    python main.py loadgen --target engine --profile 4@10 --pace 0.2
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import ai
+from engine import GameState
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SYMBOLS = ('X', 'O')
+# Сколько ждать ответа, прежде чем считать его потерянным
+REPLY_TIMEOUT = 30
+
+
+class Histogram:
+    """Гистограмма задержек с логарифмическими корзинами (миллисекунды)"""
+
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.samples = []
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.samples.append(ms)
+
+    def percentile(self, p):
+        """Перцентиль по всем замерам (мс) или None, если замеров нет"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self):
+        """Итог для отчета и JSON"""
+        return {
+            'count': len(self.samples),
+            'p50': self.percentile(50), 'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.samples) if self.samples else None,
+            'buckets': {
+                (f"<={bound}" if bound is not None else f">{self.BOUNDS_MS[-1]}"): count
+                for bound, count in zip(self.BOUNDS_MS + (None,), self.counts)
+            },
+        }
+
+    def bars(self, width=40):
+        """Гистограмма текстом"""
+        top = max(self.counts) or 1
+        lines = []
+        lower = 0
+        for bound, count in zip(self.BOUNDS_MS + (None,), self.counts):
+            if count:
+                label = f"{lower}-{bound} мс" if bound else f">{lower} мс"
+                lines.append(f"    {label:>14} {count:7d} {'#' * max(1, count * width // top)}")
+            lower = bound
+        return '\n'.join(lines)
+
+
+class Stage:
+    """Ступень профиля и ее замеры"""
+
+    def __init__(self, clients, seconds):
+        self.clients = clients
+        self.seconds = seconds
+        self.ack = Histogram()
+        self.reply = Histogram()
+        self.moves = 0
+        self.games = 0
+        self.errors = 0
+        self.elapsed = None
+
+    def report(self):
+        """Строка отчета"""
+        def ms(value):
+            return '-' if value is None else f"{value:.1f}"
+        rate = self.moves / self.elapsed if self.elapsed else 0
+        return (f"{self.clients:5d} игроков {self.elapsed:5.1f}с: {rate:7.1f} ходов/с, "
+                f"партий {self.games}, ошибок {self.errors}; "
+                f"ack p50/p90/p99 {ms(self.ack.percentile(50))}/{ms(self.ack.percentile(90))}/"
+                f"{ms(self.ack.percentile(99))} мс; "
+                f"reply p50/p90/p99 {ms(self.reply.percentile(50))}/"
+                f"{ms(self.reply.percentile(90))}/{ms(self.reply.percentile(99))} мс")
+
+    def to_json(self):
+        return {'clients': self.clients, 'seconds': self.elapsed, 'moves': self.moves,
+                'games': self.games, 'errors': self.errors,
+                'ack': self.ack.summary(), 'reply': self.reply.summary()}
+
+
+def parse_profile(text):
+    """Профиль «игроков@секунд,...» в список пар"""
+    stages = []
+    for part in text.split(','):
+        clients, _, seconds = part.partition('@')
+        stages.append((int(clients), float(seconds or 10)))
+    return stages
+
+
+class LoadGenerator:
+    """Имитированные игроки и смена ступеней нагрузки"""
+
+    def __init__(self, target, profile, size=3, pace=0.5, client_level='Medium',
+                 server_level='Medium', node_budget=ai.DEFAULT_NODE_BUDGET,
+                 host='127.0.0.1', port=8765, seed=0):
+        self.target = target
+        self.stages = [Stage(clients, seconds) for clients, seconds in profile]
+        self.size = size
+        self.pace = pace
+        self.client_level = client_level
+        self.server_level = server_level
+        self.node_budget = node_budget
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.stage = None
+        self.wanted = 0
+        self.stopping = False
+
+    def think(self, rng):
+        """Пауза «на раздумье»: pace ± 50%"""
+        return asyncio.sleep(self.pace * rng.uniform(0.5, 1.5) if self.pace else 0)
+
+    def choose(self, state, player, rng):
+        """Ход имитированного игрока логикой Легкого или Среднего ИИ"""
+        board = state.to_board(SYMBOLS)
+        if self.client_level == 'Easy':
+            return ai.get_easy_move(board, rng)
+        return ai.get_medium_move(board, self.size, SYMBOLS[player], SYMBOLS[1 - player], rng)
+
+    async def run(self):
+        """Прогон всего профиля; возвращает ступени с замерами"""
+        tasks = {}
+        for stage in self.stages:
+            self.stage = stage
+            self.wanted = stage.clients
+            started = time.perf_counter()
+            for number in range(stage.clients):
+                if number in tasks and not tasks[number].done():
+                    continue
+                tasks[number] = asyncio.create_task(self.client(number))
+                # Новые игроки входят не все разом, а в пределах секунды
+                await asyncio.sleep(1 / stage.clients)
+            await asyncio.sleep(max(0.0, stage.seconds - (time.perf_counter() - started)))
+            stage.elapsed = time.perf_counter() - started
+        self.stopping = True
+        running = [task for task in tasks.values() if not task.done()]
+        if running:
+            await asyncio.wait(running, timeout=REPLY_TIMEOUT)
+        for task in running:
+            task.cancel()
+        return self.stages
+
+    def active(self, number):
+        """Игрок number еще нужен на текущей ступени"""
+        return not self.stopping and number < self.wanted
+
+    async def client(self, number):
+        """Имитированный игрок: партия за партией, пока он нужен"""
+        rng = random.Random(f"{self.seed}:{number}")
+        play = self.play_server if self.target == 'server' else self.play_engine
+        while self.active(number):
+            try:
+                await play(rng, number)
+            except (OSError, asyncio.TimeoutError, ValueError, EOFError):
+                self.stage.errors += 1
+                await asyncio.sleep(0.1)
+
+    async def play_server(self, rng, number):
+        """Партии с сервером по одному соединению"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while self.active(number):
+                await self.server_game(reader, writer, rng)
+        finally:
+            writer.close()
+
+    async def server_game(self, reader, writer, rng):
+        """Одна партия против компьютера на сервере"""
+        player = rng.randrange(2)
+        state = GameState(self.size, 0)
+        writer.write(json.dumps({
+            'op': 'create', 'mode': 'PvC', 'size': self.size, 'symbol': SYMBOLS[player],
+            'difficulty': self.server_level, 'node_budget': self.node_budget, 'timer': 0,
+        }).encode() + b'\n')
+        await writer.drain()
+        sent = time.perf_counter()
+
+        while True:
+            line = await asyncio.wait_for(reader.readline(), REPLY_TIMEOUT)
+            if not line:
+                raise EOFError("сервер закрыл соединение")
+            event = json.loads(line)
+            kind = event['event']
+            if kind == 'error':
+                self.stage.errors += 1
+                writer.write(b'{"op": "resign"}\n')
+                return
+            if kind == 'over':
+                self.stage.games += 1
+                return
+            if kind == 'move':
+                cell = event['row'] * self.size + event['col']
+                mover = state.to_move
+                state.play(cell)
+                if mover == player:
+                    self.stage.ack.add(time.perf_counter() - sent)
+                    self.stage.moves += 1
+                    sent = time.perf_counter()
+                    continue
+                self.stage.reply.add(time.perf_counter() - sent)
+                self.stage.moves += 1
+            elif kind != 'start':
+                continue
+            if state.to_move == player and state.winner is None and not state.is_full():
+                await self.think(rng)
+                cell = self.choose(state, player, rng)
+                writer.write(json.dumps({'op': 'move', 'row': cell // self.size,
+                                         'col': cell % self.size}).encode() + b'\n')
+                await writer.drain()
+                sent = time.perf_counter()
+
+    async def play_engine(self, rng, number):
+        """Партии с отдельным процессом протокола движка"""
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(HERE, 'main.py'), 'engine',
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        try:
+            while self.active(number):
+                await self.engine_game(process, rng)
+        finally:
+            if process.returncode is None:
+                process.stdin.write(b'quit\n')
+                await process.stdin.drain()
+                await process.wait()
+
+    async def engine_game(self, process, rng):
+        """Одна партия против движка"""
+        async def command(text, answer):
+            process.stdin.write(text.encode() + b'\n')
+            await process.stdin.drain()
+            while True:
+                line = await asyncio.wait_for(process.stdout.readline(), REPLY_TIMEOUT)
+                if not line:
+                    raise EOFError("движок завершился")
+                line = line.decode().strip()
+                if line.startswith('error'):
+                    raise ValueError(line)
+                if line.startswith(answer):
+                    return line
+
+        player = rng.randrange(2)
+        state = GameState(self.size, 0)
+        await command(f"newgame {self.size}", 'ok')
+        while state.winner is None and not state.is_full():
+            sent = time.perf_counter()
+            if state.to_move == player:
+                await self.think(rng)
+                state.play(self.choose(state, player, rng))
+                sent = time.perf_counter()
+                moves = ' '.join(f"{cell // self.size},{cell % self.size}"
+                                 for cell in state.stack)
+                await command(f"position startpos moves {moves}", 'ok')
+                self.stage.ack.add(time.perf_counter() - sent)
+                self.stage.moves += 1
+            else:
+                line = await command(f"go level {self.server_level} nodes {self.node_budget}",
+                                     'bestmove')
+                row, col = (int(value) for value in line.split()[1].split(','))
+                state.play(row * self.size + col)
+                self.stage.reply.add(time.perf_counter() - sent)
+                self.stage.moves += 1
+                moves = ' '.join(f"{cell // self.size},{cell % self.size}"
+                                 for cell in state.stack)
+                await command(f"position startpos moves {moves}", 'ok')
+        self.stage.games += 1
+
+
+def wait_for_port(host, port, timeout=10):
+    """Ждать, пока запущенный сервер начнет принимать соединения"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def free_port():
+    """Свободный порт на localhost"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def stop_server(server, timeout=10):
+    """Остановка запущенного сервера вместе с процессами его пула
+
+    Сервер останавливается по SIGTERM сам и закрывает пул; если он не
+    успел за timeout секунд, завершается вся его группа процессов.
+    """
+    server.terminate()
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    if hasattr(os, 'killpg'):
+        # Процессы пула, которые пережили сервер, остались в его группе
+        try:
+            os.killpg(server.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def main(argv=None):
+    """Запуск нагрузки из командной строки"""
+    parser = argparse.ArgumentParser(description="Нагрузочный генератор")
+    parser.add_argument('--target', choices=('server', 'engine'), default='server')
+    parser.add_argument('--profile', default='10@10',
+                        help="ступени игроков@секунд через запятую, например 10@5,50@10")
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--pace', type=float, default=0.5, help="среднее раздумье игрока, с")
+    parser.add_argument('--client-level', choices=('Easy', 'Medium'), default='Medium')
+    parser.add_argument('--level', choices=('Easy', 'Medium', 'Hard'), default='Medium',
+                        help="уровень компьютера на сервере или в движке")
+    parser.add_argument('--node-budget', type=int, default=ai.DEFAULT_NODE_BUDGET)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--spawn', action='store_true',
+                        help="запустить сервер на свободном порту на время прогона")
+    parser.add_argument('--workers', type=int, help="процессов поиска у запущенного сервера")
+    parser.add_argument('--seed', default=0)
+    parser.add_argument('--histograms', action='store_true', help="вывести гистограммы")
+    parser.add_argument('--output', help="JSON с результатами")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.target == 'server' and args.spawn:
+        args.port = free_port()
+        command = [sys.executable, os.path.join(HERE, 'main.py'), 'serve',
+                   '--host', args.host, '--port', str(args.port)]
+        if args.workers:
+            command += ['--workers', str(args.workers)]
+        # Своя группа процессов, чтобы остановить и пул сервера; вывод сервера
+        # не держит stdout и stderr вызывающего после выхода
+        server = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                  start_new_session=True)
+        if not wait_for_port(args.host, args.port):
+            stop_server(server)
+            print("Ошибка: сервер не запустился", file=sys.stderr)
+            return 1
+
+    generator = LoadGenerator(args.target, parse_profile(args.profile), args.size, args.pace,
+                              args.client_level, args.level, args.node_budget,
+                              args.host, args.port, args.seed)
+    try:
+        stages = asyncio.run(generator.run())
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    for stage in stages:
+        print(stage.report())
+        if args.histograms:
+            print("  ack:\n" + stage.ack.bars())
+            print("  reply:\n" + stage.reply.bars())
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump([stage.to_json() for stage in stages], f, ensure_ascii=False, indent=2)
+    return 1 if any(stage.errors for stage in stages) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Замеры памяти окна игры: tracemalloc, виджеты и команды Tcl, сборщик мусора
+
+Включаются по желанию и пишут по строке JSON на замер:
+
+    python main.py gui --memory memory.jsonl
+
+Замер берется при открытии каждого экрана (меню, окно игры). Виджеты,
+команды Tcl (их создает каждый command=lambda) и задания after
+считаются в интерпретаторе окна; память Python, объекты сборщика
+мусора и глубина стека — на весь процесс. Долгую сессию без человека
+гоняет soak.py.
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+# Сколько кадров стека хранить для каждого выделения памяти
+TRACE_FRAMES = 5
+# Числовые поля замера, рост которых сравнивается
+MEASURES = ('traced_kb', 'gc_objects', 'stack_depth', 'widgets', 'tcl_commands', 'after_jobs')
+
+
+def widget_count(widget):
+    """Число виджетов в дереве, считая сам widget"""
+    return 1 + sum(widget_count(child) for child in widget.winfo_children())
+
+
+def stack_depth():
+    """Число кадров стека вызовов Python"""
+    depth = 0
+    frame = sys._getframe(1)
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class MemoryProbe:
+    """Замеры памяти с базовым снимком tracemalloc для сравнения"""
+
+    def __init__(self, path=None, frames=TRACE_FRAMES):
+        self.path = path
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = None
+        self.samples = []
+
+    def sample(self, root, label):
+        """Замер после полной сборки мусора; первый замер задает базовый снимок"""
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tk = root.tk
+        sample = {
+            'label': label,
+            'number': len(self.samples),
+            'traced_kb': round(current / 1024, 1),
+            'peak_kb': round(peak / 1024, 1),
+            'gc_objects': len(gc.get_objects()),
+            'gc_collections': [stats['collections'] for stats in gc.get_stats()],
+            'stack_depth': stack_depth(),
+            'widgets': widget_count(root),
+            'tcl_commands': len(tk.splitlist(tk.call('info', 'commands'))),
+            'after_jobs': len(tk.splitlist(tk.call('after', 'info'))),
+        }
+        if self.baseline is None:
+            self.rebase()
+        self.samples.append(sample)
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+        return sample
+
+    def rebase(self):
+        """Новый базовый снимок (например, после прогрева)"""
+        self.baseline = tracemalloc.take_snapshot()
+
+    def growth(self, label, start=0):
+        """Рост каждой величины между замером start и последним замером с меткой label"""
+        samples = [sample for sample in self.samples if sample['label'] == label]
+        if len(samples) <= start:
+            return {}
+        first, last = samples[start], samples[-1]
+        return {name: round(last[name] - first[name], 1) for name in MEASURES}
+
+    def top_growth(self, limit=10):
+        """Строки кода, за которыми больше всего выросла память с базового снимка"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        stats = snapshot.compare_to(self.baseline, 'lineno')
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
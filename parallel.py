@@ -0,0 +1,201 @@
+"""Параллельный поиск Сложного ИИ с общей таблицей транспозиций
+
+Несколько процессов ищут ход в одной позиции (схема Lazy SMP) и пишут
+оценки в одну таблицу в разделяемой памяти: то, что посчитал один
+процесс, другие берут из таблицы, а не пересчитывают. Таблица —
+массив записей фиксированного размера в multiprocessing.shared_memory,
+без блокировок: в записи хранится ключ, сложенный по XOR с данными,
+поэтому наполовину перезаписанная запись при чтении просто не совпадает
+с ключом и считается промахом.
+
+Ход при нескольких процессах зависит от того, как они разделили время,
+поэтому в отличие от обычного поиска он не повторяется точно.
+
+    python bench.py shared --workers 2 --depth 3
+"""
+
+import random
+import struct
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from ai import Search, SearchSession
+from engine import new_state
+
+# Запись: ключ ^ оба слова данных, затем данные — оценка, глубина + 1
+# (0 — пустая запись), тип оценки, ход + 1 (0 — нет хода)
+DATA = struct.Struct('<dhbH3x')
+WORDS = struct.Struct('<QQQ')
+KEY = struct.Struct('<Q')
+ENTRY_BYTES = KEY.size + DATA.size
+
+DEFAULT_SLOTS = 1 << 18
+
+
+class SharedTable:
+    """Таблица транспозиций в разделяемой памяти с интерфейсом словаря сессии
+
+    get(key) и table[key] = (глубина, оценка, тип, ход), как у словаря
+    SearchSession.table. Одна запись на слот: новая оценка вытесняет
+    чужую позицию всегда, а ту же позицию — если посчитана не мельче.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, name=None):
+        if slots & (slots - 1):
+            raise ValueError("число записей должно быть степенью двойки")
+        self.slots = slots
+        self.mask = slots - 1
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=slots * ENTRY_BYTES)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.buffer = self.memory.buf
+        self.name = self.memory.name
+        self.stats = {'probes': 0, 'hits': 0, 'stores': 0, 'replaced': 0}
+
+    def slot(self, index):
+        """(ключ, глубина + 1, оценка, тип, ход + 1) целой записи слота или None"""
+        offset = index * ENTRY_BYTES
+        check, first, second = WORDS.unpack_from(self.buffer, offset)
+        key = check ^ first ^ second
+        # Запись, перезаписанная наполовину, почти всегда дает ключ чужого слота
+        if key & self.mask != index:
+            return None
+        # Поля — из тех же проверенных слов: повторное чтение памяти могло
+        # застать уже другую запись
+        score, depth, flag, move = DATA.unpack(WORDS.pack(0, first, second)[KEY.size:])
+        if depth == 0:
+            return None
+        return key, depth, score, flag, move
+
+    def get(self, key, default=None):
+        """Оценка позиции (глубина, оценка, тип, ход) или default"""
+        self.stats['probes'] += 1
+        entry = self.slot(key & self.mask)
+        if entry is None or entry[0] != key:
+            return default
+        self.stats['hits'] += 1
+        _, depth, score, flag, move = entry
+        return depth - 1, score, flag, move - 1 if move else None
+
+    def __setitem__(self, key, value):
+        depth, score, flag, move = value
+        index = key & self.mask
+        entry = self.slot(index)
+        if entry is not None:
+            if entry[0] == key:
+                if entry[1] > depth + 1:
+                    return
+            else:
+                self.stats['replaced'] += 1
+        data = DATA.pack(score, depth + 1, flag, 0 if move is None else move + 1)
+        first, second = WORDS.unpack(bytes(KEY.size) + data)[1:]
+        offset = index * ENTRY_BYTES
+        KEY.pack_into(self.buffer, offset, key ^ first ^ second)
+        self.buffer[offset + KEY.size:offset + ENTRY_BYTES] = data
+        self.stats['stores'] += 1
+
+    def clear(self):
+        """Забыть все оценки"""
+        self.buffer[:] = bytes(len(self.buffer))
+
+    def used(self):
+        """Число занятых записей (полный просмотр таблицы)"""
+        return sum(1 for index in range(self.slots) if self.slot(index) is not None)
+
+    def nbytes(self):
+        """Размер таблицы в байтах"""
+        return self.slots * ENTRY_BYTES
+
+    def close(self):
+        """Отключиться от памяти; владелец еще и освобождает ее"""
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+_table = None
+
+
+def attach(name, slots):
+    """Инициализатор процесса пула: подключение к общей таблице"""
+    global _table
+    _table = SharedTable(slots, name=name)
+
+
+def search_worker(stones, size, win_length, node_budget, time_limit, max_depth, helper,
+                  shared=True, measure=False):
+    """Поиск в процессе пула; stones — (клетка, игрок), компьютер — игрок 0.
+
+    Помощники (helper > 0) начинают с разной случайной историей отсечений,
+    поэтому перебирают ходы в другом порядке и заполняют таблицу
+    позициями, до которых главный процесс дошел бы позже. Без shared
+    у процесса своя таблица-словарь (для сравнения). Возвращает ход,
+    глубину, оценку, узлы и, при measure, память своей таблицы.
+    """
+    state = new_state(size, 0, win_length)
+    for cell, player in stones:
+        state.play(cell, player)
+    state.to_move = 0
+
+    session = SearchSession(size)
+    if shared:
+        session.table = _table
+        before = dict(_table.stats)
+    if helper:
+        rng = random.Random(helper)
+        session.history = {cell: rng.randrange(64, 256) for cell in state.candidate_cells()}
+    if measure and not shared:
+        tracemalloc.start()
+    search = Search(size, node_budget, time_limit, session=session, max_depth=max_depth)
+    move = search.best_move(state)
+    result = {'move': move, 'depth': search.depth, 'score': search.score,
+              'nodes': search.nodes, 'helper': helper}
+    if measure and not shared:
+        result['memory'] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    if shared:
+        result['table'] = {name: value - before[name] for name, value in _table.stats.items()}
+    return result
+
+
+class ParallelSearch:
+    """Пул процессов поиска с общей таблицей; живет одну партию (или дольше)
+
+    best_move раздает позицию всем процессам с одинаковым бюджетом и берет
+    ход того, кто успел просчитать глубже (при равенстве — главного).
+    Таблица переживает ход, как таблица SearchSession.
+    """
+
+    def __init__(self, workers=2, slots=DEFAULT_SLOTS):
+        self.workers = workers
+        self.table = SharedTable(slots)
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                                            initargs=(self.table.name, slots))
+
+    def best_move(self, state, node_budget, time_limit=None, max_depth=None, stats=None):
+        """Ход для состояния, где компьютер — игрок 0 и сейчас его ход"""
+        stones = [(cell, state.cells[cell]) for cell in state.stack]
+        started = time.perf_counter()
+        futures = [
+            self.executor.submit(search_worker, stones, state.size, state.line_length,
+                                 node_budget, time_limit, max_depth, helper)
+            for helper in range(self.workers)
+        ]
+        results = [future.result() for future in futures]
+        best = max(results, key=lambda result: (result['depth'], -result['helper']))
+        if stats is not None:
+            stats.update(source='parallel', workers=self.workers, depth=best['depth'],
+                         nodes=sum(result['nodes'] for result in results),
+                         tt_hits=sum(result['table']['hits'] for result in results),
+                         seconds=round(time.perf_counter() - started, 4))
+        return best['move']
+
+    def close(self):
+        """Остановка процессов и освобождение общей памяти"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.table.close()
@@ -0,0 +1,274 @@
+"""Решатель поиском по числам доказательства (proof-number search)
+
+Доказывает точный результат позиции (победа, ничья, поражение ходящего)
+в пределах лимита узлов и памяти. Результат для трех исходов получается
+двумя доказательствами: «ходящий выигрывает» и «ходящий не проигрывает».
+Для хода Сложного ИИ работа решателя ограничивается еще бюджетом
+созданных узлов, сроком и событием остановки.
+
+Запуск без интерфейса:
+    python pns.py --size 4 --max-nodes 2000000
+    python pns.py --size 3 --moves 1,1 0,0
+"""
+
+import argparse
+import sys
+import time
+
+from engine import line_masks, has_line, zobrist_keys, zobrist_hash
+
+INF = 10 ** 9
+
+# Грубая оценка памяти на один узел дерева (объект со слотами и список детей)
+NODE_BYTES = 200
+
+WIN = 'win'
+DRAW = 'draw'
+LOSS = 'loss'
+UNKNOWN = 'unknown'
+
+
+class Node:
+    """Узел дерева доказательства"""
+
+    __slots__ = ('first', 'second', 'hash', 'empty', 'pn', 'dn',
+                 'parent', 'children', 'move', 'is_or')
+
+    def __init__(self, first, second, hash_value, empty, parent, move, is_or):
+        self.first = first
+        self.second = second
+        self.hash = hash_value
+        self.empty = empty
+        self.parent = parent
+        self.move = move
+        self.is_or = is_or
+        self.children = None
+        self.pn = 1
+        self.dn = 1
+
+
+class ProofNumberSearch:
+    """Поиск по числам доказательства с таблицей решенных позиций"""
+
+    def __init__(self, size, max_nodes=1_000_000, memory_mb=None, progress=None,
+                 win_length=None, node_budget=None, time_limit=None, stop_event=None):
+        self.size = size
+        self.cells = size * size
+        self.masks = line_masks(size, win_length)
+        self.keys = zobrist_keys(size)
+        self.max_nodes = max_nodes
+        if memory_mb is not None:
+            self.max_nodes = min(max_nodes, memory_mb * 2 ** 20 // NODE_BYTES)
+        self.progress = progress
+        # (хеш, цель, атакующий) -> True/False, общий для обоих доказательств
+        self.solved = {}
+        self.attacker_sign = 1
+        self.nodes = 0
+        self.expanded = 0
+        # Узлов создано за все доказательства; max_nodes — предел живых узлов дерева
+        self.generated = 0
+        self.node_budget = node_budget
+        self.deadline = time.perf_counter() + time_limit if time_limit else None
+        self.stop_event = stop_event
+
+    def out_of_budget(self):
+        """Бюджет узлов исчерпан, срок вышел или поиск остановлен снаружи"""
+        if self.node_budget is not None and self.generated >= self.node_budget:
+            return True
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def outcome(self, first, second, empty):
+        """Итог завершенной партии для первого игрока: 1, 0, -1 или None"""
+        if has_line(first, self.masks):
+            return 1
+        if has_line(second, self.masks):
+            return -1
+        if empty == 0:
+            return 0
+        return None
+
+    def evaluate(self, node, target):
+        """Начальные числа узла: терминал, решенная позиция или лист"""
+        result = self.outcome(node.first, node.second, node.empty)
+        if result is not None:
+            proven = result * self.attacker_sign >= target
+        else:
+            proven = self.solved.get((node.hash, target, self.attacker_sign))
+        if proven is True:
+            node.pn, node.dn = 0, INF
+        elif proven is False:
+            node.pn, node.dn = INF, 0
+        elif node.is_or:
+            node.pn, node.dn = 1, node.empty
+        else:
+            node.pn, node.dn = node.empty, 1
+
+    def expand(self, node, target):
+        """Создание детей узла"""
+        first_to_move = (self.cells - node.empty) % 2 == 0
+        occupied = node.first | node.second
+        node.children = []
+        for cell in range(self.cells):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            if first_to_move:
+                child = Node(node.first | bit, node.second,
+                             node.hash ^ self.keys[cell][0], node.empty - 1,
+                             node, cell, not node.is_or)
+            else:
+                child = Node(node.first, node.second | bit,
+                             node.hash ^ self.keys[cell][1], node.empty - 1,
+                             node, cell, not node.is_or)
+            self.evaluate(child, target)
+            node.children.append(child)
+        self.nodes += len(node.children)
+        self.generated += len(node.children)
+        self.expanded += 1
+
+    @staticmethod
+    def set_numbers(node):
+        """Пересчет чисел узла по детям"""
+        if node.is_or:
+            node.pn = min(child.pn for child in node.children)
+            node.dn = min(sum(child.dn for child in node.children), INF)
+        else:
+            node.pn = min(sum(child.pn for child in node.children), INF)
+            node.dn = min(child.dn for child in node.children)
+
+    def prove(self, first, second, target):
+        """Доказательство того, что атакующий получает итог не хуже target.
+
+        Атакующий — тот, кто ходит в корне. target = 1 означает победу,
+        target = 0 — хотя бы ничью. Возвращает (True/False/None, корень).
+        """
+        empty = self.cells - bin(first | second).count('1')
+        first_to_move = (self.cells - empty) % 2 == 0
+        self.attacker_sign = 1 if first_to_move else -1
+
+        root = Node(first, second, zobrist_hash(first, second, self.keys),
+                    empty, None, None, True)
+        self.evaluate(root, target)
+        self.nodes = 1
+        self.generated += 1
+        started = time.perf_counter()
+
+        while root.pn != 0 and root.dn != 0:
+            if self.nodes >= self.max_nodes or self.out_of_budget():
+                return None, root
+
+            node = root
+            while node.children is not None:
+                if node.is_or:
+                    node = min(node.children, key=lambda child: child.pn)
+                else:
+                    node = min(node.children, key=lambda child: child.dn)
+
+            self.expand(node, target)
+
+            while node is not None:
+                old = (node.pn, node.dn)
+                self.set_numbers(node)
+                if node.pn == 0 or node.dn == 0:
+                    self.solved[(node.hash, target, self.attacker_sign)] = node.pn == 0
+                    if node is not root:
+                        # Решенное поддерево больше не нужно
+                        self.nodes -= len(node.children)
+                        node.children = []
+                if (node.pn, node.dn) == old and node is not root:
+                    break
+                node = node.parent
+
+            if self.progress and self.expanded % 10000 == 0:
+                self.progress(target, root.pn, root.dn, self.nodes,
+                              time.perf_counter() - started)
+
+        return root.pn == 0, root
+
+    def solve(self, first, second):
+        """Точный итог для ходящего и доказывающий ход (или UNKNOWN)"""
+        proven, root = self.prove(first, second, 1)
+        if proven:
+            return WIN, self.proving_move(root)
+        if proven is None:
+            return UNKNOWN, None
+
+        proven, root = self.prove(first, second, 0)
+        if proven:
+            return DRAW, self.proving_move(root)
+        if proven is None:
+            return UNKNOWN, None
+        return LOSS, None
+
+    @staticmethod
+    def proving_move(root):
+        """Ход из корня, на котором держится доказательство"""
+        for child in root.children or []:
+            if child.pn == 0:
+                return child.move
+        return None
+
+
+def solve_move(board_masks, size, max_nodes, win_length=None, time_limit=None,
+               stop_event=None, stats=None):
+    """Ход с доказанным итогом (победа или ничья) или None, если лимита не хватило
+
+    max_nodes — бюджет созданных узлов (он же предел дерева); в stats['nodes']
+    записывается, сколько узлов создано.
+    """
+    first, second = board_masks
+    solver = ProofNumberSearch(size, max_nodes=max_nodes, win_length=win_length,
+                               node_budget=max_nodes, time_limit=time_limit,
+                               stop_event=stop_event)
+    result, move = solver.solve(first, second)
+    if stats is not None:
+        stats['nodes'] = solver.generated
+    if result in (WIN, DRAW):
+        return result, move
+    return result, None
+
+
+def main(argv=None):
+    """Решение позиции из командной строки"""
+    parser = argparse.ArgumentParser(description="Точный итог позиции поиском PNS")
+    parser.add_argument('--size', type=int, default=3, help="размер поля")
+    parser.add_argument('--moves', nargs='*', default=[],
+                        help="сделанные ходы в виде строка,столбец (первый игрок начинает)")
+    parser.add_argument('--max-nodes', type=int, default=1_000_000, help="лимит узлов")
+    parser.add_argument('--memory-mb', type=int, help="лимит памяти дерева, МБ")
+    parser.add_argument('--win-length', type=int, help="длина выигрышной линии (по умолчанию сторона поля)")
+    args = parser.parse_args(argv)
+
+    first = second = 0
+    for number, move in enumerate(args.moves):
+        row, col = (int(value) for value in move.split(','))
+        bit = 1 << (row * args.size + col)
+        if number % 2 == 0:
+            first |= bit
+        else:
+            second |= bit
+
+    def report(target, pn, dn, nodes, seconds):
+        goal = "победа" if target == 1 else "не поражение"
+        print(f"[{goal}] pn={pn} dn={dn} узлов={nodes} {seconds:.1f}с", flush=True)
+
+    solver = ProofNumberSearch(args.size, args.max_nodes, args.memory_mb, progress=report,
+                               win_length=args.win_length)
+    started = time.perf_counter()
+    result, move = solver.solve(first, second)
+    seconds = time.perf_counter() - started
+
+    names = {WIN: "победа ходящего", DRAW: "ничья", LOSS: "поражение ходящего",
+             UNKNOWN: "не доказано в пределах лимита"}
+    print(f"Итог: {names[result]}")
+    if move is not None:
+        print(f"Ход: {move // args.size},{move % args.size}")
+    print(f"Раскрыто узлов: {solver.expanded}, решенных позиций: {len(solver.solved)}, "
+          f"{seconds:.1f}с")
+    return 0 if result != UNKNOWN else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
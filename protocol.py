@@ -0,0 +1,285 @@
+"""Текстовый протокол движка через stdin/stdout (по образцу UCI)
+
+Процесс живет долго и держит кеши теплыми: сессия поиска переходит от
+хода к ходу, ключи Zobrist и таблица эндшпиля загружаются один раз.
+Одна команда — одна строка, клетки — «строка,столбец» с нуля.
+
+    isready                                  -> readyok
+    newgame <размер> [<первый> <второй>] [line K]
+                                             -> ok            (символы X O — по одному знаку,
+                                                               линия K по умолчанию во всю сторону)
+    position startpos [moves r,c ...]        -> ok
+    position board <поле> [moves r,c ...]    -> ok            (поле "X.O/.X./...")
+    go [nodes N] [movetime МС] [infinite] [level Easy|Medium|Hard] [seed S] [workers W]
+                                             -> info ... и bestmove r,c
+    stop                                     -> прерывает go, bestmove выводится сразу
+    stats                                    -> stats {json}
+    quit
+
+Ошибки выводятся строкой "error <текст>". go считается в отдельном
+потоке, поэтому во время поиска можно прислать stop, stats или isready.
+Сбой внутри поиска выводится строкой "info string error <текст>", после
+нее все равно идет bestmove — первая пустая клетка.
+При workers больше 1 Сложный ИИ ищет в W процессах с общей таблицей
+транспозиций (parallel.py); процессы и таблица живут до конца работы
+движка, stop в этом режиме ждет конца поиска.
+
+    python main.py engine
+"""
+
+import json
+import sys
+import threading
+import time
+
+import ai
+from engine import MAX_SIZE, new_state
+
+LEVELS = ('Easy', 'Medium', 'Hard')
+
+
+class ProtocolError(Exception):
+    """Неверная команда"""
+
+
+def parse_cell(text, size):
+    """Клетка из «строка,столбец»"""
+    try:
+        row, col = (int(value) for value in text.split(','))
+    except ValueError:
+        raise ProtocolError(f"клетка {text!r}: нужно строка,столбец")
+    if not (0 <= row < size and 0 <= col < size):
+        raise ProtocolError(f"клетка {text!r} вне поля {size}x{size}")
+    return row * size + col
+
+
+class Engine:
+    """Движок протокола: одна партия, сессии поиска сторон, один поток go"""
+
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()
+        self.search_thread = None
+        self.stop_event = threading.Event()
+        self.pool = None
+        self.stats = {'commands': 0, 'searches': 0, 'search_seconds': 0.0,
+                      'nodes': 0, 'last': None}
+        self.new_game(3, ('X', 'O'))
+
+    def send(self, line):
+        """Строка ответа (из любого потока)"""
+        with self.output_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def new_game(self, size, symbols, win_length=None):
+        """Пустое поле и чистая сессия"""
+        self.size = size
+        self.symbols = symbols
+        self.win_length = win_length
+        self.state = new_state(size, 0, win_length)
+        if self.pool is not None:
+            self.pool.table.clear()
+        # Сессия на каждую сторону: движок может играть и за обоих игроков
+        self.sessions = (ai.SearchSession(size), ai.SearchSession(size))
+
+    def handle(self, line):
+        """Выполнение одной команды; False — пора завершаться"""
+        words = line.split()
+        if not words:
+            return True
+        self.stats['commands'] += 1
+        command, args = words[0], words[1:]
+        try:
+            if command == 'quit':
+                self.stop()
+                return False
+            handler = getattr(self, 'cmd_' + command, None)
+            if handler is None:
+                raise ProtocolError(f"неизвестная команда {command!r}")
+            handler(args)
+        except ProtocolError as e:
+            self.send(f"error {e}")
+        return True
+
+    def cmd_isready(self, args):
+        self.send('readyok')
+
+    def cmd_newgame(self, args):
+        self.stop()
+        win_length = None
+        if len(args) >= 2 and args[-2] == 'line':
+            try:
+                win_length = int(args[-1])
+            except ValueError:
+                raise ProtocolError(f"длина линии {args[-1]!r} не число")
+            args = args[:-2]
+        if len(args) not in (1, 3):
+            raise ProtocolError("newgame <размер> [<первый> <второй>] [line K]")
+        try:
+            size = int(args[0])
+        except ValueError:
+            raise ProtocolError(f"размер {args[0]!r} не число")
+        if not 3 <= size <= MAX_SIZE:
+            raise ProtocolError(f"размер поля от 3 до {MAX_SIZE}")
+        if win_length is not None and not 3 <= win_length <= size:
+            raise ProtocolError(f"длина линии от 3 до {size}")
+        symbols = tuple(args[1:]) if args[1:] else ('X', 'O')
+        # В position board клетка — один знак, поэтому и символ — один знак
+        if any(len(symbol) != 1 or symbol in './-' for symbol in symbols):
+            raise ProtocolError("символ игрока — один знак, кроме . - /")
+        if symbols[0] == symbols[1]:
+            raise ProtocolError("символы игроков должны различаться")
+        self.new_game(size, symbols, win_length)
+        self.send('ok')
+
+    def cmd_position(self, args):
+        self.stop()
+        if not args or args[0] not in ('startpos', 'board'):
+            raise ProtocolError("position startpos|board <поле> [moves ...]")
+        state = new_state(self.size, 0, self.win_length)
+        rest = args[1:]
+        if args[0] == 'board':
+            if not rest:
+                raise ProtocolError("нет поля")
+            cells = [char for char in rest[0] if char != '/']
+            if len(cells) != self.size * self.size:
+                raise ProtocolError(f"в поле {len(cells)} клеток, нужно {self.size ** 2}")
+            for cell, char in enumerate(cells):
+                if char in self.symbols:
+                    state.play(cell, self.symbols.index(char))
+                elif char not in '.-':
+                    raise ProtocolError(f"неизвестный символ {char!r}")
+            first = sum(1 for cell in state.stack if state.cells[cell] == 0)
+            second = state.filled - first
+            if first - second not in (0, 1):
+                raise ProtocolError("число ходов игроков не сходится")
+            state.to_move = 0 if first == second else 1
+            rest = rest[1:]
+        if rest:
+            if rest[0] != 'moves':
+                raise ProtocolError(f"ожидалось moves, получено {rest[0]!r}")
+            for text in rest[1:]:
+                cell = parse_cell(text, self.size)
+                if state.cells[cell] != -1 or state.winner is not None:
+                    raise ProtocolError(f"ход {text} невозможен")
+                state.play(cell)
+        self.state = state
+        self.send('ok')
+
+    def cmd_go(self, args):
+        if self.search_thread is not None and self.search_thread.is_alive():
+            raise ProtocolError("поиск уже идет")
+        options = {'nodes': ai.DEFAULT_NODE_BUDGET, 'movetime': None,
+                   'level': 'Hard', 'seed': '0', 'workers': '1'}
+        words = iter(args)
+        for word in words:
+            if word == 'infinite':
+                options['nodes'] = float('inf')
+            elif word in options:
+                value = next(words, None)
+                if value is None:
+                    raise ProtocolError(f"нет значения для {word}")
+                options[word] = value
+            else:
+                raise ProtocolError(f"неизвестный параметр go {word!r}")
+        try:
+            node_budget = float(options['nodes'])
+            time_limit = float(options['movetime']) / 1000 if options['movetime'] else None
+            workers = int(options['workers'])
+        except ValueError:
+            raise ProtocolError("nodes, movetime и workers должны быть числами")
+        if workers < 1:
+            raise ProtocolError("workers от 1")
+        if options['level'] not in LEVELS:
+            raise ProtocolError(f"уровень {options['level']!r}: Easy, Medium или Hard")
+        if self.state.winner is not None or self.state.is_full():
+            raise ProtocolError("партия окончена")
+
+        pool = self.parallel_pool(workers) if options['level'] == 'Hard' else None
+        self.stop_event = threading.Event()
+        self.search_thread = threading.Thread(
+            target=self.search,
+            args=(self.state.to_board(self.symbols), self.state.to_move, len(self.state.stack),
+                  options['level'], options['seed'], node_budget, time_limit, self.stop_event,
+                  pool),
+            daemon=True
+        )
+        self.search_thread.start()
+
+    def parallel_pool(self, workers):
+        """Пул процессов с общей таблицей на workers процессов (или None для одного)"""
+        if workers == 1:
+            return None
+        if self.pool is None or self.pool.workers != workers:
+            self.close_pool()
+            from parallel import ParallelSearch
+            self.pool = ParallelSearch(workers)
+        return self.pool
+
+    def close_pool(self):
+        """Остановка процессов поиска"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def search(self, board, side, move_number, level, seed, node_budget, time_limit,
+               stop_event, pool=None):
+        """Поиск хода в отдельном потоке; результат — строки info и bestmove"""
+        started = time.perf_counter()
+        stats = {}
+        ai_symbol, human_symbol = self.symbols[side], self.symbols[1 - side]
+        rng = ai.move_rng(seed, move_number)
+        try:
+            if level == 'Hard':
+                cell = ai.get_hard_move(board, self.size, ai_symbol, human_symbol,
+                                        self.symbols[0], rng, node_budget, time_limit, stats,
+                                        stop_event=stop_event, session=self.sessions[side],
+                                        win_length=self.win_length, pool=pool)
+            else:
+                cell = ai.choose_move(board, self.size, level, ai_symbol, human_symbol,
+                                      self.symbols[0], rng, win_length=self.win_length)
+        except Exception as e:
+            # Управляющая программа ждет bestmove: без него она зависнет
+            self.send(f"info string error {type(e).__name__}: {e}")
+            cell = ai.empty_cells(board)[0]
+        seconds = time.perf_counter() - started
+
+        self.stats['searches'] += 1
+        self.stats['search_seconds'] += seconds
+        self.stats['nodes'] += stats.get('nodes', 0)
+        self.stats['last'] = dict(stats, seconds=round(seconds, 6))
+        info = [f"{key} {value}" for key, value in stats.items()]
+        info.append(f"time {seconds * 1000:.1f}")
+        self.send('info ' + ' '.join(info))
+        self.send(f"bestmove {cell // self.size},{cell % self.size}")
+
+    def cmd_stop(self, args):
+        self.stop()
+
+    def cmd_stats(self, args):
+        report = dict(self.stats, table_entries=sum(len(session.table) for session in self.sessions),
+                      size=self.size, moves=len(self.state.stack))
+        self.send('stats ' + json.dumps(report, ensure_ascii=False))
+
+    def stop(self):
+        """Прервать идущий поиск и дождаться его bestmove"""
+        self.stop_event.set()
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+
+def main(argv=None):
+    """Цикл чтения команд из stdin"""
+    engine = Engine()
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.stop()
+    engine.close_pool()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
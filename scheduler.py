@@ -0,0 +1,226 @@
+"""Планировщик ходов компьютера для многих партий сразу
+
+Запросы хода ставятся в очередь своей партии; в пул процессов уходит не
+больше slots тяжелых поисков (Сложный ИИ) и light_slots легких ходов
+(Легкий и Средний ИИ) одновременно и не больше одного запроса на партию.
+Легкие ходы идут своей полосой, поэтому долгий поиск на большом поле не
+задерживает ход на поле 3x3.
+
+Следующим запускается запрос с самым ранним сроком: срок — момент
+подачи плюс оставшиеся часы партии (timer_seconds), для партий без
+таймера — плюс NO_CLOCK_SECONDS. Срок назначается при подаче, поэтому
+долго ждущий запрос рано или поздно становится первым и никто не
+голодает. Тяжелому поиску бюджет узлов урезается до budget_cap, поэтому
+место в пуле освобождается за предсказуемое время. Время поиска
+ограничивается (time_slice и доля CLOCK_SHARE оставшихся часов), только
+если задан time_slice: ход по одному бюджету узлов воспроизводим
+по зерну партии, а ход с пределом времени зависит от загрузки машины.
+
+Планировщик потокобезопасен и не зависит от asyncio: submit возвращает
+concurrent.futures.Future, который сервер ждет через asyncio.wrap_future.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# Партии без таймера ждут так, будто у них столько секунд на ход
+NO_CLOCK_SECONDS = 60
+# Доля оставшихся часов, которую может занять поиск
+CLOCK_SHARE = 0.5
+MIN_TIME_LIMIT = 0.05
+# Сколько последних ожиданий хранится для перцентилей
+WAIT_SAMPLES = 1000
+
+
+class Job:
+    """Запрос хода в очереди"""
+
+    __slots__ = ('game', 'fn', 'args', 'light', 'deadline', 'submitted', 'sequence',
+                 'node_budget', 'time_limit', 'future')
+
+    def __init__(self, game, fn, args, light, deadline, submitted, sequence,
+                 node_budget, time_limit):
+        self.game = game
+        self.fn = fn
+        self.args = args
+        self.light = light
+        self.deadline = deadline
+        self.submitted = submitted
+        self.sequence = sequence
+        self.node_budget = node_budget
+        self.time_limit = time_limit
+        self.future = Future()
+
+
+def percentile(values, share):
+    """Перцентиль отсортированного списка (0 для пустого)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+class AIScheduler:
+    """Очереди партий перед пулом процессов с ограничением одновременных поисков"""
+
+    def __init__(self, executor, slots=1, light_slots=1, budget_cap=None, time_slice=None,
+                 clock=time.monotonic):
+        self.executor = executor
+        self.limits = {False: slots, True: light_slots}
+        self.budget_cap = budget_cap
+        self.time_slice = time_slice
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.busy = set()
+        self.running = {False: 0, True: 0}
+        self.sequence = itertools.count()
+        self.waits = {False: deque(maxlen=WAIT_SAMPLES), True: deque(maxlen=WAIT_SAMPLES)}
+        self.counters = {'submitted': 0, 'started': 0, 'completed': 0, 'cancelled': 0,
+                         'failed': 0, 'capped': 0, 'late_starts': 0, 'max_queued': 0}
+
+    def submit(self, game, fn, args=(), clock_seconds=None, light=False,
+               node_budget=None, time_limit=None):
+        """Запрос хода партии game: fn(*args[, node_budget=..., time_limit=...])
+
+        clock_seconds — оставшиеся часы партии, None — без таймера.
+        Бюджет и лимит времени передаются только тяжелым запросам.
+        """
+        now = self.clock()
+        job = Job(game, fn, args, light, now + (clock_seconds or NO_CLOCK_SECONDS), now,
+                  next(self.sequence), node_budget, time_limit)
+        with self.lock:
+            self.queues.setdefault(game, deque()).append(job)
+            self.counters['submitted'] += 1
+            queued = self.queued()
+            self.counters['max_queued'] = max(self.counters['max_queued'], queued)
+            started = self.dispatch()
+        self.start(started)
+        return job.future
+
+    def cancel(self, game):
+        """Снять ждущие запросы партии; идущий поиск досчитается, но его ход не нужен"""
+        with self.lock:
+            jobs = self.queues.pop(game, ())
+            self.counters['cancelled'] += len(jobs)
+        for job in jobs:
+            job.future.cancel()
+        return len(jobs)
+
+    def queued(self):
+        """Число запросов в очередях (под self.lock)"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    def dispatch(self):
+        """Запросы, которым можно занять место в пуле (под self.lock)"""
+        started = []
+        for light in (True, False):
+            while self.running[light] < self.limits[light]:
+                best = None
+                for game, queue in self.queues.items():
+                    if game in self.busy or queue[0].light != light:
+                        continue
+                    job = queue[0]
+                    if best is None or (job.deadline, job.sequence) < (best.deadline, best.sequence):
+                        best = job
+                if best is None:
+                    break
+                queue = self.queues[best.game]
+                queue.popleft()
+                if not queue:
+                    del self.queues[best.game]
+                self.busy.add(best.game)
+                self.running[light] += 1
+                started.append(best)
+        return started
+
+    def start(self, jobs):
+        """Отправка выбранных запросов в пул (вне блокировки)"""
+        for job in jobs:
+            now = self.clock()
+            if not job.future.set_running_or_notify_cancel():
+                # Запрос отменил тот, кто его подал
+                self.release(job, 'cancelled')
+                continue
+            kwargs = {}
+            if not job.light:
+                kwargs = self.limits_for(job, now)
+            with self.lock:
+                self.waits[job.light].append(now - job.submitted)
+                self.counters['started'] += 1
+                self.counters['late_starts'] += now > job.deadline
+            try:
+                inner = self.executor.submit(job.fn, *job.args, **kwargs)
+            except Exception as e:
+                job.future.set_exception(e)
+                self.release(job, 'failed')
+                continue
+            inner.add_done_callback(lambda inner, job=job: self.finished(job, inner))
+
+    def limits_for(self, job, now):
+        """Бюджет и лимит времени тяжелого поиска с учетом ограничений планировщика"""
+        node_budget, time_limit = job.node_budget, job.time_limit
+        capped = False
+        if self.budget_cap is not None and (node_budget is None or node_budget > self.budget_cap):
+            node_budget, capped = self.budget_cap, True
+        if self.time_slice is not None:
+            if time_limit is None or time_limit > self.time_slice:
+                time_limit, capped = self.time_slice, True
+            clock_limit = max(MIN_TIME_LIMIT, (job.deadline - now) * CLOCK_SHARE)
+            time_limit = min(time_limit, clock_limit)
+        if capped:
+            with self.lock:
+                self.counters['capped'] += 1
+        kwargs = {}
+        if time_limit is not None:
+            kwargs['time_limit'] = time_limit
+        if node_budget is not None:
+            kwargs['node_budget'] = node_budget
+        return kwargs
+
+    def finished(self, job, inner):
+        """Поиск в пуле закончился: результат запросу и место следующему"""
+        if inner.cancelled():
+            # Пул остановлен
+            job.future.set_exception(RuntimeError("пул процессов остановлен"))
+            outcome = 'failed'
+        elif inner.exception() is not None:
+            job.future.set_exception(inner.exception())
+            outcome = 'failed'
+        else:
+            job.future.set_result(inner.result())
+            outcome = 'completed'
+        self.release(job, outcome)
+
+    def release(self, job, outcome):
+        """Освобождение места в пуле и запуск следующих запросов"""
+        with self.lock:
+            self.busy.discard(job.game)
+            self.running[job.light] -= 1
+            self.counters[outcome] += 1
+            started = self.dispatch()
+        self.start(started)
+
+    def metrics(self):
+        """Глубина очередей, занятость пула и ожидание в мс (p50, p95, максимум)"""
+        with self.lock:
+            queued = {False: 0, True: 0}
+            for queue in self.queues.values():
+                for job in queue:
+                    queued[job.light] += 1
+            report = dict(self.counters, games_waiting=len(self.queues))
+            waits = {light: sorted(values) for light, values in self.waits.items()}
+            running = dict(self.running)
+        for light, name in ((False, 'heavy'), (True, 'light')):
+            values = waits[light]
+            report[name] = {
+                'queued': queued[light],
+                'running': running[light],
+                'slots': self.limits[light],
+                'wait_ms_p50': round(percentile(values, 0.5) * 1000, 1),
+                'wait_ms_p95': round(percentile(values, 0.95) * 1000, 1),
+                'wait_ms_max': round(values[-1] * 1000, 1) if values else 0.0,
+            }
+        return report
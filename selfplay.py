@@ -0,0 +1,59 @@
+"""Партии компьютера против компьютера без интерфейса"""
+
+import time
+
+from ai import DEFAULT_NODE_BUDGET, SearchSession, choose_move, move_rng
+from engine import new_state
+
+SYMBOLS = ('X', 'O')
+
+
+def play_game(size, difficulties, seed, node_budget=DEFAULT_NODE_BUDGET,
+              symbols=SYMBOLS, opening=(), win_length=None):
+    """Одна партия: difficulties — уровни сложности первого и второго игрока.
+
+    node_budget — общий бюджет узлов или пара бюджетов по сторонам.
+    opening — клетки, которые ставятся до начала игры по очереди с первого
+    игрока. win_length — длина выигрышной линии. Каждая сторона ведет
+    свою сессию поиска. Возвращает словарь с победителем (индекс игрока
+    или None), ходами и временем каждой стороны.
+    """
+    budgets = node_budget if isinstance(node_budget, tuple) else (node_budget, node_budget)
+    state = new_state(size, 0, win_length)
+    sessions = (SearchSession(size), SearchSession(size))
+    seconds = [0.0, 0.0]
+    for cell in opening:
+        state.play(cell)
+
+    while state.winner is None and not state.is_full():
+        side = state.to_move
+        board = state.to_board(symbols)
+        started = time.perf_counter()
+        cell = choose_move(
+            board, size, difficulties[side], symbols[side], symbols[1 - side], symbols[0],
+            move_rng(seed, len(state.stack)), budgets[side], session=sessions[side],
+            win_length=win_length
+        )
+        seconds[side] += time.perf_counter() - started
+        state.play(cell)
+
+    return {'winner': state.winner, 'moves': list(state.stack), 'seconds': seconds}
+
+
+def play_match(size, difficulties, games, seed, node_budget=DEFAULT_NODE_BUDGET,
+               win_length=None):
+    """Серия партий со сменой сторон: счет (победы первого уровня, ничьи, победы второго)"""
+    score = [0, 0, 0]
+    for number in range(games):
+        # В нечетных партиях первый уровень играет вторым
+        swap = number % 2
+        pair = (difficulties[1], difficulties[0]) if swap else difficulties
+        result = play_game(size, pair, f"{seed}:{number}", node_budget,
+                           win_length=win_length)
+        if result['winner'] is None:
+            score[1] += 1
+        elif result['winner'] == swap:
+            score[0] += 1
+        else:
+            score[2] += 1
+    return score
@@ -0,0 +1,446 @@
+"""Сетевой игровой сервер: много партий PvP и PvC в одном процессе
+
+Протокол — JSON по строке в каждую сторону поверх TCP. Клиент шлет
+команды с полем "op", сервер отвечает событиями с полем "event":
+
+    {"op": "create", "mode": "PvC", "size": 3, "difficulty": "Hard",
+     "symbol": "X", "timer": 30}                 -> created, start
+    {"op": "create", "mode": "PvP", "size": 3}   -> created (ждет соперника)
+    {"op": "create", "size": 10, "win_length": 5} -> линия из 5 (0 — во всю сторону)
+    {"op": "join"} или {"op": "join", "game": 5} -> start обоим игрокам
+    {"op": "move", "row": 1, "col": 1}           -> move всем игрокам партии
+    {"op": "resign"}, {"op": "ping"}, {"op": "stats"}
+
+Конец партии — событие over с победителем (символ или null) и причиной:
+line, draw, timeout, resign, disconnect. Ошибки — событие error.
+
+Правила — состояние партии из engine.py, как в окне игры. Таймер хода человека
+считается на сервере (0 — без таймера). Ходы компьютера считаются
+в пуле процессов через планировщик (scheduler.py): у каждой партии своя
+очередь, раньше идут партии с меньшим запасом часов, Легкий и Средний
+ИИ идут своей полосой, поэтому долгий поиск Сложного ИИ не задерживает
+остальные партии. Ожидающие соединения — только корутины asyncio,
+без потоков, поэтому тысячи простаивающих клиентов держит одно ядро
+(если позволяет лимит открытых файлов).
+
+    python main.py serve --port 8765 --workers 2
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ai
+from engine import EMPTY, MAX_SIZE, new_state
+from scheduler import AIScheduler
+
+# Самая длинная допустимая строка от клиента
+MAX_LINE = 4096
+# Клиент, который не читает ответы, отключается при таком размере очереди
+MAX_WRITE_BUFFER = 256 * 1024
+LEVELS = ('Easy', 'Medium', 'Hard')
+
+
+class ClientError(Exception):
+    """Неверная команда клиента"""
+
+
+def compute_move(board, size, difficulty, ai_symbol, human_symbol, first_symbol,
+                 seed, move_number, win_length=None, node_budget=ai.DEFAULT_NODE_BUDGET,
+                 time_limit=None):
+    """Ход компьютера в процессе пула; возвращает (клетка, статистика)"""
+    stats = {}
+    cell = ai.choose_move(board, size, difficulty, ai_symbol, human_symbol, first_symbol,
+                          ai.move_rng(seed, move_number), node_budget, time_limit,
+                          stats=stats, win_length=win_length)
+    return cell, stats
+
+
+class Connection:
+    """Соединение клиента"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.game = None
+        self.player = None
+
+    def send(self, event, **fields):
+        """Событие клиенту; клиент с переполненной очередью отключается"""
+        if self.writer.is_closing():
+            return
+        transport = self.writer.transport
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+            return
+        fields['event'] = event
+        self.writer.write(json.dumps(fields, ensure_ascii=False).encode() + b'\n')
+
+
+class Game:
+    """Партия на сервере"""
+
+    def __init__(self, game_id, mode, size, symbols, timer_seconds,
+                 difficulty=None, node_budget=ai.DEFAULT_NODE_BUDGET, seed=None,
+                 win_length=None):
+        self.id = game_id
+        self.mode = mode
+        self.size = size
+        self.symbols = symbols
+        self.timer_seconds = timer_seconds
+        self.difficulty = difficulty
+        self.node_budget = node_budget
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.win_length = win_length
+        self.state = new_state(size, 0, win_length)
+        self.players = [None, None]
+        self.ai_player = None
+        self.timer = None
+        self.deadline = None
+        self.started = False
+        self.over = False
+
+    def connections(self):
+        """Подключенные игроки-люди"""
+        return [conn for conn in self.players if conn is not None]
+
+    def broadcast(self, event, **fields):
+        """Событие всем игрокам партии"""
+        for conn in self.connections():
+            conn.send(event, **fields)
+
+    def description(self):
+        """Параметры партии для клиента"""
+        return {'game': self.id, 'mode': self.mode, 'size': self.size,
+                'symbols': list(self.symbols), 'timer': self.timer_seconds,
+                'difficulty': self.difficulty, 'win_length': self.state.line_length}
+
+
+class GameServer:
+    """Сервер партий: соединения, таймеры и пул процессов для ходов компьютера
+
+    workers — одновременных поисков Сложного ИИ; еще один процесс пула
+    отдан легким ходам. budget_cap и time_slice — ограничения одного
+    поиска (см. AIScheduler).
+    """
+
+    def __init__(self, workers=1, executor=None, budget_cap=None, time_slice=None):
+        workers = workers or 1
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers + 1)
+        self.scheduler = AIScheduler(self.executor, slots=workers, light_slots=1,
+                                     budget_cap=budget_cap, time_slice=time_slice)
+        self.games = {}
+        self.waiting = {}
+        self.connections = set()
+        self.game_ids = itertools.count(1)
+        self.counters = {'games_created': 0, 'games_finished': 0, 'moves': 0,
+                         'searches': 0, 'search_seconds': 0.0, 'pending_searches': 0,
+                         'timeouts': 0, 'errors': 0}
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Запуск прослушивания порта; возвращает asyncio.Server"""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE,
+                                          backlog=1024)
+
+    def close(self):
+        """Остановка пула процессов"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """Цикл одного соединения"""
+        conn = Connection(writer)
+        self.connections.add(conn)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    conn.send('error', message="слишком длинная строка")
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    self.dispatch(conn, line)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Отмена — остановка сервера; соединение закрывается как обычно
+            pass
+        finally:
+            self.connections.discard(conn)
+            self.leave(conn, 'disconnect')
+            writer.close()
+
+    def dispatch(self, conn, line):
+        """Разбор и выполнение одной команды"""
+        try:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                raise ClientError("строка не JSON")
+            if not isinstance(message, dict):
+                raise ClientError("нужен объект JSON")
+            handler = getattr(self, 'op_' + str(message.get('op')), None)
+            if handler is None:
+                raise ClientError(f"неизвестная команда {message.get('op')!r}")
+            handler(conn, message)
+        except ClientError as e:
+            self.counters['errors'] += 1
+            conn.send('error', message=str(e))
+
+    @staticmethod
+    def option(message, name, default, kind, low=None, high=None):
+        """Параметр команды с проверкой типа и диапазона"""
+        value = message.get(name, default)
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ClientError(f"{name}: неверный тип")
+        if low is not None and not low <= value <= high:
+            raise ClientError(f"{name}: допустимо от {low} до {high}")
+        return value
+
+    def op_ping(self, conn, message):
+        conn.send('pong')
+
+    def op_stats(self, conn, message):
+        conn.send('stats', connections=len(self.connections), games=len(self.games),
+                  waiting=len(self.waiting), scheduler=self.scheduler.metrics(),
+                  **self.counters)
+
+    def op_create(self, conn, message):
+        if conn.game is not None and not conn.game.over:
+            raise ClientError("партия уже идет")
+        mode = message.get('mode', 'PvC')
+        if mode not in ('PvP', 'PvC'):
+            raise ClientError("mode: PvP или PvC")
+        size = self.option(message, 'size', 3, int, 3, MAX_SIZE)
+        win_length = self.option(message, 'win_length', 0, int, 0, size)
+        if 0 < win_length < 3:
+            raise ClientError(f"win_length: 0 или от 3 до {size}")
+        timer = self.option(message, 'timer', 30, int, 0, 300)
+        if 0 < timer < 5:
+            raise ClientError("timer: 0 или от 5 до 300")
+        symbols = message.get('symbols', ['X', 'O'])
+        if (not isinstance(symbols, list) or len(symbols) != 2
+                or not all(isinstance(s, str) and 0 < len(s) <= 3 for s in symbols)
+                or symbols[0] == symbols[1]):
+            raise ClientError("symbols: два разных символа до 3 знаков")
+        symbols = tuple(symbols)
+        symbol = message.get('symbol', symbols[0])
+        if symbol not in symbols:
+            raise ClientError("symbol: один из symbols")
+
+        game = Game(next(self.game_ids), mode, size, symbols, timer,
+                    win_length=win_length or None)
+        if mode == 'PvC':
+            game.difficulty = message.get('difficulty', 'Medium')
+            if game.difficulty not in LEVELS:
+                raise ClientError("difficulty: Easy, Medium или Hard")
+            game.node_budget = self.option(message, 'node_budget', ai.DEFAULT_NODE_BUDGET,
+                                           int, 1000, 1000000)
+            game.seed = self.option(message, 'seed', game.seed, (int, str))
+        human = symbols.index(symbol)
+        game.players[human] = conn
+        conn.game, conn.player = game, human
+        self.games[game.id] = game
+        self.counters['games_created'] += 1
+        conn.send('created', symbol=symbol, **game.description())
+
+        if mode == 'PvC':
+            game.ai_player = 1 - human
+            self.begin(game)
+        else:
+            self.waiting[game.id] = game
+
+    def op_join(self, conn, message):
+        if conn.game is not None and not conn.game.over:
+            raise ClientError("партия уже идет")
+        game_id = message.get('game')
+        if game_id is None:
+            if not self.waiting:
+                raise ClientError("нет ожидающих партий")
+            game_id = next(iter(self.waiting))
+        game = self.waiting.pop(game_id, None)
+        if game is None:
+            raise ClientError(f"партия {game_id} не ждет соперника")
+        player = game.players.index(None)
+        game.players[player] = conn
+        conn.game, conn.player = game, player
+        self.begin(game)
+
+    def op_move(self, conn, message):
+        game = conn.game
+        if game is None or not game.started or game.over:
+            raise ClientError("нет идущей партии")
+        if game.state.to_move != conn.player:
+            raise ClientError("сейчас не ваш ход")
+        row = self.option(message, 'row', None, int, 0, game.size - 1)
+        col = self.option(message, 'col', None, int, 0, game.size - 1)
+        cell = row * game.size + col
+        if game.state.cells[cell] != EMPTY:
+            raise ClientError("клетка занята")
+        self.play(game, cell)
+
+    def op_resign(self, conn, message):
+        game = conn.game
+        if game is None or game.over:
+            raise ClientError("нет идущей партии")
+        self.leave(conn, 'resign')
+
+    def begin(self, game):
+        """Начало партии: оба места заняты"""
+        game.started = True
+        for player, conn in enumerate(game.players):
+            if conn is not None:
+                conn.send('start', symbol=game.symbols[player], **game.description())
+        self.next_turn(game)
+
+    def play(self, game, cell):
+        """Ход в клетку: рассылка, проверка конца партии, передача хода"""
+        player = game.state.to_move
+        game.state.play(cell)
+        self.counters['moves'] += 1
+        game.broadcast('move', symbol=game.symbols[player],
+                       row=cell // game.size, col=cell % game.size,
+                       number=len(game.state.stack))
+        if game.state.winner is not None:
+            self.finish(game, game.symbols[game.state.winner], 'line',
+                        line=game.state.winning_cells())
+        elif game.state.is_full():
+            self.finish(game, None, 'draw')
+        else:
+            self.next_turn(game)
+
+    def next_turn(self, game):
+        """Таймер для хода человека или поиск для хода компьютера"""
+        self.cancel_timer(game)
+        if game.state.to_move == game.ai_player:
+            self.counters['pending_searches'] += 1
+            asyncio.get_running_loop().create_task(self.ai_move(game, len(game.state.stack)))
+        elif game.timer_seconds:
+            loop = asyncio.get_running_loop()
+            game.deadline = time.time() + game.timer_seconds
+            game.timer = loop.call_later(game.timer_seconds, self.timeout,
+                                         game, len(game.state.stack))
+            game.broadcast('turn', symbol=game.symbols[game.state.to_move],
+                           deadline=game.deadline)
+
+    async def ai_move(self, game, number):
+        """Ход компьютера из пула процессов"""
+        player = game.ai_player
+        args = (game.state.to_board(game.symbols), game.size, game.difficulty,
+                game.symbols[player], game.symbols[1 - player], game.symbols[0],
+                game.seed, number, game.win_length)
+        started = time.perf_counter()
+        try:
+            future = self.scheduler.submit(game.id, compute_move, args,
+                                           clock_seconds=game.timer_seconds or None,
+                                           light=game.difficulty != 'Hard',
+                                           node_budget=game.node_budget)
+            cell, stats = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Партия закончилась, пока ход ждал очереди, или сервер остановлен
+            self.counters['pending_searches'] -= 1
+            raise
+        except Exception as e:
+            self.counters['pending_searches'] -= 1
+            if not game.over:
+                game.broadcast('error', message=f"ошибка хода компьютера: {e}")
+                self.finish(game, None, 'error')
+            return
+        self.counters['pending_searches'] -= 1
+        self.counters['searches'] += 1
+        self.counters['search_seconds'] += time.perf_counter() - started
+        # Пока считался ход, партия могла закончиться (человек ушел)
+        if game.over or len(game.state.stack) != number:
+            return
+        self.play(game, cell)
+
+    def timeout(self, game, number):
+        """Время на ход вышло: побеждает соперник"""
+        game.timer = None
+        if game.over or len(game.state.stack) != number:
+            return
+        self.counters['timeouts'] += 1
+        self.finish(game, game.symbols[1 - game.state.to_move], 'timeout')
+
+    def cancel_timer(self, game):
+        if game.timer is not None:
+            game.timer.cancel()
+            game.timer = None
+
+    def leave(self, conn, reason):
+        """Игрок сдался или отключился"""
+        game = conn.game
+        if game is None:
+            return
+        if not game.over:
+            if game.started:
+                self.finish(game, game.symbols[1 - conn.player], reason)
+            else:
+                self.waiting.pop(game.id, None)
+                self.games.pop(game.id, None)
+        game.players[conn.player] = None
+        conn.game = None
+
+    def finish(self, game, winner, reason, **fields):
+        """Конец партии"""
+        if game.over:
+            return
+        game.over = True
+        self.cancel_timer(game)
+        self.scheduler.cancel(game.id)
+        self.games.pop(game.id, None)
+        self.counters['games_finished'] += 1
+        game.broadcast('over', winner=winner, reason=reason, **fields)
+
+
+async def serve(host, port, workers, budget_cap=None, time_slice=None):
+    """Работа сервера до прерывания (Ctrl+C или SIGTERM)"""
+    server = GameServer(workers, budget_cap=budget_cap, time_slice=time_slice)
+    listener = await server.start(host, port)
+    addresses = ', '.join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Сервер слушает {addresses}, процессов для поиска: {workers}", flush=True)
+    # SIGTERM останавливает сервер так же, как Ctrl+C: с остановкой пула
+    # процессов, иначе его процессы переживают сервер
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+    except NotImplementedError:
+        # Windows: обработчиков сигналов в цикле событий нет
+        pass
+    try:
+        await stop.wait()
+    finally:
+        listener.close()
+        server.close()
+
+
+def main(argv=None):
+    """Запуск сервера из командной строки"""
+    parser = argparse.ArgumentParser(description="Игровой сервер")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="одновременных поисков Сложного ИИ")
+    parser.add_argument('--budget-cap', type=int, help="предел узлов одного поиска")
+    parser.add_argument('--time-slice', type=float,
+                        help="предел секунд одного поиска (без него — только бюджет узлов)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.budget_cap,
+                          args.time_slice))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Долгая сессия окна игры без человека: проверка роста памяти
+
+Скрипт сам нажимает кнопки: меню → игра (несколько партий случайными
+ходами и «Новая игра») → меню, а каждый settings_every цикл вместо
+игры открывает настройки и сохраняет их. Замер memprobe.py берется
+в меню в начале каждого цикла и в окне игры перед возвратом в меню.
+Первые warmup циклов — прогрев (кеши, ленивые импорты, шрифты Tk),
+рост считается от замера после него.
+
+Тест не проходит (код 1), если память Python выросла больше
+max_growth_kb или выросли глубина стека, число виджетов, команд Tcl
+или заданий after. Нужен дисплей (на сервере — Xvfb). Скрипт работает
+во временной папке, поэтому настройки и записи партий пользователя
+не трогает.
+
+    python main.py soak --cycles 2000 --size 10 --max-growth-kb 512
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import gui
+from memprobe import MemoryProbe
+
+# Величины, которые не должны расти совсем
+STRICT = ('stack_depth', 'widgets', 'tcl_commands', 'after_jobs')
+
+
+class Soak:
+    """Сценарий долгой сессии поверх gui.run"""
+
+    def __init__(self, cycles, size=10, games=2, settings_every=10, warmup=20, seed=0,
+                 log=None):
+        self.cycles = cycles
+        self.size = size
+        self.games = games
+        self.settings_every = settings_every
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+        self.probe = MemoryProbe(log)
+        self.cycle = 0
+        # Сколько замеров каждой метки было до конца прогрева
+        self.start = {'menu': 0, 'game': 0}
+
+    def on_window(self, window):
+        """Новый экран: следующий шаг сценария — когда заработает его mainloop"""
+        window.root.after(0, self.drive, window)
+
+    def drive(self, window):
+        """Шаг сценария на экране window"""
+        if isinstance(window, gui.GameWindow):
+            self.play(window)
+            return
+
+        self.probe.sample(window.root, 'menu')
+        if self.cycle == self.warmup:
+            self.probe.rebase()
+            labels = [sample['label'] for sample in self.probe.samples]
+            # Отсчет — от этого замера меню и от следующего замера игры
+            self.start = {'menu': labels.count('menu') - 1, 'game': labels.count('game')}
+        self.cycle += 1
+        if self.cycle > self.cycles:
+            window.exit_game()
+        elif self.cycle % self.settings_every == 0:
+            settings = window.open_settings()
+            settings.size_var.set(str(self.size))
+            settings.save_settings()
+        else:
+            window.start_game()
+
+    def play(self, game):
+        """Несколько партий случайными ходами, затем возврат в меню"""
+        for _ in range(self.games):
+            while game.game_active:
+                cell = self.rng.choice(game.state.empty_cells())
+                game.make_move(*divmod(cell, game.board_size))
+            game.root.update_idletasks()
+            game.new_game()
+        self.probe.sample(game.root, 'game')
+        game.back_to_menu()
+
+    def run(self):
+        """Весь сценарий; окна сообщений на время прогона не показываются"""
+        dialogs = {name: getattr(gui.messagebox, name) for name in ('showinfo', 'showerror')}
+        for name in dialogs:
+            setattr(gui.messagebox, name, lambda *args, **kwargs: None)
+        gui.GAME_SETTINGS.update(mode='PvP', size=self.size, timer_enabled=True)
+        try:
+            gui.run(self.on_window)
+        finally:
+            for name, function in dialogs.items():
+                setattr(gui.messagebox, name, function)
+
+    def verdict(self, max_growth_kb):
+        """Рост по меткам и список нарушений порогов"""
+        growth = {label: self.probe.growth(label, start) for label, start in self.start.items()}
+        failures = []
+        for label, values in growth.items():
+            for name in STRICT:
+                if values.get(name, 0) > 0:
+                    failures.append(f"{label}: {name} +{values[name]}")
+            if values.get('traced_kb', 0) > max_growth_kb:
+                failures.append(f"{label}: память +{values['traced_kb']} КБ > {max_growth_kb} КБ")
+        return growth, failures
+
+
+def main(argv=None):
+    """Прогон из командной строки"""
+    parser = argparse.ArgumentParser(description="Долгая сессия окна игры")
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--games', type=int, default=2, help="партий за заход в игру")
+    parser.add_argument('--settings-every', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-growth-kb', type=float, default=512)
+    parser.add_argument('--log', help="файл замеров (JSON по строке)")
+    args = parser.parse_args(argv)
+    if args.cycles <= args.warmup:
+        parser.error("циклов должно быть больше, чем циклов прогрева")
+
+    log = os.path.abspath(args.log) if args.log else None
+    soak = Soak(args.cycles, args.size, args.games, args.settings_every, args.warmup,
+                args.seed, log)
+    started = time.perf_counter()
+    folder = os.getcwd()
+    with tempfile.TemporaryDirectory() as temporary:
+        os.chdir(temporary)
+        try:
+            soak.run()
+        finally:
+            os.chdir(folder)
+
+    growth, failures = soak.verdict(args.max_growth_kb)
+    print(f"Циклов: {args.cycles}, {time.perf_counter() - started:.0f}с")
+    for label, values in growth.items():
+        print(f"  {label}: " + ', '.join(f"{name} {value:+g}" for name, value in values.items()))
+    print("Больше всего выросло:")
+    for line in soak.probe.top_growth():
+        print(f"  {line}")
+    if failures:
+        print("Не пройден:", '; '.join(failures), file=sys.stderr)
+        return 1
+    print("Пройден")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Таблица эндшпиля: ретроградный анализ позиций с малым числом пустых клеток
+
+Позиция хранится как пара битовых масок: клетки игрока, который начинал
+партию, и клетки второго игрока. Значение записывается с точки зрения
+того, кто сейчас ходит:
+    0        — ничья (или позиция недостижима)
+    > 0      — ходящий выигрывает, чем больше число, тем быстрее победа
+    < 0      — ходящий проигрывает, чем меньше модуль, тем дольше защита
+Модуль значения равен числу пустых клеток в момент окончания партии плюс 1.
+
+Генерация:
+    python tablebase.py --size 4 --empty 5
+    python tablebase.py --size 5 --empty 5 --win-length 4
+"""
+
+import argparse
+import array
+import os
+import time
+from itertools import combinations
+from math import comb
+
+from engine import line_masks, has_line
+
+MAGIC = b'TTTB'
+# Таблицы с линией короче стороны поля: в заголовке еще и длина линии
+MAGIC_K = b'TTTK'
+
+_loaded = {}
+
+
+def tablebase_path(size, win_length=None):
+    """Имя файла таблицы для поля size x size и длины линии win_length"""
+    if win_length is None or win_length == size:
+        return f"tablebase_{size}x{size}.bin"
+    return f"tablebase_{size}x{size}_k{win_length}.bin"
+
+
+class Tablebase:
+    """Точные оценки всех позиций с не более чем max_empty пустыми клетками"""
+
+    def __init__(self, size, max_empty, layers=None, win_length=None):
+        self.size = size
+        self.cells = size * size
+        self.max_empty = max_empty
+        self.win_length = win_length or size
+        self.masks = line_masks(size, win_length)
+        self.binom = [
+            [comb(n, k) for k in range(self.cells + 2)]
+            for n in range(self.cells + 1)
+        ]
+        if layers is None:
+            layers = [
+                array.array('b', bytes(self.layer_size(empty)))
+                for empty in range(max_empty + 1)
+            ]
+        self.layers = layers
+
+    def layer_size(self, empty):
+        """Число позиций с empty пустыми клетками"""
+        filled = self.cells - empty
+        return self.binom[self.cells][empty] * self.binom[filled][(filled + 1) // 2]
+
+    def index(self, first, second):
+        """Номер позиции внутри слоя: (пустых клеток, индекс) или None
+
+        Множество пустых клеток и множество клеток первого игрока среди
+        занятых нумеруются комбинаторно (colex), поэтому таблица плотная.
+        """
+        occupied = first | second
+        binom = self.binom
+        empty_rank = empty_count = 0
+        first_rank = first_count = 0
+        filled = 0
+        for cell in range(self.cells):
+            bit = 1 << cell
+            if occupied & bit:
+                if first & bit:
+                    first_count += 1
+                    first_rank += binom[filled][first_count]
+                filled += 1
+            else:
+                empty_count += 1
+                empty_rank += binom[cell][empty_count]
+
+        if empty_count > self.max_empty or first_count != (filled + 1) // 2:
+            return None
+        return empty_count, empty_rank * binom[filled][first_count] + first_rank
+
+    def probe(self, first, second):
+        """Точное значение позиции или None, если ее нет в таблице"""
+        key = self.index(first, second)
+        if key is None:
+            return None
+        empty, idx = key
+        return self.layers[empty][idx]
+
+    def best_move(self, first, second):
+        """Лучший ход (индекс клетки) для ходящего и значение позиции после него"""
+        occupied = first | second
+        filled = bin(occupied).count('1')
+        first_to_move = filled % 2 == 0
+
+        best_cell = None
+        best_value = None
+        for cell in range(self.cells):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            if first_to_move:
+                value = self.probe(first | bit, second)
+            else:
+                value = self.probe(first, second | bit)
+            if value is None:
+                return None, None
+            if best_value is None or -value > best_value:
+                best_value = -value
+                best_cell = cell
+        return best_cell, best_value
+
+    def save(self, path):
+        """Запись таблицы в файл"""
+        with open(path, 'wb') as f:
+            if self.win_length == self.size:
+                f.write(MAGIC)
+                f.write(bytes([self.size, self.max_empty]))
+            else:
+                f.write(MAGIC_K)
+                f.write(bytes([self.size, self.max_empty, self.win_length]))
+            for layer in self.layers:
+                layer.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """Чтение таблицы из файла"""
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+            if magic == MAGIC:
+                size, max_empty = f.read(2)
+                win_length = None
+            elif magic == MAGIC_K:
+                size, max_empty, win_length = f.read(3)
+            else:
+                raise ValueError(f"{path}: не файл таблицы эндшпиля")
+            table = cls(size, max_empty, layers=[], win_length=win_length)
+            for empty in range(max_empty + 1):
+                layer = array.array('b')
+                layer.fromfile(f, table.layer_size(empty))
+                table.layers.append(layer)
+        return table
+
+
+def generate(size, max_empty, progress=None, win_length=None):
+    """Построение таблицы от заполненного поля к позициям с max_empty пустыми клетками"""
+    table = Tablebase(size, max_empty, win_length=win_length)
+    cells = table.cells
+    masks = table.masks
+    all_cells = range(cells)
+
+    for empty in range(max_empty + 1):
+        started = time.perf_counter()
+        layer = table.layers[empty]
+        filled = cells - empty
+        first_count = (filled + 1) // 2
+        first_to_move = filled % 2 == 0
+
+        for empty_cells in combinations(all_cells, empty):
+            empty_set = set(empty_cells)
+            occupied = [cell for cell in all_cells if cell not in empty_set]
+            for first_cells in combinations(occupied, first_count):
+                first = 0
+                for cell in first_cells:
+                    first |= 1 << cell
+                second = 0
+                for cell in occupied:
+                    second |= 1 << cell
+                second &= ~first
+
+                mover, waiting = (first, second) if first_to_move else (second, first)
+                if has_line(waiting, masks):
+                    value = -(empty + 1)
+                elif has_line(mover, masks) or empty == 0:
+                    value = 0
+                else:
+                    value = -cells - 1
+                    for cell in empty_cells:
+                        bit = 1 << cell
+                        if first_to_move:
+                            child = table.probe(first | bit, second)
+                        else:
+                            child = table.probe(first, second | bit)
+                        if -child > value:
+                            value = -child
+
+                layer[table.index(first, second)[1]] = value
+
+        if progress:
+            progress(empty, len(layer), time.perf_counter() - started)
+
+    return table
+
+
+def load_tablebase(size, win_length=None):
+    """Таблица для поля size x size и линии win_length из файла рядом с игрой (или None)"""
+    key = (size, win_length or size)
+    if key not in _loaded:
+        try:
+            path = tablebase_path(size, win_length)
+            _loaded[key] = Tablebase.load(path) if os.path.exists(path) else None
+        except Exception:
+            _loaded[key] = None
+    return _loaded[key]
+
+
+def main(argv=None):
+    """Генерация таблицы из командной строки"""
+    parser = argparse.ArgumentParser(description="Генерация таблицы эндшпиля")
+    parser.add_argument('--size', type=int, default=4, help="размер поля (4 или 5)")
+    parser.add_argument('--empty', type=int, default=5, help="максимум пустых клеток K")
+    parser.add_argument('--win-length', type=int, help="длина выигрышной линии (по умолчанию сторона поля)")
+    parser.add_argument('--output', help="файл таблицы")
+    args = parser.parse_args(argv)
+
+    def report(empty, count, seconds):
+        print(f"пустых {empty}: {count} позиций за {seconds:.1f}с", flush=True)
+
+    table = generate(args.size, args.empty, progress=report, win_length=args.win_length)
+    path = args.output or tablebase_path(args.size, args.win_length)
+    table.save(path)
+    total = sum(len(layer) for layer in table.layers)
+    print(f"Сохранено {total} позиций ({os.path.getsize(path)} байт) в {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Ход Сложного ИИ: бюджеты и сессия поиска между ходами"""
+
+import random
+import unittest
+
+import ai
+from engine import GameState
+
+
+class HardMoveTest(unittest.TestCase):
+
+    def test_infinite_budget(self):
+        # Бюджет go infinite: решатель PNS берет свою долю, поиск — до срока
+        for size in (3, 4):
+            board = [''] * (size * size)
+            board[size + 1] = 'X'
+            cell = ai.get_hard_move(board, size, 'O', 'X', 'X', random.Random(1),
+                                    float('inf'), 0.2)
+            self.assertIn(cell, range(size * size))
+            self.assertEqual(board[cell], '')
+
+
+class SessionTest(unittest.TestCase):
+
+    def test_pv_hit_starts_deeper(self):
+        session = ai.SearchSession(4)
+        state = GameState(4)
+        ai.Search(4, float('inf'), session=session, max_depth=5).best_move(state)
+        self.assertEqual(session.history, {})
+        # Игра идет по главной линии: следующий поиск начинается не с глубины 1
+        for cell in session.pv[:2]:
+            state.play(cell)
+        depths = []
+        search = ai.Search(4, float('inf'), session=session, max_depth=5,
+                           on_depth=lambda depth, *_: depths.append(depth))
+        search.best_move(state)
+        self.assertTrue(session.log[-1]['pv_hit'])
+        self.assertGreater(depths[0], 1)
+        self.assertEqual(depths[-1], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""GameState: play/undo, хеш Zobrist, счетчики линий и winning_move"""
+
+import random
+import unittest
+
+from engine import (EMPTY, GameState, cells_to_masks, winning_lines, zobrist_hash,
+                    zobrist_keys)
+
+
+def snapshot(state):
+    """Все поля состояния, которые восстанавливает undo"""
+    return (list(state.cells), state.hash, state.to_move, state.filled,
+            [list(counts) for counts in state.counts], list(state.open_sums),
+            state.winner, state.win_line, list(state.stack))
+
+
+def brute_winning_move(state, player):
+    """Все клетки, которые сразу дают игроку полную линию"""
+    cells = set()
+    for line in state.lines:
+        values = [state.cells[cell] for cell in line]
+        if values.count(player) == len(line) - 1 and values.count(EMPTY) == 1:
+            cells.add(line[values.index(EMPTY)])
+    return cells
+
+
+class GameStateTest(unittest.TestCase):
+
+    def random_games(self, size, count, win_length=None):
+        """Партии со случайными ходами до победы или заполнения поля"""
+        rng = random.Random(size * 100 + (win_length or 0))
+        for _ in range(count):
+            state = GameState(size, win_length=win_length)
+            cells = list(range(size * size))
+            rng.shuffle(cells)
+            yield state, cells
+
+    def test_undo_restores_everything(self):
+        for size, win_length in ((3, None), (4, None), (5, 4), (6, 3)):
+            for state, cells in self.random_games(size, 20, win_length):
+                before = []
+                for cell in cells:
+                    before.append(snapshot(state))
+                    state.play(cell)
+                    if state.winner is not None:
+                        break
+                while state.stack:
+                    state.undo()
+                    self.assertEqual(snapshot(state), before.pop())
+                self.assertEqual(state.hash, 0)
+
+    def test_hash_matches_zobrist(self):
+        keys = zobrist_keys(4)
+        for state, cells in self.random_games(4, 20):
+            for cell in cells:
+                state.play(cell)
+                first, second = cells_to_masks(state.cells, 0, 1)
+                self.assertEqual(state.hash, zobrist_hash(first, second, keys))
+                if state.winner is not None:
+                    break
+
+    def test_counters(self):
+        for size, win_length in ((3, None), (5, 4), (7, 3)):
+            lines = winning_lines(size, win_length)
+            for state, cells in self.random_games(size, 10, win_length):
+                for cell in cells[:size * size - 1]:
+                    state.play(cell)
+                    for index, line in enumerate(lines):
+                        values = [state.cells[c] for c in line]
+                        self.assertEqual(state.counts[0][index], values.count(0))
+                        self.assertEqual(state.counts[1][index], values.count(1))
+                        if values.count(EMPTY) == 1:
+                            self.assertEqual(state.open_sums[index],
+                                             line[values.index(EMPTY)])
+
+    def test_winning_move(self):
+        for size, win_length in ((3, None), (4, None), (6, 4)):
+            for state, cells in self.random_games(size, 30, win_length):
+                for cell in cells:
+                    state.play(cell)
+                    if state.winner is not None or state.is_full():
+                        break
+                    for player in (0, 1):
+                        expected = brute_winning_move(state, player)
+                        move = state.winning_move(player)
+                        if expected:
+                            self.assertIn(move, expected)
+                        else:
+                            self.assertIsNone(move)
+
+    def test_winner_and_reset(self):
+        state = GameState(3)
+        for cell in (0, 3, 1, 4):
+            state.play(cell)
+        self.assertIsNone(state.winner)
+        self.assertEqual(state.winning_move(0), 2)
+        state.play(2)
+        self.assertEqual(state.winner, 0)
+        self.assertEqual(state.winning_cells(), [0, 1, 2])
+        state.undo()
+        self.assertIsNone(state.winner)
+        state.reset(1)
+        self.assertEqual(state.to_move, 1)
+        self.assertEqual(state.cells, [EMPTY] * 9)
+        self.assertEqual(state.hash, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Трассировка latency.py на интерпретаторе Tcl без дисплея"""
+
+import json
+import os
+import tempfile
+import tkinter
+import unittest
+
+from latency import BUCKETS_MS, PHASES, LatencyTracer, histogram, summary
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_buckets(self):
+        counts = histogram([0.05, 0.1, 0.15, 7, 5000])
+        self.assertEqual(len(counts), len(BUCKETS_MS) + 1)
+        self.assertEqual(counts[0], 2)
+        self.assertEqual(counts[1], 1)
+        self.assertEqual(counts[BUCKETS_MS.index(10)], 1)
+        self.assertEqual(counts[-1], 1)
+
+    def test_summary(self):
+        self.assertEqual(summary([]), {'count': 0})
+        result = summary([3.0, 1.0, 2.0])
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['p50'], 2.0)
+        self.assertEqual(result['max'], 3.0)
+
+
+class LatencyTracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tkinter.Tcl()
+        self.tracer = LatencyTracer()
+
+    def action(self, kind):
+        """Действие с обеими частями; метка отрисовки — после задач простоя"""
+        tracer = self.tracer
+        tracer.begin(kind)
+        tracer.enter('check')
+        tracer.leave()
+        tracer.enter('reconfigure')
+        tracer.leave()
+        tracer.finish(self.root)
+        self.root.update_idletasks()
+
+    def test_records_after_paint(self):
+        self.tracer.begin('move')
+        self.tracer.finish(self.root)
+        self.assertEqual(self.tracer.records, [])
+        self.root.update_idletasks()
+        self.assertEqual(len(self.tracer.records), 1)
+        record = self.tracer.records[0]
+        self.assertEqual(record['kind'], 'move')
+        for phase in PHASES:
+            self.assertGreaterEqual(record[phase], 0)
+        self.assertAlmostEqual(record['total'], sum(record[phase] for phase in PHASES))
+
+    def test_cancel(self):
+        self.tracer.begin('move')
+        self.tracer.cancel()
+        self.tracer.enter('check')
+        self.tracer.leave()
+        self.tracer.finish(self.root)
+        self.root.update_idletasks()
+        self.assertEqual(self.tracer.records, [])
+
+    def test_report_histograms(self):
+        for _ in range(3):
+            self.action('move')
+        self.action('ai_move')
+        report = self.tracer.report()
+        self.assertEqual(sorted(report['kinds']), ['ai_move', 'move'])
+        for phase in PHASES + ('total',):
+            entry = report['kinds']['move'][phase]
+            self.assertEqual(entry['count'], 3)
+            self.assertEqual(sum(entry['histogram']), 3)
+
+    def test_save(self):
+        self.action('start')
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'latency.json')
+            self.tracer.save(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(data['buckets_ms'], list(BUCKETS_MS))
+        self.assertEqual(len(data['records']), 1)
+        self.assertEqual(data['records'][0]['kind'], 'start')
+
+
+if __name__ == '__main__':
+    unittest.main()
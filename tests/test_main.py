@@ -0,0 +1,39 @@
+"""Команды без окна не импортируют tkinter"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Команда в отдельном интерпретаторе, затем список загруженных модулей GUI
+SCRIPT = """
+import sys
+import main
+main.main(sys.argv[1:])
+print(sorted(name for name in sys.modules if name.split('.')[0] in ('tkinter', '_tkinter', 'gui')))
+"""
+
+
+def loaded_gui_modules(*argv):
+    """Модули tkinter и gui, загруженные командой main.py argv"""
+    result = subprocess.run([sys.executable, '-c', SCRIPT, *argv], cwd=HERE,
+                            capture_output=True, text=True, timeout=120, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+class HeadlessTest(unittest.TestCase):
+
+    def test_move(self):
+        self.assertEqual(loaded_gui_modules('move', '--board', 'X../.O./...'), '[]')
+
+    def test_selfplay(self):
+        self.assertEqual(loaded_gui_modules('selfplay', '--games', '1'), '[]')
+
+    def test_solve(self):
+        self.assertEqual(loaded_gui_modules('solve', '--size', '3', '--moves', '1,1'), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
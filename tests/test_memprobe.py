@@ -0,0 +1,81 @@
+"""Замеры memprobe.py на интерпретаторе Tcl без дисплея"""
+
+import json
+import os
+import tempfile
+import tkinter
+import tracemalloc
+import unittest
+
+from memprobe import MEASURES, MemoryProbe, stack_depth
+
+
+class Root:
+    """Окно без дисплея: интерпретатор Tcl и пустое дерево виджетов"""
+
+    def __init__(self):
+        self.tcl = tkinter.Tcl()
+        self.tk = self.tcl.tk
+
+    def winfo_children(self):
+        return []
+
+
+class MemoryProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracing = tracemalloc.is_tracing()
+        self.root = Root()
+
+    def tearDown(self):
+        if not self.tracing:
+            tracemalloc.stop()
+
+    def test_sample_fields(self):
+        probe = MemoryProbe()
+        sample = probe.sample(self.root, 'menu')
+        for name in MEASURES:
+            self.assertIn(name, sample)
+        self.assertEqual(sample['widgets'], 1)
+        self.assertEqual(sample['number'], 0)
+        self.assertIsNotNone(probe.baseline)
+
+    def test_growth_of_after_jobs_and_memory(self):
+        probe = MemoryProbe()
+        probe.sample(self.root, 'game')
+        jobs = [self.root.tcl.after(60000, lambda: None) for _ in range(3)]
+        kept = [bytearray(1024) for _ in range(256)]
+        probe.sample(self.root, 'game')
+        growth = probe.growth('game')
+        self.assertEqual(growth['after_jobs'], 3)
+        self.assertGreater(growth['traced_kb'], 200)
+        self.assertTrue(probe.top_growth())
+        for job in jobs:
+            self.root.tcl.after_cancel(job)
+        del kept
+
+    def test_growth_from_start(self):
+        probe = MemoryProbe()
+        probe.sample(self.root, 'menu')
+        self.assertEqual(probe.growth('menu', start=1), {})
+        self.assertEqual(probe.growth('game'), {})
+
+    def test_stack_depth(self):
+        def nested(depth):
+            return stack_depth() if depth == 0 else nested(depth - 1)
+
+        self.assertEqual(nested(5) - nested(0), 5)
+
+    def test_log_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'memory.jsonl')
+            probe = MemoryProbe(path)
+            probe.sample(self.root, 'menu')
+            probe.sample(self.root, 'game')
+            with open(path, 'r', encoding='utf-8') as f:
+                labels = [json.loads(line)['label'] for line in f]
+        self.assertEqual(labels, ['menu', 'game'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Общая таблица транспозиций parallel.py без процессов поиска"""
+
+import unittest
+from unittest import mock
+
+import parallel
+from parallel import DATA, KEY, WORDS, SharedTable
+
+
+class RacingWords:
+    """WORDS, после чтения которого другой процесс переписывает данные записи"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def unpack_from(self, buffer, offset):
+        words = WORDS.unpack_from(buffer, offset)
+        buffer[offset + KEY.size:offset + KEY.size + DATA.size] = self.data
+        return words
+
+    def pack(self, *words):
+        return WORDS.pack(*words)
+
+
+class SharedTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SharedTable(slots=16)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_store_and_get(self):
+        self.table[0x1234] = (3, -17, 1, 5)
+        self.table[0x5678] = (2, 40, 0, None)
+        self.assertEqual(self.table.get(0x1234), (3, -17, 1, 5))
+        self.assertEqual(self.table.get(0x5678), (2, 40, 0, None))
+        self.assertIsNone(self.table.get(0x1244))
+        self.assertEqual(self.table.used(), 2)
+
+    def test_deeper_entry_kept(self):
+        self.table[0x21] = (5, 10, 0, 1)
+        self.table[0x21] = (2, 99, 0, 2)
+        self.assertEqual(self.table.get(0x21), (5, 10, 0, 1))
+
+    def test_fields_from_checked_words(self):
+        self.table[0x31] = (4, 25, 0, 7)
+        # Писатель успел сменить данные между чтением слов и разбором полей
+        racing = RacingWords(DATA.pack(-500, 10, 2, 9))
+        with mock.patch.object(parallel, 'WORDS', racing):
+            entry = self.table.slot(0x31 & self.table.mask)
+        self.assertEqual(entry, (0x31, 5, 25, 0, 8))
+
+    def test_torn_entry_is_miss(self):
+        self.table[0x42] = (4, 25, 0, 7)
+        offset = (0x42 & self.table.mask) * parallel.ENTRY_BYTES
+        self.table.buffer[offset + KEY.size:offset + KEY.size + DATA.size] = \
+            DATA.pack(-500, 10, 2, 9)
+        self.assertIsNone(self.table.get(0x42))
+
+
+if __name__ == '__main__':
+    unittest.main()
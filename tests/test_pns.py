@@ -0,0 +1,74 @@
+"""Решатель PNS: известные итоги, доказывающий ход и пределы работы"""
+
+import threading
+import unittest
+
+from pns import DRAW, LOSS, UNKNOWN, WIN, ProofNumberSearch, solve_move
+
+
+def masks(moves):
+    """Маски игроков после ходов moves (первый игрок начинает)"""
+    players = [0, 0]
+    for number, cell in enumerate(moves):
+        players[number % 2] |= 1 << cell
+    return tuple(players)
+
+
+class SolveTest(unittest.TestCase):
+
+    def test_empty_3x3_is_draw(self):
+        result, move = ProofNumberSearch(3).solve(0, 0)
+        self.assertEqual(result, DRAW)
+        self.assertIsNotNone(move)
+
+    def test_immediate_win(self):
+        # X: 0, 1; O: 3, 4 — ходит X и ставит третий в строку
+        result, move = ProofNumberSearch(3).solve(*masks([0, 3, 1, 4]))
+        self.assertEqual((result, move), (WIN, 2))
+
+    def test_double_threat_is_loss(self):
+        # X: 0, 2, 4 — угрозы 0-4-8 и 2-4-6; ходит O
+        result, move = ProofNumberSearch(3).solve(*masks([0, 1, 2, 5, 4]))
+        self.assertEqual((result, move), (LOSS, None))
+
+    def test_proving_move_on_4x4_k3(self):
+        solver = ProofNumberSearch(4, win_length=3)
+        result, move = solver.solve(0, 0)
+        self.assertEqual(result, WIN)
+        # После доказывающего хода соперник проигрывает
+        reply, _ = ProofNumberSearch(4, win_length=3).solve(1 << move, 0)
+        self.assertEqual(reply, LOSS)
+
+    def test_solve_move(self):
+        stats = {}
+        result, move = solve_move(masks([0, 3, 1, 4]), 3, 1000, stats=stats)
+        self.assertEqual((result, move), (WIN, 2))
+        self.assertGreater(stats['nodes'], 0)
+        # Проигрыш не дает хода: играть будет поиск
+        self.assertEqual(solve_move(masks([0, 1, 2, 5, 4]), 3, 1000), (LOSS, None))
+
+
+class BudgetTest(unittest.TestCase):
+
+    def test_node_budget(self):
+        stats = {}
+        result, move = solve_move((0, 0), 5, 500, stats=stats)
+        self.assertEqual((result, move), (UNKNOWN, None))
+        # Бюджет проверяется перед раскрытием узла: перебор — не больше одного раскрытия
+        self.assertLess(stats['nodes'], 500 + 25)
+
+    def test_memory_limit(self):
+        solver = ProofNumberSearch(5, max_nodes=10 ** 9, memory_mb=1)
+        self.assertEqual(solver.max_nodes, 2 ** 20 // 200)
+        self.assertEqual(solver.solve(0, 0), (UNKNOWN, None))
+
+    def test_stop_event(self):
+        stop = threading.Event()
+        stop.set()
+        solver = ProofNumberSearch(4, stop_event=stop)
+        self.assertEqual(solver.solve(0, 0), (UNKNOWN, None))
+        self.assertEqual(solver.generated, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Команды протокола движка: ответы, ошибки и bestmove при сбое поиска"""
+
+import io
+import time
+import unittest
+from unittest import mock
+
+from protocol import Engine
+
+
+class EngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.output = io.StringIO()
+        self.engine = Engine(self.output)
+
+    def tearDown(self):
+        self.engine.stop()
+        self.engine.close_pool()
+
+    def run_commands(self, *lines):
+        """Строки ответа на команды lines"""
+        start = len(self.output.getvalue())
+        for line in lines:
+            self.engine.handle(line)
+        return self.output.getvalue()[start:].splitlines()
+
+    def test_go_infinite_stop(self):
+        self.run_commands('newgame 4', 'position startpos moves 1,1', 'go infinite')
+        time.sleep(0.1)
+        self.run_commands('stop')
+        lines = self.output.getvalue().splitlines()
+        self.assertTrue(lines[-1].startswith('bestmove '))
+        self.assertNotEqual(lines[-1], 'bestmove 1,1')
+        self.assertFalse([line for line in lines if line.startswith('info string error')])
+
+    def test_newgame_limits(self):
+        for line in ('newgame 2', 'newgame 3 line 2', 'newgame 3 XX O', 'newgame 3 X X',
+                     'newgame 3 . O'):
+            self.assertTrue(self.run_commands(line)[-1].startswith('error '), line)
+        self.assertEqual(self.run_commands('newgame 4 A B line 3'), ['ok'])
+        self.assertEqual(self.run_commands('position board A.../.B../..../....'), ['ok'])
+
+    def test_search_error_still_sends_bestmove(self):
+        self.run_commands('newgame 3', 'position startpos moves 0,0')
+        with mock.patch('ai.get_hard_move', side_effect=RuntimeError('сбой')):
+            self.run_commands('go')
+            self.engine.stop()
+        lines = self.output.getvalue().splitlines()
+        self.assertIn('info string error RuntimeError: сбой', lines)
+        self.assertEqual(lines[-1], 'bestmove 0,1')
+
+
+if __name__ == '__main__':
+    unittest.main()
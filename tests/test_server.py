@@ -0,0 +1,132 @@
+"""Сервер партий: проверка команд, отмена хода компьютера, остановка по SIGTERM"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import unittest
+from unittest import mock
+
+from server import Connection, Game, GameServer
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def children(pid):
+    """Живые дочерние процессы pid (по /proc)"""
+    result = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'r') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid and fields[0] != 'Z':
+            result.append(int(name))
+    return result
+
+
+def alive(pid):
+    """Процесс существует и не зомби"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+class Client(Connection):
+    """Соединение без сокета: события копятся в списке"""
+
+    def __init__(self):
+        super().__init__(None)
+        self.events = []
+
+    def send(self, event, **fields):
+        self.events.append(dict(fields, event=event))
+
+
+class CommandTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GameServer(executor=concurrent.futures.ThreadPoolExecutor(1))
+
+    def tearDown(self):
+        self.server.close()
+
+    def reply(self, **message):
+        """Последнее событие в ответ на команду message"""
+        client = Client()
+        self.server.dispatch(client, json.dumps(message))
+        return client.events[-1]
+
+    def test_bad_symbols_and_seed(self):
+        for fields in ({'symbols': 5}, {'symbols': 'XO'}, {'symbols': ['X']},
+                       {'symbols': ['X', 'X']}, {'symbols': ['X', '']},
+                       {'symbols': [1, 2]}, {'seed': [1]}, {'seed': True}):
+            event = self.reply(op='create', mode='PvC', **fields)
+            self.assertEqual(event['event'], 'error', fields)
+        self.assertEqual(self.server.counters['games_created'], 0)
+
+    def test_cancelled_ai_move(self):
+        game = Game(1, 'PvC', 3, ('X', 'O'), 0, difficulty='Hard')
+        game.ai_player = 0
+        never = concurrent.futures.Future()
+
+        async def cancel():
+            self.server.counters['pending_searches'] += 1
+            task = asyncio.get_running_loop().create_task(self.server.ai_move(game, 0))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with mock.patch.object(self.server.scheduler, 'submit', return_value=never):
+            asyncio.run(cancel())
+        self.assertEqual(self.server.counters['pending_searches'], 0)
+
+
+@unittest.skipUnless(os.path.isdir('/proc'), "нужен /proc (Linux)")
+class SigtermTest(unittest.TestCase):
+
+    def test_sigterm_stops_pool(self):
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, 'main.py'), 'serve', '--port', '0',
+             '--workers', '1'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        try:
+            port = int(re.search(r"(\d+)\)", server.stdout.readline()).group(1))
+            with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+                lines = sock.makefile('r', encoding='utf-8')
+                # Компьютер ходит первым: пул процессов запускается
+                sock.sendall(json.dumps({'op': 'create', 'mode': 'PvC', 'symbol': 'O',
+                                         'difficulty': 'Easy'}).encode() + b'\n')
+                while json.loads(lines.readline())['event'] != 'move':
+                    pass
+                workers = children(server.pid)
+                self.assertTrue(workers)
+
+                server.send_signal(signal.SIGTERM)
+                self.assertEqual(server.wait(timeout=10), 0)
+            deadline = time.monotonic() + 5
+            while any(alive(pid) for pid in workers) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual([pid for pid in workers if alive(pid)], [])
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+            server.stdout.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
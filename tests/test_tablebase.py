@@ -0,0 +1,98 @@
+"""Таблица эндшпиля: нумерация позиций и значения против решателя PNS"""
+
+import os
+import random
+import tempfile
+import unittest
+from itertools import combinations
+
+from engine import has_line, line_masks
+from pns import DRAW, LOSS, WIN, ProofNumberSearch
+from tablebase import Tablebase, generate
+
+
+def random_position(rng, size, moves):
+    """Маски первого и второго игрока после не более moves случайных ходов
+
+    Партия останавливается на победе: позиции после конца партии
+    в таблице не встречаются.
+    """
+    masks = line_masks(size)
+    players = [0, 0]
+    for number, cell in enumerate(rng.sample(range(size * size), moves)):
+        players[number % 2] |= 1 << cell
+        if has_line(players[number % 2], masks):
+            break
+    return tuple(players)
+
+
+class IndexTest(unittest.TestCase):
+
+    def test_layers_are_dense(self):
+        # Каждая позиция слоя получает свой номер от 0 до layer_size - 1
+        for size, max_empty in ((3, 9), (4, 2)):
+            table = Tablebase(size, max_empty)
+            cells = range(size * size)
+            for empty in range(max_empty + 1):
+                filled = size * size - empty
+                seen = set()
+                for occupied in combinations(cells, filled):
+                    for first_cells in combinations(occupied, (filled + 1) // 2):
+                        first = sum(1 << cell for cell in first_cells)
+                        second = sum(1 << cell for cell in occupied) & ~first
+                        layer, index = table.index(first, second)
+                        self.assertEqual(layer, empty)
+                        seen.add(index)
+                self.assertEqual(seen, set(range(table.layer_size(empty))))
+
+    def test_out_of_table(self):
+        table = Tablebase(3, 2)
+        self.assertIsNone(table.index(0, 0))
+        # Вторых больше, чем первых: позиция невозможна
+        self.assertIsNone(table.index(0b000000011, 0b111111100))
+
+
+class ValueTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = generate(3, 9)
+
+    def test_against_pns(self):
+        rng = random.Random(26)
+        outcomes = {WIN: 1, DRAW: 0, LOSS: -1}
+        for _ in range(200):
+            first, second = random_position(rng, 3, rng.randrange(10))
+            value = self.table.probe(first, second)
+            result, _ = ProofNumberSearch(3).solve(first, second)
+            self.assertEqual((value > 0) - (value < 0), outcomes[result],
+                             f"{first:09b} {second:09b}")
+
+    def test_best_move_keeps_value(self):
+        rng = random.Random(126)
+        for _ in range(100):
+            first, second = random_position(rng, 3, rng.randrange(9))
+            masks = self.table.masks
+            if has_line(first, masks) or has_line(second, masks):
+                continue
+            value = self.table.probe(first, second)
+            cell, after = self.table.best_move(first, second)
+            self.assertFalse((first | second) >> cell & 1)
+            self.assertEqual(after, value)
+
+    def test_known_values(self):
+        self.assertEqual(self.table.probe(0, 0), 0)
+        # Первый собрал верхнюю строку: ходящий второй проиграл, пустых клеток 4
+        self.assertEqual(self.table.probe(0b000000111, 0b000011000), -5)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'table.bin')
+            self.table.save(path)
+            loaded = Tablebase.load(path)
+        self.assertEqual(loaded.max_empty, 9)
+        self.assertEqual(loaded.layers, self.table.layers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Задания окна timers.py и их снятие в окне игры, без дисплея"""
+
+import time
+import tkinter
+import unittest
+
+import ai
+import gui
+from engine import new_state
+from timers import Timers
+
+
+class Root(tkinter.Tk):
+    """Окно без дисплея: after работает в интерпретаторе Tcl"""
+
+    def __init__(self):
+        super().__init__(useTk=False)
+        self.destroyed = False
+
+    def destroy(self):
+        self.destroyed = True
+
+    def pending(self):
+        """Число заданий after в интерпретаторе"""
+        return len(self.tk.splitlist(self.tk.call('after', 'info')))
+
+
+class Widget:
+    """Метка или кнопка, которая только запоминает настройки"""
+
+    def config(self, **options):
+        self.options = options
+
+
+class TimersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Root()
+        self.now = 0.0
+        self.timers = Timers(self.root, clock=lambda: self.now)
+        self.log = []
+
+    def job(self, name):
+        return lambda: self.log.append(name)
+
+    def tick(self, now):
+        """Часы дошли до now, и взведенный after сработал"""
+        self.now = now
+        self.root.after_cancel(self.timers.after_id)
+        self.timers.fire()
+
+    def test_monotonic_order(self):
+        self.timers.call_at('a', 3, self.job('a'))
+        self.timers.call_at('b', 1, self.job('b'))
+        self.timers.call_at('c', 2, self.job('c'))
+        self.assertEqual(self.root.pending(), 1)
+        self.tick(1.5)
+        self.assertEqual(self.log, ['b'])
+        self.tick(5)
+        self.assertEqual(self.log, ['b', 'c', 'a'])
+        self.assertEqual(self.root.pending(), 0)
+
+    def test_replace_and_cancel(self):
+        self.timers.call_at('a', 1, self.job('old'))
+        self.timers.call_at('a', 2, self.job('new'))
+        self.timers.call_at('b', 1, self.job('b'))
+        self.timers.cancel('b')
+        self.assertFalse(self.timers.pending('b'))
+        self.tick(3)
+        self.assertEqual(self.log, ['new'])
+
+    def test_callback_reschedules(self):
+        def first():
+            self.log.append('first')
+            self.timers.cancel('second')
+            self.timers.call_later('first', 1, self.job('again'))
+
+        self.timers.call_at('first', 1, first)
+        self.timers.call_at('second', 1.5, self.job('second'))
+        self.tick(2)
+        self.assertEqual(self.log, ['first'])
+        self.assertTrue(self.timers.pending('first'))
+        self.assertEqual(self.root.pending(), 1)
+
+    def test_cancel_all(self):
+        for name in ('timer', 'computer', 'hint'):
+            self.timers.call_later(name, 10, self.job(name))
+        self.timers.cancel_all()
+        self.assertEqual(self.timers.jobs, {})
+        self.assertEqual(self.root.pending(), 0)
+
+    def test_event_loop(self):
+        timers = Timers(self.root)
+        timers.call_later('late', 0.03, self.job('late'))
+        timers.call_later('now', 0, self.job('now'))
+        deadline = time.monotonic() + 2
+        while len(self.log) < 2 and time.monotonic() < deadline:
+            self.root.tk.dooneevent(tkinter._tkinter.DONT_WAIT)
+            time.sleep(0.001)
+        self.assertEqual(self.log, ['now', 'late'])
+
+
+class GameWindowTimersTest(unittest.TestCase):
+    """Окно игры, собранное без виджетов: только то, что трогают таймеры"""
+
+    def setUp(self):
+        self.settings = dict(gui.GAME_SETTINGS)
+        gui.GAME_SETTINGS.update(mode='PvP', size=3, timer_enabled=True, timer_seconds=30,
+                                 ai_starts=False)
+        window = gui.GameWindow.__new__(gui.GameWindow)
+        window.root = Root()
+        window.timers = Timers(window.root)
+        window.load_settings()
+        window.colors = gui.THEMES['dark']
+        window.players = ['X', 'O']
+        window.state = new_state(3, 0)
+        window.redo_stack = []
+        window.game_active = True
+        window.timer_running = False
+        window.turn_deadline = None
+        window.timeout_player = None
+        window.thinking = None
+        window.ponder = None
+        window.isolated = None
+        window.session = ai.SearchSession(3)
+        window.hint = ai.Hint(3)
+        window.heatmap = {}
+        window.timer_label = Widget()
+        window.play_now_button = Widget()
+        window.clear_cell = lambda cell: None
+        window.update_status = lambda: None
+        window.start_record()
+        self.window = window
+
+    def tearDown(self):
+        gui.GAME_SETTINGS.clear()
+        gui.GAME_SETTINGS.update(self.settings)
+
+    def schedule_everything(self):
+        window = self.window
+        window.start_timer()
+        window.schedule_computer_move()
+        window.timers.call_later('hint', 60, lambda: None)
+        window.timers.call_later('thinking', 60, lambda: None)
+        self.assertEqual(window.root.pending(), 1)
+
+    def test_new_game_cancels_jobs(self):
+        self.schedule_everything()
+        self.window.new_game()
+        # Остается только таймер новой партии
+        self.assertEqual(list(self.window.timers.jobs), ['timer'])
+        self.assertEqual(self.window.root.pending(), 1)
+
+    def test_back_to_menu_cancels_jobs(self):
+        self.schedule_everything()
+        self.window.back_to_menu()
+        self.assertEqual(self.window.timers.jobs, {})
+        self.assertEqual(self.window.root.pending(), 0)
+        self.assertTrue(self.window.root.destroyed)
+        self.assertIs(self.window.next_screen, gui.MainMenu)
+
+    def test_timer_wakes_on_visible_change(self):
+        window = self.window
+        window.timer_running = True
+        window.turn_deadline = time.monotonic() + 2.5
+        window.update_timer()
+        self.assertEqual(window.timer_seconds, 3)
+        self.assertEqual(window.timer_label.options['text'], "Таймер: 3с")
+        # Следующее пробуждение — когда останется 2 секунды
+        deadline, _ = window.timers.jobs['timer']
+        self.assertAlmostEqual(deadline, window.turn_deadline - 2)
+
+    def test_ai_delay_setting(self):
+        gui.GAME_SETTINGS['ai_delay_ms'] = 0
+        started = time.monotonic()
+        self.window.schedule_computer_move()
+        deadline, _ = self.window.timers.jobs['computer']
+        self.assertLessEqual(deadline - started, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Правило k в ряд: GameState и SparseState против полного перебора"""
+
+import random
+import unittest
+
+from engine import DENSE_MAX_SIZE, DIRECTIONS, GameState, SparseState, winning_lines
+
+
+def brute_line_through(board, size, win_length, cell, player):
+    """Есть ли через клетку cell win_length клеток игрока подряд (cell считается его)"""
+    row, col = divmod(cell, size)
+    for d_row, d_col in DIRECTIONS:
+        run = 1
+        for sign in (1, -1):
+            r, c = row + sign * d_row, col + sign * d_col
+            while 0 <= r < size and 0 <= c < size and board[r * size + c] == player:
+                run += 1
+                r, c = r + sign * d_row, c + sign * d_col
+        if run >= win_length:
+            return True
+    return False
+
+
+def brute_winning_cells(board, size, win_length, player):
+    """Пустые клетки, ход в которые дает игроку линию"""
+    return {cell for cell, value in enumerate(board)
+            if value is None and brute_line_through(board, size, win_length, cell, player)}
+
+
+class WinRuleTest(unittest.TestCase):
+
+    def test_line_count(self):
+        for size in range(3, 13):
+            for k in range(3, size):
+                lines = winning_lines(size, k)
+                span = size - k + 1
+                self.assertEqual(len(lines), 2 * size * span + 2 * span * span)
+                self.assertEqual(len(set(lines)), len(lines))
+
+    def test_random_games(self):
+        rng = random.Random(41)
+        for size in range(3, 13):
+            for k in range(3, size + 1):
+                classes = (GameState, SparseState) if size <= DENSE_MAX_SIZE else (SparseState,)
+                for _ in range(3):
+                    cells = list(range(size * size))
+                    rng.shuffle(cells)
+                    # Часть партий — только в углу поля, чтобы линии собирались чаще
+                    if rng.random() < 0.5:
+                        corner = min(size, k + 2)
+                        cells = [cell for cell in cells
+                                 if cell // size < corner and cell % size < corner]
+                    for cls in classes:
+                        self.play_game(cls, size, k, cells)
+
+    def play_game(self, cls, size, k, cells):
+        """Ходы cells по очереди: победа и winning_move совпадают с перебором"""
+        state = cls(size, win_length=k)
+        board = [None] * (size * size)
+        name = f"{cls.__name__} {size}x{size} k={k}"
+        for cell in cells:
+            for player in (0, 1):
+                expected = brute_winning_cells(board, size, k, player)
+                move = state.winning_move(player)
+                if expected:
+                    self.assertIn(move, expected, name)
+                else:
+                    self.assertIsNone(move, name)
+            player = state.to_move
+            state.play(cell)
+            board[cell] = player
+            if brute_line_through(board, size, k, cell, player):
+                self.assertEqual(state.winner, player, name)
+                line = state.winning_cells()
+                self.assertEqual(len(line), k, name)
+                self.assertTrue(all(board[c] == player for c in line), name)
+                break
+            self.assertIsNone(state.winner, name)
+        while state.stack:
+            state.undo()
+        self.assertIsNone(state.winner, name)
+        self.assertEqual(state.hash, 0, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Отложенные задания окна игры на одних монотонных часах
+
+Таймер хода, задержка хода компьютера и опрос фоновых потоков
+(подсказка, поиск Сложного ИИ) — именованные задания Timers со сроком
+по time.monotonic. В Tk взведено не больше одного after — на ближайший
+срок, поэтому задания не копятся и снимаются все разом (новая партия,
+выход в меню). Таймер хода хранит срок конца хода, а не счетчик секунд:
+опоздавший вызов after не сдвигает часы, а просыпается окно только
+тогда, когда меняется показанное число секунд.
+"""
+
+import math
+import time
+
+
+class Timers:
+    """Именованные задания окна root; у имени не больше одного задания"""
+
+    def __init__(self, root, clock=time.monotonic):
+        self.root = root
+        self.clock = clock
+        self.jobs = {}
+        self.after_id = None
+        # Срок, на который взведен after (None — не взведен)
+        self.wake = None
+
+    def call_at(self, name, deadline, callback):
+        """Вызов callback в момент deadline по часам clock; заменяет задание name"""
+        self.jobs[name] = (deadline, callback)
+        self.arm()
+
+    def call_later(self, name, delay, callback):
+        """Вызов callback через delay секунд (0 — при следующем обходе событий)"""
+        self.call_at(name, self.clock() + delay, callback)
+
+    def cancel(self, name):
+        """Снятие задания name, если оно есть"""
+        if self.jobs.pop(name, None) is not None:
+            self.arm()
+
+    def cancel_all(self):
+        """Снятие всех заданий"""
+        self.jobs.clear()
+        self.arm()
+
+    def pending(self, name):
+        """Ждет ли задание name своего срока"""
+        return name in self.jobs
+
+    def arm(self):
+        """Один after на ближайший срок"""
+        deadline = min((job[0] for job in self.jobs.values()), default=None)
+        if deadline == self.wake:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.wake = deadline
+        if deadline is not None:
+            delay_ms = max(0, math.ceil((deadline - self.clock()) * 1000))
+            self.after_id = self.root.after(delay_ms, self.fire)
+
+    def fire(self):
+        """Вызов заданий, срок которых наступил, по порядку сроков"""
+        self.after_id = None
+        self.wake = None
+        now = self.clock()
+        due = sorted(
+            (job[0], name, job) for name, job in self.jobs.items() if job[0] <= now
+        )
+        try:
+            for _, name, job in due:
+                # Задание могли снять или переназначить вызовы перед ним
+                if self.jobs.get(name) is not job:
+                    continue
+                del self.jobs[name]
+                job[1]()
+        finally:
+            self.arm()
@@ -0,0 +1,272 @@
+"""Турнир вариантов ИИ с рейтингом Эло
+
+Участник задается строкой «уровень[:бюджет]»: Easy, Medium, Hard:2000,
+Hard:20000. Формат — круговой (все со всеми) или гаунтлет (первый
+участник против остальных). Каждая пара играет на каждом размере поля
+каждый дебют из набора дважды, меняясь сторонами. Дебюты — случайные
+первые ходы с фиксированным зерном, поэтому набор повторяем.
+
+Партии идут в пуле процессов. Готовые результаты сохраняются в файл
+контрольной точки; повторный запуск с теми же параметрами доигрывает
+только недостающие партии.
+
+    python main.py tournament --players Easy Medium Hard:2000 Hard:20000 --sizes 3 4
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from math import log10
+
+from ai import DEFAULT_NODE_BUDGET
+from engine import GameState
+from selfplay import play_game
+
+LEVELS = ('Easy', 'Medium', 'Hard')
+# Сохранять контрольную точку не реже, чем раз в столько секунд
+CHECKPOINT_SECONDS = 5
+BOOTSTRAP_SAMPLES = 200
+
+
+def parse_player(text):
+    """Уровень и бюджет узлов участника из строки «уровень[:бюджет]»"""
+    level, _, budget = text.partition(':')
+    if level not in LEVELS:
+        raise ValueError(f"участник {text!r}: уровень Easy, Medium или Hard")
+    return level, int(budget) if budget else DEFAULT_NODE_BUDGET
+
+
+def opening_set(size, count, plies, seed):
+    """Набор из count разных дебютов по plies ходов без готовой победы"""
+    rng = random.Random(f"{seed}:{size}")
+    openings = []
+    attempts = 0
+    while len(openings) < count and attempts < count * 100:
+        attempts += 1
+        state = GameState(size, 0)
+        for _ in range(plies):
+            state.play(rng.choice(state.empty_cells()))
+        opening = list(state.stack)
+        if state.winner is None and opening not in openings:
+            openings.append(opening)
+    return openings
+
+
+def schedule(players, sizes, openings, mode):
+    """Все партии турнира: (ключ, размер, дебют, первый, второй)"""
+    if mode == 'gauntlet':
+        pairs = [(0, other) for other in range(1, len(players))]
+    else:
+        pairs = list(combinations(range(len(players)), 2))
+    games = []
+    for size in sizes:
+        for number, opening in enumerate(openings[size]):
+            for a, b in pairs:
+                for first, second in ((a, b), (b, a)):
+                    key = f"{size}/{number}/{players[first]}/{players[second]}"
+                    games.append((key, size, opening, first, second))
+    return games
+
+
+def run_game(key, size, opening, first, second, seed):
+    """Одна партия в процессе пула; возвращает (ключ, очки первого, время)"""
+    (first_level, first_budget), (second_level, second_budget) = first, second
+    started = time.perf_counter()
+    result = play_game(size, (first_level, second_level), f"{seed}:{key}",
+                       (first_budget, second_budget), opening=opening)
+    winner = result['winner']
+    score = 0.5 if winner is None else (1.0 if winner == 0 else 0.0)
+    return key, score, time.perf_counter() - started
+
+
+def elo(count, games, iterations=200):
+    """Рейтинги Эло по партиям (первый, второй, очки первого).
+
+    Модель Брэдли — Терри, ничья считается половиной победы. Каждой паре
+    добавляется по одной виртуальной ничьей, чтобы участник без очков
+    не уходил в минус бесконечность. Средний рейтинг — 1500.
+    """
+    wins = [[0.0] * count for _ in range(count)]
+    for a, b, score in games:
+        wins[a][b] += score
+        wins[b][a] += 1 - score
+    for a, b in combinations(range(count), 2):
+        wins[a][b] += 0.5
+        wins[b][a] += 0.5
+
+    strength = [1.0] * count
+    for _ in range(iterations):
+        updated = []
+        for a in range(count):
+            total = sum(wins[a])
+            weight = sum((wins[a][b] + wins[b][a]) / (strength[a] + strength[b])
+                         for b in range(count) if b != a)
+            updated.append(total / weight if weight else strength[a])
+        strength = updated
+
+    ratings = [400 * log10(value) for value in strength]
+    mean = sum(ratings) / count
+    return [rating - mean + 1500 for rating in ratings]
+
+
+def elo_intervals(count, games, samples=BOOTSTRAP_SAMPLES, seed=0):
+    """95% доверительные интервалы рейтингов бутстрепом по партиям"""
+    rng = random.Random(seed)
+    draws = [[] for _ in range(count)]
+    for _ in range(samples):
+        resampled = [rng.choice(games) for _ in games]
+        for player, rating in enumerate(elo(count, resampled, iterations=50)):
+            draws[player].append(rating)
+    intervals = []
+    for values in draws:
+        values.sort()
+        intervals.append((values[int(0.025 * len(values))],
+                          values[min(len(values) - 1, int(0.975 * len(values)))]))
+    return intervals
+
+
+def load_checkpoint(path, config):
+    """Результаты из контрольной точки с теми же параметрами турнира"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get('config') != config:
+        raise ValueError(f"{path}: контрольная точка другого турнира (используйте --fresh)")
+    return data.get('results', {})
+
+
+def save_checkpoint(path, config, results):
+    """Запись контрольной точки через временный файл, чтобы не оставить ее обрезанной"""
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'results': results}, f, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def run_tournament(players, sizes, openings_count=4, plies=2, mode='round-robin',
+                   workers=None, seed=0, checkpoint=None, fresh=False, progress=None):
+    """Турнир целиком; возвращает результаты {ключ: очки первого}"""
+    specs = [parse_player(player) for player in players]
+    config = {'players': list(players), 'sizes': list(sizes), 'openings': openings_count,
+              'plies': plies, 'mode': mode, 'seed': str(seed)}
+    results = {}
+    if checkpoint and not fresh:
+        results = load_checkpoint(checkpoint, config)
+
+    openings = {size: opening_set(size, openings_count, plies, seed) for size in sizes}
+    games = [game for game in schedule(players, sizes, openings, mode)
+             if game[0] not in results]
+    total = len(results) + len(games)
+    if progress:
+        progress(len(results), total)
+
+    saved = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_game, key, size, opening, specs[first], specs[second], seed)
+                   for key, size, opening, first, second in games]
+        try:
+            for future in as_completed(futures):
+                key, score, _ = future.result()
+                results[key] = score
+                if progress:
+                    progress(len(results), total)
+                if checkpoint and time.perf_counter() - saved > CHECKPOINT_SECONDS:
+                    save_checkpoint(checkpoint, config, results)
+                    saved = time.perf_counter()
+        finally:
+            for future in futures:
+                future.cancel()
+            if checkpoint:
+                save_checkpoint(checkpoint, config, results)
+    return results
+
+
+def report(players, results):
+    """Таблица рейтингов и попарного счета"""
+    index = {player: number for number, player in enumerate(players)}
+    games = []
+    for key, score in results.items():
+        _, _, first, second = key.split('/')
+        games.append((index[first], index[second], score))
+
+    ratings = elo(len(players), games)
+    intervals = elo_intervals(len(players), games) if games else [(0, 0)] * len(players)
+    lines = [f"Партий: {len(games)}"]
+    order = sorted(range(len(players)), key=lambda player: -ratings[player])
+    for place, player in enumerate(order, 1):
+        points = sum(score if a == player else 1 - score
+                     for a, b, score in games if player in (a, b))
+        played = sum(1 for a, b, _ in games if player in (a, b))
+        low, high = intervals[player]
+        lines.append(f"{place:2d}. {players[player]:14s} Эло {ratings[player]:7.1f} "
+                     f"[{low:7.1f}; {high:7.1f}]  очки {points:g}/{played}")
+
+    lines.append("Попарно (очки строки против столбца):")
+    lines.append(' ' * 16 + ''.join(f"{players[b][:10]:>11}" for b in range(len(players))))
+    for a in range(len(players)):
+        cells = []
+        for b in range(len(players)):
+            points = played = 0
+            for first, second, score in games:
+                if (first, second) == (a, b):
+                    points, played = points + score, played + 1
+                elif (first, second) == (b, a):
+                    points, played = points + 1 - score, played + 1
+            cells.append(f"{points:g}/{played}" if played else '-')
+        lines.append(f"{players[a][:14]:16s}" + ''.join(f"{cell:>11}" for cell in cells))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Запуск турнира из командной строки"""
+    parser = argparse.ArgumentParser(description="Турнир вариантов ИИ")
+    parser.add_argument('--players', nargs='+', required=True,
+                        help="участники: Easy, Medium, Hard[:бюджет]")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[3])
+    parser.add_argument('--openings', type=int, default=4, help="дебютов на размер поля")
+    parser.add_argument('--plies', type=int, default=2, help="ходов в дебюте")
+    parser.add_argument('--mode', choices=('round-robin', 'gauntlet'), default='round-robin')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', default=0)
+    parser.add_argument('--checkpoint', default='tournament.json')
+    parser.add_argument('--fresh', action='store_true', help="не продолжать прошлый прогон")
+    args = parser.parse_args(argv)
+
+    if len(set(args.players)) != len(args.players) or len(args.players) < 2:
+        parser.error("нужно хотя бы два разных участника")
+    try:
+        for player in args.players:
+            parse_player(player)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\rсыграно {done}/{total} ({time.perf_counter() - started:.0f}с)",
+              end='', flush=True)
+
+    try:
+        results = run_tournament(args.players, args.sizes, args.openings, args.plies,
+                                 args.mode, args.workers, args.seed, args.checkpoint,
+                                 args.fresh, progress)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print(f"\nПрервано; результаты сохранены в {args.checkpoint}")
+        return 130
+    print()
+    print(report(args.players, results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Подбор весов оценки линий по партиям компьютера против себя
+
+Каждая позиция партии описывается числом линий с a фигурами одного
+игрока и b фигурами другого. Оценка считается антисимметричной:
+вес (a, b) равен минус весу (b, a), поэтому признак пары a > b —
+разность числа таких линий у первого и второго игрока. Метка — итог
+партии для первого игрока: 1, 0 или -1.
+
+Веса подбираются методом наименьших квадратов или логистической
+регрессией (NumPy) и записываются в eval_weights.json, который
+читает evaluate_board. Чтобы оценка оставалась в привычном масштабе
+(окна стремления, оценки побед), веса масштабируются так, что вес почти
+полной линии совпадает с ручным.
+
+    python main.py tune fit --sizes 3 4 5 --games 2000
+    python main.py tune compare --size 4 --depths 1 2 3
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import ai
+from engine import GameState
+from tournament import opening_set
+
+# Доля случайных ходов в партиях для обучения: без нее партии Среднего
+# ИИ почти одинаковы
+EXPLORE = 0.25
+
+
+def patterns(size):
+    """Пары (a, b), a > b, для которых подбирается вес"""
+    return [(a, b) for a in range(1, size) for b in range(a) if a + b <= size]
+
+
+def features(state, pairs):
+    """Признаки позиции с точки зрения первого игрока"""
+    stride = state.size + 1
+    counts = [0] * (stride * stride)
+    for a, b in zip(*state.counts):
+        counts[a * stride + b] += 1
+    return [counts[a * stride + b] - counts[b * stride + a] for a, b in pairs]
+
+
+def generate(size, games, seed=0, progress=None):
+    """Позиции (признаки, итог для первого игрока) из партий Среднего ИИ со случайными ходами"""
+    rng = random.Random(f"{seed}:{size}")
+    pairs = patterns(size)
+    rows, labels = [], []
+    symbols = ('X', 'O')
+    for number in range(games):
+        state = GameState(size, 0)
+        positions = []
+        while state.winner is None and not state.is_full():
+            positions.append(features(state, pairs))
+            player = state.to_move
+            if rng.random() < EXPLORE:
+                cell = rng.choice(state.empty_cells())
+            else:
+                cell = ai.get_medium_move(state.to_board(symbols), size, symbols[player],
+                                          symbols[1 - player], rng)
+            state.play(cell)
+        result = 0 if state.winner is None else (1 if state.winner == 0 else -1)
+        rows.extend(positions)
+        labels.extend([result] * len(positions))
+        if progress and (number + 1) % 100 == 0:
+            progress(number + 1, len(rows))
+    return rows, labels
+
+
+def import_numpy():
+    """NumPy нужен только для подбора весов"""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("для подбора весов нужен NumPy: pip install numpy")
+    return numpy
+
+
+def fit(rows, labels, method='logistic', l2=1e-3, iterations=25):
+    """Веса признаков: наименьшие квадраты или логистическая регрессия (метод Ньютона)"""
+    np = import_numpy()
+    x = np.asarray(rows, dtype=float)
+    y = np.asarray(labels, dtype=float)
+    if method == 'lsq':
+        weights, *_ = np.linalg.lstsq(x, y, rcond=None)
+        return weights.tolist()
+
+    # Ничья — половина победы: мягкая метка 0.5
+    target = (y + 1) / 2
+    weights = np.zeros(x.shape[1])
+    regular = l2 * len(y) * np.eye(x.shape[1])
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(x @ weights)))
+        gradient = x.T @ (p - target) + regular @ weights
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + regular
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    return weights.tolist()
+
+
+def weight_table(size, pairs, weights):
+    """Квадратная таблица весов в масштабе ручной оценки"""
+    values = dict(zip(pairs, weights))
+    reference = values.get((size - 1, 0), 0)
+    if reference <= 0:
+        reference = max((abs(value) for value in weights), default=1) or 1
+    scale = 10 ** (size - 2) / reference
+    table = [[0.0] * (size + 1) for _ in range(size + 1)]
+    for (a, b), value in values.items():
+        table[a][b] = round(value * scale, 3)
+        table[b][a] = -table[a][b]
+    # Полная линия — уже победа; вес как у ручной оценки
+    table[size][0] = 10 ** (size - 1)
+    table[0][size] = -10 ** (size - 1)
+    return table
+
+
+def save_weights(tables, path=ai.EVAL_WEIGHTS_FILE):
+    """Запись таблиц весов, сохраняя веса других размеров из файла"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {'sizes': {}}
+    for size, entry in tables.items():
+        data['sizes'][str(size)] = entry
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def search_move(state, player, depth, weights):
+    """Ход поиска на фиксированную глубину (сначала выигрыш и блокировка)"""
+    for threat in (player, 1 - player):
+        cell = state.winning_move(threat)
+        if cell is not None:
+            return cell, 0
+    # Поиск считает компьютер игроком 0: для второго игрока переставляем стороны
+    view = GameState(state.size, 0)
+    for cell in state.stack:
+        view.play(cell, state.cells[cell] ^ player)
+    view.to_move = 0
+    search = ai.Search(state.size, node_budget=float('inf'), max_depth=depth, weights=weights)
+    return search.best_move(view), search.nodes
+
+
+def compare(size, depths, openings=8, plies=2, seed=0, verbose=True):
+    """Подобранные веса против ручных: очки и время хода на каждой паре глубин.
+
+    Для каждой глубины d играются матчи «подобранные d против ручных d»
+    и «подобранные d против ручных d + 1» на наборе дебютов, каждый
+    дебют дважды со сменой сторон. Возвращает список строк-итогов.
+    """
+    tuned = ai.load_eval_weights().get(size)
+    if tuned is None:
+        raise RuntimeError(f"в {ai.EVAL_WEIGHTS_FILE} нет весов для поля {size}x{size}")
+    matches = []
+    for depth in depths:
+        matches.append((depth, depth))
+        matches.append((depth, depth + 1))
+
+    results = []
+    for tuned_depth, hand_depth in matches:
+        outcomes = [0, 0, 0]
+        seconds = {'tuned': 0.0, 'hand': 0.0}
+        moves = {'tuned': 0, 'hand': 0}
+        for opening in opening_set(size, openings, plies, seed):
+            for tuned_player in (0, 1):
+                state = GameState(size, 0)
+                for cell in opening:
+                    state.play(cell)
+                while state.winner is None and not state.is_full():
+                    player = state.to_move
+                    name = 'tuned' if player == tuned_player else 'hand'
+                    started = time.perf_counter()
+                    if name == 'tuned':
+                        cell, _ = search_move(state, player, tuned_depth, tuned)
+                    else:
+                        cell, _ = search_move(state, player, hand_depth, 'hand')
+                    seconds[name] += time.perf_counter() - started
+                    moves[name] += 1
+                    state.play(cell)
+                if state.winner is None:
+                    outcomes[1] += 1
+                elif state.winner == tuned_player:
+                    outcomes[0] += 1
+                else:
+                    outcomes[2] += 1
+        per_move = {name: seconds[name] / max(1, moves[name]) * 1000 for name in seconds}
+        line = (f"подобранные d={tuned_depth} против ручных d={hand_depth}: "
+                f"+{outcomes[0]} ={outcomes[1]} -{outcomes[2]}; "
+                f"мс на ход {per_move['tuned']:.1f} против {per_move['hand']:.1f}")
+        results.append(line)
+        if verbose:
+            print(line, flush=True)
+    return results
+
+
+def agreement(size, depths, positions=16, verbose=True):
+    """Совпадение ходов с глубоким поиском на ручных весах и время хода.
+
+    Ничьи в матчах почти неизбежны (угрозы всегда блокируются), поэтому
+    силу удобнее мерить тем, как часто неглубокий поиск выбирает тот же
+    ход, что и поиск на две глубины больше самой большой из depths.
+    """
+    from bench import position_suite
+
+    tuned = ai.load_eval_weights().get(size)
+    if tuned is None:
+        raise RuntimeError(f"в {ai.EVAL_WEIGHTS_FILE} нет весов для поля {size}x{size}")
+    suite = position_suite(sizes=(size,), per_size=positions)
+    reference_depth = max(depths) + 2
+    reference = [search_move(state, 0, reference_depth, 'hand')[0] for state in suite]
+
+    results = []
+    for depth in depths:
+        for name, weights in (('подобранные', tuned), ('ручные', 'hand')):
+            same = 0
+            started = time.perf_counter()
+            for state, best in zip(suite, reference):
+                same += search_move(state, 0, depth, weights)[0] == best
+            per_move = (time.perf_counter() - started) / len(suite) * 1000
+            line = (f"{name:11s} d={depth}: совпадение с d={reference_depth} "
+                    f"{same}/{len(suite)}, {per_move:.1f} мс на ход")
+            results.append(line)
+            if verbose:
+                print(line, flush=True)
+    return results
+
+
+def main(argv=None):
+    """Подбор весов и сравнение из командной строки"""
+    parser = argparse.ArgumentParser(description="Подбор весов оценки")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = commands.add_parser('fit', help="партии, подбор и запись весов")
+    fit_parser.add_argument('--sizes', nargs='+', type=int, default=[3, 4, 5])
+    fit_parser.add_argument('--games', type=int, default=2000)
+    fit_parser.add_argument('--method', choices=('logistic', 'lsq'), default='logistic')
+    fit_parser.add_argument('--seed', default=0)
+    fit_parser.add_argument('--output', default=ai.EVAL_WEIGHTS_FILE)
+
+    compare_parser = commands.add_parser('compare', help="подобранные веса против ручных")
+    compare_parser.add_argument('--size', type=int, default=4)
+    compare_parser.add_argument('--depths', nargs='+', type=int, default=[1, 2, 3])
+    compare_parser.add_argument('--openings', type=int, default=8)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'compare':
+            compare(args.size, args.depths, args.openings)
+            agreement(args.size, args.depths)
+            return 0
+
+        tables = {}
+        for size in args.sizes:
+            started = time.perf_counter()
+            rows, labels = generate(size, args.games, args.seed)
+            pairs = patterns(size)
+            weights = fit(rows, labels, args.method)
+            table = weight_table(size, pairs, weights)
+            tables[size] = {'method': args.method, 'games': args.games,
+                            'positions': len(rows), 'weights': table}
+            print(f"{size}x{size}: {args.games} партий, {len(rows)} позиций, "
+                  f"{time.perf_counter() - started:.1f}с")
+            for a, b in pairs:
+                print(f"    ({a}, {b}): {table[a][b]:10.3f}")
+        save_weights(tables, args.output)
+        print(f"Веса записаны в {args.output}")
+    except RuntimeError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())